@@ -1,2 +1,22 @@
-from .api_client import ApiClient  # noqa
-from .api_cluster import ApiCluster  # noqa
+"""Clients of the REST API of a remote runner.
+
+`ApiCluster` is imported on first access, so that the API clients load without `distributed`.
+"""
+
+from typing import TYPE_CHECKING
+
+from .api_client import ApiClient, AsyncApiClient
+
+
+if TYPE_CHECKING:
+    from .api_cluster import ApiCluster
+
+__all__ = ["ApiClient", "AsyncApiClient", "ApiCluster"]
+
+
+def __getattr__(name: str):
+    if name == "ApiCluster":
+        from .api_cluster import ApiCluster
+
+        return ApiCluster
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
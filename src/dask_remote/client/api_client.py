@@ -1,24 +1,137 @@
+import math
+from typing import Any, Dict, Iterator, List, Optional
+
 from requests import HTTPError
 
-from ..client_base import AuthClient
+from ..client_base import AsyncAuthClient, AuthClient, ClientError, TTLCache
+
+
+# Default time-to-live of the cached scheduler address and dashboard link at 5'
+DEFAULT_CACHE_TTL = 300.0
+
+
+class CachedApiMixin:
+    """Cache the values of the API that are not expected to change, for `cache_ttl` seconds.
+
+    The cache may be shared between clients, e.g. a synchronous and an asyncio one.
+    """
+
+    cache_ttl: float = DEFAULT_CACHE_TTL
+    _cache: Optional[TTLCache] = None
+
+    @property
+    def cache(self) -> TTLCache:
+        if self._cache is None:
+            self._cache = TTLCache(self.cache_ttl)
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: TTLCache) -> None:
+        self._cache = cache
 
+    def invalidate_cache(self) -> None:
+        """Forget cached values, as well as which endpoint the scheduler address comes from."""
+        self.cache.clear()
+
+    def _use_scheduler_info_address(self) -> None:
+        """Remember `/scheduler_address` is not served (until the cache is invalidated)."""
+        self.cache.set("scheduler_address_fallback", True, ttl=math.inf)
+
+    @staticmethod
+    def _unpack_batch(response: dict, return_exceptions: bool) -> List[Any]:
+        results: List[Any] = []
+        for item in response["results"]:
+            if item["error"] is None:
+                results.append(item["result"])
+            elif return_exceptions:
+                results.append(ClientError(item["error"]))
+            else:
+                raise ClientError(item["error"])
+        return results
+
+
+class ApiClient(CachedApiMixin, AuthClient):
+    _workers: Optional[Dict[str, dict]] = None
+    _workers_token: Optional[str] = None
+    _workers_fields: Optional[List[str]] = None
 
-class ApiClient(AuthClient):
     def get_status(self) -> str:
         response = self.get("/status")
         return response["message"]
 
     def get_scheduler_address(self) -> str:
-        try:
-            response = self.get("/scheduler_address")
-            return response["message"]
-        except (KeyError, HTTPError):
-            response = self.get("/scheduler_info")
-            return response["address"]
+        address = self.cache.get("scheduler_address")
+        if address is not None:
+            return address
+        if not self.cache.get("scheduler_address_fallback"):
+            try:
+                address = self.get("/scheduler_address")["message"]
+            except KeyError:
+                self._use_scheduler_info_address()
+            except HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise  # e.g. unavailable while the cluster restarts, no reason to fall back
+                self._use_scheduler_info_address()
+        if address is None:
+            address = self.get("/scheduler_info")["address"]
+        self.cache.set("scheduler_address", address)
+        return address
+
+    def get_scheduler_info_deltas(
+        self,
+        since: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+    ) -> dict:
+        params: dict = {}
+        if since is not None:
+            params["since"] = since
+        if after is not None:
+            params["after"] = after
+        if limit is not None:
+            params["limit"] = limit
+        if fields is not None:
+            params["fields"] = ",".join(fields)
+        return self.get("/scheduler_info/deltas", params=params)
+
+    def sync_workers(
+        self, fields: Optional[List[str]] = None, page_size: Optional[int] = 1000
+    ) -> Dict[str, dict]:
+        """Update the local mirror of the cluster workers from their deltas, and return it."""
+        if self._workers is None or fields != self._workers_fields:
+            self._workers, self._workers_token, self._workers_fields = {}, None, fields
+        workers = self._workers
+
+        since, after, token = self._workers_token, None, None
+        while True:
+            deltas = self.get_scheduler_info_deltas(
+                since=since, after=after, limit=page_size, fields=fields
+            )
+            if deltas["reset"] and since is not None and after is not None:
+                # the token expired between pages (e.g. the API restarted): list all workers
+                since, after, token = None, None, None
+                continue
+            if token is None:
+                token = deltas["token"]  # pages may be more recent, so resume from the first
+                if deltas["reset"]:
+                    workers.clear()
+            workers.update(deltas["added"])
+            workers.update(deltas["changed"])
+            for worker_id in deltas["removed"]:
+                workers.pop(worker_id, None)
+            after = deltas["next_after"]
+            if after is None:
+                break
+        self._workers_token = token
+        return workers
 
     def get_dashboard_link(self) -> str:
-        response = self.get("/dashboard_link")
-        return response["message"]
+        link = self.cache.get("dashboard_link")
+        if link is None:
+            link = self.get("/dashboard_link")["message"]
+            self.cache.set("dashboard_link", link)
+        return link
 
     def get_scale(self) -> int:
         response = self.get("/scale")
@@ -29,3 +142,77 @@ class ApiClient(AuthClient):
 
     def set_adapt(self, minimum: int, maximum: int) -> None:
         self.post("/adapt", params={"minimum": minimum, "maximum": maximum})
+
+    def batch(self, commands: List[dict], return_exceptions: bool = False) -> List[Any]:
+        """Run many commands in a single request, and return their results in order.
+
+        Params:
+            commands: commands such as `{"attribute": "status"}`, or
+                `{"method": "scale", "args": [2]}`
+            return_exceptions: return a `ClientError` in place of the result of failed commands,
+                rather than raising the first
+        """
+        response = self.post("/batch", data={"commands": commands})
+        return self._unpack_batch(response, return_exceptions)
+
+    def get_attributes(self, *attributes: str) -> Dict[str, Any]:
+        """Return the given cluster attributes, e.g. `"status", "num_workers"`, at once."""
+        results = self.batch([{"attribute": attribute} for attribute in attributes])
+        return dict(zip(attributes, results))
+
+    def watch(self) -> Iterator[dict]:
+        """Yield the cluster state each time it changes, e.g. `{"num_workers": 2, ...}`."""
+        return self.stream_events("/events")
+
+
+class AsyncApiClient(CachedApiMixin, AsyncAuthClient):
+    async def get_status(self) -> str:
+        response = await self.get("/status")
+        return response["message"]
+
+    async def get_scheduler_address(self) -> str:
+        import httpx
+
+        address = self.cache.get("scheduler_address")
+        if address is not None:
+            return address
+        if not self.cache.get("scheduler_address_fallback"):
+            try:
+                address = (await self.get("/scheduler_address"))["message"]
+            except KeyError:
+                self._use_scheduler_info_address()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    raise
+                self._use_scheduler_info_address()
+        if address is None:
+            address = (await self.get("/scheduler_info"))["address"]
+        self.cache.set("scheduler_address", address)
+        return address
+
+    async def get_dashboard_link(self) -> str:
+        link = self.cache.get("dashboard_link")
+        if link is None:
+            link = (await self.get("/dashboard_link"))["message"]
+            self.cache.set("dashboard_link", link)
+        return link
+
+    async def get_scale(self) -> int:
+        response = await self.get("/scale")
+        return int(response["message"])
+
+    async def set_scale(self, n: int) -> None:
+        await self.post("/scale", params={"n": n})
+
+    async def set_adapt(self, minimum: int, maximum: int) -> None:
+        await self.post("/adapt", params={"minimum": minimum, "maximum": maximum})
+
+    async def batch(self, commands: List[dict], return_exceptions: bool = False) -> List[Any]:
+        """Run many commands in a single request, and return their results in order."""
+        response = await self.post("/batch", data={"commands": commands})
+        return self._unpack_batch(response, return_exceptions)
+
+    async def get_attributes(self, *attributes: str) -> Dict[str, Any]:
+        """Return the given cluster attributes, e.g. `"status", "num_workers"`, at once."""
+        results = await self.batch([{"attribute": attribute} for attribute in attributes])
+        return dict(zip(attributes, results))
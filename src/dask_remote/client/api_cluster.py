@@ -1,11 +1,30 @@
-from typing import Optional
+import logging
+from typing import Awaitable, Callable, Optional, Set
 
+from ..client_base import TTLCache
 from ..cluster_base import RemoteSchedulerCluster
-from .api_client import ApiClient
+from .api_client import DEFAULT_CACHE_TTL, ApiClient, AsyncApiClient
+
+
+logger = logging.getLogger(__name__)
 
 
 class ApiCluster(RemoteSchedulerCluster):
+    """Cluster controlled through the REST API of a remote runner.
+
+    With a `cluster_id`, the cluster is one of those served by the runner's `ClusterHost`,
+    under `{url}/clusters/{cluster_id}`.
+
+    API calls are made with an asyncio client on the cluster's event loop, so that they never
+    block it; the synchronous API runs them to completion on that loop.
+
+    The scheduler address and dashboard link are cached for `cache_ttl` seconds, see
+    `invalidate_cache`. Once expired, they are refreshed in the background on the event loop,
+    and the previous values served meanwhile.
+    """
+
     _api_client: Optional[ApiClient] = None
+    _async_api_client: Optional[AsyncApiClient] = None
 
     def __init__(
         self,
@@ -17,36 +36,115 @@ class ApiCluster(RemoteSchedulerCluster):
         asynchronous=False,
         loop=None,
         security=None,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        cluster_id: Optional[str] = None,
     ):
         self.url = url
+        self.cluster_id = cluster_id
         self.user = user
         self.password = password
         self.override_scheduler_address = override_scheduler_address
         self.override_dashboard_link = override_dashboard_link
+        self._cache = TTLCache(cache_ttl)  # shared by both API clients
+        self._refreshing: Set[str] = set()  # keys of the cache being refreshed
         super().__init__(asynchronous=asynchronous, loop=loop, security=security)
 
+    @property
+    def api_url(self) -> str:
+        if self.cluster_id is None:
+            return self.url
+        return f"{self.url.rstrip('/')}/clusters/{self.cluster_id}"
+
     @property
     def api_client(self) -> ApiClient:
         if self._api_client is None:
-            self._api_client = ApiClient(self.url)
+            self._api_client = ApiClient(self.api_url)
+            self._api_client.cache = self._cache
             if self.user and self.password:
                 self._api_client.set_proxy_credentials(self.user, self.password)
         return self._api_client
 
+    @property
+    def async_api_client(self) -> AsyncApiClient:
+        if self._async_api_client is None:
+            self._async_api_client = AsyncApiClient(self.api_url)
+            self._async_api_client.cache = self._cache
+            if self.user and self.password:
+                self._async_api_client.set_proxy_credentials(self.user, self.password)
+        return self._async_api_client
+
+    async def _start(self):
+        # cached ahead of `RemoteSchedulerCluster._start`, to not block the loop
+        if not self.override_scheduler_address:
+            await self.async_api_client.get_scheduler_address()
+        if not self.override_dashboard_link:
+            await self.async_api_client.get_dashboard_link()
+        await super()._start()
+
+    async def _close(self):
+        await super()._close()
+        if self._async_api_client is not None:
+            await self._async_api_client.aclose()
+
     @property
     def scheduler_address(self) -> str:
         if self.override_scheduler_address:
             return self.override_scheduler_address
-        return self.api_client.get_scheduler_address()
+        return self._get_cached(
+            "scheduler_address",
+            self.api_client.get_scheduler_address,
+            self.async_api_client.get_scheduler_address,
+        )
 
     @property
     def dashboard_link(self) -> str:
         if self.override_dashboard_link:
             return self.override_dashboard_link
-        return self.api_client.get_dashboard_link()
+        return self._get_cached(
+            "dashboard_link",
+            self.api_client.get_dashboard_link,
+            self.async_api_client.get_dashboard_link,
+        )
+
+    def invalidate_cache(self) -> None:
+        """Refresh the scheduler address and dashboard link on next access."""
+        self._cache.expire()
+
+    def _get_cached(
+        self, key: str, fetch: Callable[[], str], refresh: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Return a cached value, refreshing it with the asyncio client once expired.
+
+        The value is only fetched with the blocking client when it was never cached, i.e.
+        before the cluster started.
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+        value = self._cache.get_stale(key)
+        if value is None:
+            return fetch()
+        if key not in self._refreshing and self.loop is not None:
+            self._refreshing.add(key)
+            self.loop.add_callback(self._refresh, key, refresh)
+        return value
+
+    async def _refresh(self, key: str, refresh: Callable[[], Awaitable[str]]) -> None:
+        try:
+            await refresh()
+        except Exception:
+            logger.warning("Failed to refresh the %s of %s", key, self.api_url, exc_info=True)
+        finally:
+            self._refreshing.discard(key)
+
+    def scale(self, n):
+        return self.sync(self._scale, n)
+
+    async def _scale(self, n) -> None:
+        await self.async_api_client.set_scale(n)
 
-    def scale(self, n) -> None:
-        self.api_client.set_scale(n)
+    def adapt(self, minimum, maximum):
+        return self.sync(self._adapt, minimum, maximum)
 
-    def adapt(self, minimum, maximum) -> None:
-        self.api_client.set_adapt(minimum, maximum)
+    async def _adapt(self, minimum, maximum) -> None:
+        await self.async_api_client.set_adapt(minimum, maximum)
@@ -1,30 +1,172 @@
-from typing import Optional
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
 
-from requests import Session, auth
+from requests import ConnectionError, HTTPError, RequestException, Session, Timeout, auth
 
 
-# Default connection timeout at 10''
+if TYPE_CHECKING:
+    import httpx
+
+
+# Default read timeout at 10''
 DEFAULT_TIMEOUT = 10.0
 
+# Default connect timeout at 3''
+DEFAULT_CONNECT_TIMEOUT = 3.0
+
 # Default JSON response back
 DEFAULT_HEADERS = {"Accept": "application/json"}
 
+# Default size of the async connection pool
+DEFAULT_MAX_CONNECTIONS = 10
+
+# Only idempotent requests are retried
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Response status codes of a transient failure (e.g. from an ingress)
+TRANSIENT_STATUS_CODES = {502, 503, 504}
+
 
 class ClientError(Exception):
     ...
 
 
-class JSONClient:
-    """Base class for JSON clients."""
+class CircuitOpenError(ClientError):
+    """Raised without making a request, while the API is known to be down."""
 
-    _conn: Optional[Session] = None
+
+class RetryPolicy:
+    """Retry transient failures up to `retries` times, with jittered exponential backoff.
+
+    Delays are drawn uniformly up to `backoff * 2 ** attempt` seconds, capped at `max_backoff`
+    ("full jitter"), so that clients recovering from an outage do not retry in lockstep.
+    """
+
+    def __init__(self, retries: int = 2, backoff: float = 0.1, max_backoff: float = 2.0) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delays(self) -> Iterator[float]:
+        for attempt in range(self.retries):
+            yield random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Fail fast after `failure_threshold` consecutive transient failures.
+
+    The circuit then stays open for `reset_timeout` seconds, after which a single request is
+    let through: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """Raise `CircuitOpenError` if requests should not be attempted."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"API unavailable after {self.failures} failures")
+            self._opened_at = time.monotonic()  # let this request through, but no other
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class TTLCache:
+    """Values expiring `ttl` seconds after they are set (unless given their own `ttl`)."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._items: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None or time.monotonic() >= item[0]:
+            return default
+        return item[1]
+
+    def get_stale(self, key: str, default: Any = None) -> Any:
+        """Return a value even once expired, e.g. to serve it while it is refreshed."""
+        item = self._items.get(key)
+        return default if item is None else item[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._items[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def expire(self) -> None:
+        """Expire all the values, keeping them for `get_stale`."""
+        self._items = {key: (-math.inf, value) for key, (_, value) in self._items.items()}
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class BaseJSONClient:
+    """Configuration shared by the synchronous and asyncio JSON clients.
+
+    Idempotent requests are retried on transient failures (connection errors, timeouts and
+    gateway errors) according to the `retry` policy, and the `circuit_breaker` fails requests
+    fast once the API is known to be down.
+    """
 
     def __init__(
-        self, base_url: str, default_timeout: float = None, default_headers: dict = None
+        self,
+        base_url: str,
+        default_timeout: Optional[float] = None,
+        default_headers: Optional[dict] = None,
+        connect_timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
     ) -> None:
         self._url = base_url
         self._timeout = default_timeout or DEFAULT_TIMEOUT
         self._headers = default_headers or DEFAULT_HEADERS
+        self._connect_timeout = connect_timeout or DEFAULT_CONNECT_TIMEOUT
+        self._retry = retry or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    def _make_url(self, path: str) -> str:
+        return self._url.rstrip("/") + "/" + path.lstrip("/")
+
+    def _on_failure(self, transient: bool, delays: Iterator[float]) -> Optional[float]:
+        """Record a failed request, returning the delay before retrying it (if at all)."""
+        if not transient:
+            self._circuit_breaker.record_success()  # the API is up
+            return None
+        self._circuit_breaker.record_failure()
+        if self._circuit_breaker.is_open:
+            return None
+        return next(delays, None)
+
+
+class JSONClient(BaseJSONClient):
+    """Base class for JSON clients."""
+
+    _conn: Optional[Session] = None
 
     @property
     def conn(self) -> Session:
@@ -41,23 +183,65 @@ class JSONClient:
     def post(self, path: str, params: Optional[dict] = None, data: Optional[dict] = None) -> dict:
         return self._request(method="POST", path=path, params=params, data=data)
 
+    def stream_events(self, path: str, params: Optional[dict] = None) -> Iterator[dict]:
+        """Yield the JSON data of server-sent events, as they are received."""
+        response = self.conn.get(
+            self._make_url(path),
+            params=params,
+            headers={"Accept": "text/event-stream"},
+            timeout=(self._connect_timeout, self._timeout),
+            stream=True,
+        )
+        with response:
+            response.raise_for_status()
+            data = []
+            for raw_line in response.iter_lines():
+                line = raw_line.decode("utf-8")
+                if line.startswith("data:"):
+                    data.append(line.partition(":")[2].strip())
+                elif not line and data:
+                    yield json.loads("\n".join(data))
+                    data = []
+
     # Private methods:
 
     def _request(
         self, method: str, path: str, params: Optional[dict] = None, data: Optional[dict] = None,
     ) -> dict:
-        url = self._url.rstrip("/") + "/" + path.lstrip("/")
-        response = self.conn.request(
-            method, url, params=params, json=data, headers=self._headers, timeout=self._timeout
-        )
+        url = self._make_url(path)
+        delays = self._retry.delays() if method in IDEMPOTENT_METHODS else iter(())
+        while True:
+            self._circuit_breaker.check()
+            try:
+                response = self.conn.request(
+                    method,
+                    url,
+                    params=params,
+                    json=data,
+                    headers=self._headers,
+                    timeout=(self._connect_timeout, self._timeout),
+                )
+                response.raise_for_status()
+                break
+            except RequestException as e:
+                delay = self._on_failure(_is_transient(e), delays)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+        self._circuit_breaker.record_success()
 
-        response.raise_for_status()
         if "application/json" != response.headers.get("content-type", ""):
             raise ClientError(f"No JSON content returned: {response.text}")
 
         return response.json()
 
 
+def _is_transient(error: RequestException) -> bool:
+    if isinstance(error, HTTPError):
+        return error.response is not None and error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, (ConnectionError, Timeout))
+
+
 class AuthClient(JSONClient):
     """Base class for authenticated clients (basic auth)."""
 
@@ -65,3 +249,106 @@ class AuthClient(JSONClient):
         """Set reverse-proxy credentials."""
         proxy_auth = auth.HTTPBasicAuth(username, password)
         proxy_auth(self.conn)
+
+
+class AsyncJSONClient(BaseJSONClient):
+    """Base class for asyncio JSON clients.
+
+    Requests share a pool of keep-alive connections, which is bound to the event loop of the
+    first request: `aclose` the client once done with it.
+    """
+
+    _conn: Optional["httpx.AsyncClient"] = None
+
+    def __init__(
+        self,
+        base_url: str,
+        default_timeout: Optional[float] = None,
+        default_headers: Optional[dict] = None,
+        connect_timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ) -> None:
+        super().__init__(
+            base_url,
+            default_timeout=default_timeout,
+            default_headers=default_headers,
+            connect_timeout=connect_timeout,
+            retry=retry,
+            circuit_breaker=circuit_breaker,
+        )
+        self._max_connections = max_connections
+
+    @property
+    def conn(self) -> "httpx.AsyncClient":
+        if self._conn is None:
+            import httpx
+
+            self._conn = httpx.AsyncClient(
+                headers=self._headers,
+                timeout=httpx.Timeout(self._timeout, connect=self._connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                ),
+            )
+        return self._conn
+
+    async def aclose(self) -> None:
+        if self._conn is not None:
+            await self._conn.aclose()
+            self._conn = None
+
+    # Public HTTP methods:
+
+    async def get(self, path: str, params: Optional[dict] = None) -> dict:
+        return await self._request(method="GET", path=path, params=params)
+
+    async def post(
+        self, path: str, params: Optional[dict] = None, data: Optional[dict] = None
+    ) -> dict:
+        return await self._request(method="POST", path=path, params=params, data=data)
+
+    # Private methods:
+
+    async def _request(
+        self, method: str, path: str, params: Optional[dict] = None, data: Optional[dict] = None,
+    ) -> dict:
+        import httpx
+
+        url = self._make_url(path)
+        delays = self._retry.delays() if method in IDEMPOTENT_METHODS else iter(())
+        while True:
+            self._circuit_breaker.check()
+            try:
+                response = await self.conn.request(method, url, params=params, json=data)
+                response.raise_for_status()
+                break
+            except httpx.HTTPError as e:
+                delay = self._on_failure(_is_transient_httpx(e), delays)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+        self._circuit_breaker.record_success()
+
+        if "application/json" != response.headers.get("content-type", ""):
+            raise ClientError(f"No JSON content returned: {response.text}")
+
+        return response.json()
+
+
+def _is_transient_httpx(error: "httpx.HTTPError") -> bool:
+    import httpx
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+class AsyncAuthClient(AsyncJSONClient):
+    """Base class for authenticated asyncio clients (basic auth)."""
+
+    def set_proxy_credentials(self, username: str, password: str) -> None:
+        """Set reverse-proxy credentials."""
+        self.conn.auth = (username, password)
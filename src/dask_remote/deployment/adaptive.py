@@ -1,20 +1,52 @@
+from typing import TYPE_CHECKING, Optional
+
 from distributed.deploy.adaptive import Adaptive
 
+from .policy import History, ScalingPolicy, observe
+
+
+if TYPE_CHECKING:
+    from .deployment import DeploymentCluster
+
 
 class StatelessAdaptive(Adaptive):
     """Perform cluster scaling to the recommended number of workers.
 
-    This is used for scaling via K8S Deployment, since we are not currently able
-    to follow recommendations on which workers to retire.
+    This is used for scaling via K8S Deployment: scaling down retires the recommended
+    workers, and has the Deployment delete their pods (see `DeploymentCluster.scale_down`).
+
+    With a `policy`, the load of the scheduler is observed at each adaptation into `history`,
+    and the policy decides on the target from it (e.g. `PredictivePolicy` scaling ahead of
+    growing load), within `minimum` and `maximum`.
+
+    Params:
+        policy: the scaling policy, scaling to the target recommended by the scheduler if `None`
+        history_size: observations kept in `history`, one per `interval`
     """
 
+    cluster: "DeploymentCluster"
+
+    def __init__(
+        self, *args, policy: Optional[ScalingPolicy] = None, history_size: int = 600, **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.policy = policy
+        self.history = History(history_size)
+
+    async def target(self) -> int:
+        target = await super().target()
+        if self.policy is None:
+            return target
+        self.history.append(observe(target, self.cluster.scheduler_info))
+        return self.policy.target(self.history)
+
     async def recommendations(self, target: int) -> dict:
         recommendation = await super(Adaptive, self).recommendations(target)
         recommendation.update(n=target)
         return recommendation
 
     async def scale_down(self, n, workers):
-        self.cluster.scale(n)
+        await self.cluster.scale_down(workers, n=n)
 
     async def scale_up(self, n):
         self.cluster.scale(n)
@@ -1,11 +1,47 @@
 import asyncio
+import logging
 
 from ..cluster_base import NoOpAwaitable, RemoteSchedulerCluster
 from .adaptive import StatelessAdaptive
-from .k8s import get_AppsV1Api, k8s_config
+from .k8s import API_CLIENTS, get_AppsV1Api, get_CoreV1Api
+from .rate_limit import ScaleDownLimiter, TokenBucket
+from .watch import DeploymentWatch
+
+
+logger = logging.getLogger(__name__)
+
+# Annotation ranking the pods a ReplicaSet deletes first when scaled down (lowest cost first)
+POD_DELETION_COST = "controller.kubernetes.io/pod-deletion-cost"
+RETIRED_POD_DELETION_COST = "-1000"
 
 
 class DeploymentCluster(RemoteSchedulerCluster):
+    """Cluster of the workers run by a k8s Deployment, scaled by patching its replicas.
+
+    With `watch=True`, the Deployment and its pods are watched (see `DeploymentWatch`):
+    `replicas` counts the pods desired, ready, pending, failing..., and the adaptive `plan`
+    follows the desired replicas as soon as the Deployment reports them, rather than as
+    workers reach the scheduler. Watching requires permission to list and watch pods.
+
+    Requests to the API server go through an `ApiClient` shared by the clusters of the
+    process with the same configuration (see `ApiClientPool`), released on `close()`.
+
+    Scale patches are rate-limited by a token bucket, and skipped when the Deployment already
+    has the target replicas. Scaling down can be delayed until the lower target held for
+    `scale_down_delay` seconds, and applied in steps of at most `max_scale_down_step` replicas.
+
+    Adaptive scale-downs retire the workers the scheduler recommends (moving their data to
+    the other workers), and give their pods the lowest deletion cost, for the Deployment to
+    delete these pods when shrunk (see `scale_down`).
+
+    Params:
+        watch: whether to watch the Deployment and its pods
+        patch_rate: scale patches per second, on average
+        patch_burst: scale patches sent in a row before `patch_rate` applies
+        scale_down_delay: seconds a lower target must hold before the Deployment is scaled down
+        max_scale_down_step: replicas removed by a scale patch at most, unless `None`
+    """
+
     def __init__(
         self,
         scheduler_address,
@@ -16,13 +52,26 @@ class DeploymentCluster(RemoteSchedulerCluster):
         asynchronous=False,
         loop=None,
         security=None,
+        watch=False,
+        patch_rate=1.0,
+        patch_burst=5,
+        scale_down_delay=0.0,
+        max_scale_down_step=None,
     ):
         self.scheduler_address = scheduler_address
         self.deployment_name = deployment_name
         self.namespace = namespace
         self.in_cluster = in_cluster
         self.config_file = config_file
+        self.watch = watch
+        self.api_client = None
         self.app_api = None
+        self.core_api = None
+        self.deployment_watch = None
+        self._patch_bucket = TokenBucket(patch_rate, patch_burst)
+        self._scale_down_limiter = ScaleDownLimiter(scale_down_delay, max_scale_down_step)
+        self._replicas = None  # desired replicas, as last patched or watched
+        self._scaling_retry = None
         self._scaling_target = None
         self._scaling_task_waiting = None
         super().__init__(asynchronous=asynchronous, loop=loop, security=security)
@@ -32,26 +81,186 @@ class DeploymentCluster(RemoteSchedulerCluster):
         """Believe your eyes only."""
         return self.observed
 
+    @property
+    def replicas(self):
+        """Replicas of the Deployment by pod state, or `None` until watched."""
+        replicas = self.deployment_watch and self.deployment_watch.replicas
+        return replicas.to_dict() if replicas is not None else None
+
+    @property
+    def plan(self):
+        """The live pods, and a placeholder for each replica desired but not created yet."""
+        if not (self.deployment_watch and self.deployment_watch.view.synced):
+            return super().plan
+        view = self.deployment_watch.view
+        desired = view.desired or 0
+        pods = view.live_pods[:desired]
+        missing = {f"{self.deployment_name}-desired-{i}" for i in range(len(pods), desired)}
+        return set(pods) | missing
+
+    @property
+    def requested(self):
+        """The pods neither terminating nor exited: named after their worker, once arrived."""
+        if not (self.deployment_watch and self.deployment_watch.view.synced):
+            return super().requested
+        pod_workers = {pod: worker for worker, pod in self._worker_pods().items()}
+        return {pod_workers.get(pod, pod) for pod in self.deployment_watch.view.live_pods}
+
+    def _worker_pods(self):
+        """Map the names of the workers to those of the pods they run in, when known."""
+        view = self.deployment_watch and self.deployment_watch.view
+        if not view:
+            return {}
+        pods = {}
+        for worker in self.scheduler_info.get("workers", {}).values():
+            pod = view.pod_of(worker)
+            if pod is not None:
+                pods[worker["name"]] = pod
+        return pods
+
+    async def scale_down(self, workers, n=None):
+        """Retire `workers` gracefully, then shrink the Deployment, deleting their pods first.
+
+        The workers' data is moved to the other workers (see `Scheduler.retire_workers`),
+        then their pods are annotated with the lowest `POD_DELETION_COST`, so that the
+        ReplicaSet deletes them rather than pods whose workers hold data. Pods whose worker
+        did not arrive yet (named as pods in `workers`) are deleted first. Workers that could
+        not be retired, or whose pod is unknown or could not be annotated (e.g. without
+        permission to `patch` pods), are left running: the Deployment is then shrunk by fewer
+        replicas than to `n`. As their workers were retired, the Deployment is
+        shrunk without waiting for `scale_down_delay`, but within the rate and step limits.
+
+        Without the watch of the pods, the Deployment is scaled to `n` replicas as by `scale`,
+        letting the ReplicaSet pick the pods to delete.
+
+        Params:
+            workers: names of the workers (or pods) to remove
+            n: replicas to scale to, the planned replicas less `workers` by default
+        """
+        current = len(self.plan)
+        if n is None:
+            n = max(current - len(workers), 0)
+        view = self.deployment_watch and self.deployment_watch.view
+        if not (view and view.synced) or self.core_api is None or self.scheduler_comm is None:
+            self._scaling_target = n
+            return await self._scale_to_target()
+
+        worker_pods = self._worker_pods()
+        pods = {w for w in workers if w in view.pods and w not in worker_pods}  # not arrived
+        names = [w for w in workers if w in worker_pods]
+        if names:
+            retired = await self.scheduler_comm.retire_workers(
+                names=names, remove=False, close_workers=False
+            )
+            retired_names = {identity.get("name") for identity in retired.values()}
+            pods.update(worker_pods[w] for w in names if w in retired_names)
+        pods = await self._set_deletion_costs(self.core_api, pods)
+        self._scaling_target = max(n, current - len(pods))
+        if pods:
+            # their workers are retired: do not hold the scale-down back
+            self._scale_down_limiter.skip_delay()
+        await self._scale_to_target()
+
+    async def _set_deletion_costs(self, core_api, pods):
+        """Annotate the `pods` to be deleted first, and return those that were annotated."""
+        pods = list(pods)
+        results = await asyncio.gather(
+            *(self._set_deletion_cost(core_api, pod) for pod in pods), return_exceptions=True
+        )
+        annotated = set()
+        for pod, result in zip(pods, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not annotate pod %s to be deleted first: %s", pod, result)
+            else:
+                annotated.add(pod)
+        return annotated
+
+    async def _set_deletion_cost(self, core_api, pod):
+        body = {"metadata": {"annotations": {POD_DELETION_COST: RETIRED_POD_DELETION_COST}}}
+        await core_api.patch_namespaced_pod(pod, self.namespace, body)
+
     async def _start(self):
         await super()._start()
         self._lock = asyncio.Lock()
-        await k8s_config(in_cluster=self.in_cluster, config_file=self.config_file)
-        self.app_api = get_AppsV1Api()
+        self.api_client = await API_CLIENTS.acquire(
+            in_cluster=self.in_cluster, config_file=self.config_file
+        )
+        self.app_api = get_AppsV1Api(self.api_client)
+        if self.watch:
+            self.core_api = get_CoreV1Api(self.api_client)
+            self.deployment_watch = DeploymentWatch(
+                self.app_api,
+                self.core_api,
+                self.deployment_name,
+                self.namespace,
+                on_change=self._on_replicas,
+            )
+            self.deployment_watch.start()
+
+    def _on_replicas(self, replicas):
+        self._replicas = replicas.desired
 
     async def _close(self):
-        await self._scale_to_target()
+        if self._scaling_retry is not None:
+            self._scaling_retry.cancel()
+        await self._scale_to_target(limit=False)
+        if self.deployment_watch is not None:
+            await self.deployment_watch.stop()
+        if self.api_client is not None:
+            await API_CLIENTS.release(self.api_client)
+            self.api_client = self.app_api = self.core_api = None
         await super()._close()
 
-    async def _scale_to_target(self):
+    async def _scale_to_target(self, limit=True):
+        """Patch the Deployment towards the scaling target, within the rate and step limits.
+
+        Unless `limit` is false (e.g. on close), a scale-down is held for `scale_down_delay`
+        seconds, and the target is approached by `max_scale_down_step` replicas at a time.
+        """
         async with self._lock:
-            self._scaling_task_waiting = None
-            if self._scaling_target is None:
-                return
-            body = {"spec": {"replicas": self._scaling_target}}
+            while True:
+                self._scaling_task_waiting = None
+                replicas = self._next_replicas(limit)
+                if replicas is None:
+                    return
+                delay = self._patch_bucket.delay() if limit else 0
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)  # then consider the latest target
+            self._patch_bucket.take()
+            body = {"spec": {"replicas": replicas}}
             await self.app_api.patch_namespaced_deployment_scale_with_http_info(  # type: ignore
                 name=self.deployment_name, namespace=self.namespace, body=body
             )
-            self._scaling_target = None
+            self._replicas = replicas
+            if replicas == self._scaling_target:
+                self._scaling_target = None
+                self._scale_down_limiter.reset()
+            else:
+                self._retry_scaling(0)  # next step
+
+    def _next_replicas(self, limit=True):
+        """Return the replicas to patch the Deployment with, or `None` to leave it as is."""
+        target, current = self._scaling_target, self._replicas
+        if target is None:
+            return None
+        if limit:
+            target, delay = self._scale_down_limiter.limit(target, current)
+            if target is None:
+                self._retry_scaling(delay)
+                return None
+        if target == current:
+            logger.debug("Deployment %s already has %s replicas", self.deployment_name, target)
+            if target == self._scaling_target:
+                self._scaling_target = None
+                self._scale_down_limiter.reset()
+            return None
+        return target
+
+    def _retry_scaling(self, delay):
+        if self._scaling_retry is not None:
+            self._scaling_retry.cancel()
+        self._scaling_retry = asyncio.get_running_loop().call_later(delay, self._scale)
 
     def _scale(self):
         if not self._scaling_task_waiting:
@@ -1,6 +1,14 @@
+import asyncio
+import inspect
+from typing import Dict, Optional, Tuple
+
 import kubernetes_asyncio as kubernetes
 
 
+# Connections to the API server per shared client, enough for the watches and a scale patch
+CONNECTION_POOL_MAXSIZE = 4
+
+
 async def _config_from_file(
     config_file=None, context=None, client_configuration=None, persist_config=True
 ):
@@ -12,19 +20,121 @@ async def _config_from_file(
     )
 
 
-def _config_incluster():
+def _config_incluster(client_configuration=None):
+    parameters = inspect.signature(kubernetes.config.load_incluster_config).parameters
+    if "try_refresh_token" in parameters:
+        # re-read the (expiring) service account token as it is rotated
+        kubernetes.config.load_incluster_config(
+            client_configuration=client_configuration, try_refresh_token=True
+        )
+        return
+    # kubernetes_asyncio 10 only sets the default configuration, copied by `Configuration()`
     kubernetes.config.load_incluster_config()
+    if client_configuration is not None:
+        vars(client_configuration).update(vars(kubernetes.client.Configuration()))
 
 
-async def k8s_config(in_cluster=False, config_file=None):
+async def k8s_config(in_cluster=False, config_file=None, client_configuration=None):
     if in_cluster:
-        _config_incluster()
+        _config_incluster(client_configuration=client_configuration)
     else:
-        await _config_from_file(config_file=config_file)
+        await _config_from_file(config_file=config_file, client_configuration=client_configuration)
 
 
-def get_AppsV1Api():
-    configuration = kubernetes.client.Configuration()
-    api_client = kubernetes.client.ApiClient(configuration)
+def get_AppsV1Api(api_client=None):
+    if api_client is None:
+        configuration = kubernetes.client.Configuration()
+        api_client = kubernetes.client.ApiClient(configuration)
     api_instance = kubernetes.client.AppsV1Api(api_client)
     return api_instance
+
+
+def get_CoreV1Api(api_client=None):
+    if api_client is None:
+        configuration = kubernetes.client.Configuration()
+        api_client = kubernetes.client.ApiClient(configuration)
+    api_instance = kubernetes.client.CoreV1Api(api_client)
+    return api_instance
+
+
+ClientKey = Tuple[asyncio.AbstractEventLoop, bool, Optional[str]]
+
+
+class ApiClientPool:
+    """`ApiClient` instances shared by the clusters of a process, one per configuration.
+
+    Each client holds a pool of (kept-alive) connections to the API server, of at most
+    `maxsize` connections. Clients are bound to the event loop they were acquired on, and
+    closed once released by every cluster that acquired them.
+    """
+
+    def __init__(self, maxsize: int = CONNECTION_POOL_MAXSIZE):
+        self.maxsize = maxsize
+        self._clients: Dict[ClientKey, "asyncio.Future[kubernetes.client.ApiClient]"] = {}
+        self._users: Dict[ClientKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def acquire(
+        self, in_cluster: bool = False, config_file: Optional[str] = None
+    ) -> kubernetes.client.ApiClient:
+        """Return the client of this configuration, creating it unless already shared."""
+        key = (asyncio.get_running_loop(), in_cluster, config_file)
+        if key not in self._clients:
+            self._clients[key] = asyncio.ensure_future(self._create(in_cluster, config_file))
+            self._users[key] = 0
+        self._users[key] += 1
+        try:
+            return await asyncio.shield(self._clients[key])
+        except BaseException:
+            await self._release(key)
+            raise
+
+    async def release(self, api_client: kubernetes.client.ApiClient) -> None:
+        """Release a client returned by `acquire`, closing it once no cluster uses it."""
+        for key, client in list(self._clients.items()):
+            if _result(client) is api_client:
+                await self._release(key)
+                return
+
+    async def close(self) -> None:
+        """Close all the clients, e.g. at the exit of a process."""
+        clients, self._clients, self._users = self._clients, {}, {}
+        for client in clients.values():
+            await _close(client)
+
+    async def _create(self, in_cluster: bool, config_file: Optional[str]):
+        configuration = kubernetes.client.Configuration()
+        await k8s_config(
+            in_cluster=in_cluster, config_file=config_file, client_configuration=configuration
+        )
+        configuration.connection_pool_maxsize = self.maxsize
+        return kubernetes.client.ApiClient(configuration)
+
+    async def _release(self, key: ClientKey) -> None:
+        if key not in self._users:
+            return  # closed meanwhile
+        self._users[key] -= 1
+        if self._users[key] > 0:
+            return
+        del self._users[key]
+        await _close(self._clients.pop(key))
+
+
+def _result(client: "asyncio.Future[kubernetes.client.ApiClient]"):
+    if client.done() and not client.cancelled() and client.exception() is None:
+        return client.result()
+    return None
+
+
+async def _close(client: "asyncio.Future[kubernetes.client.ApiClient]") -> None:
+    try:
+        api_client = await client
+    except (Exception, asyncio.CancelledError):
+        return  # failed to load its configuration, nothing to close
+    # closing its session, as `ApiClient.close()` is missing from kubernetes_asyncio 10
+    await api_client.rest_client.pool_manager.close()
+
+
+API_CLIENTS = ApiClientPool()
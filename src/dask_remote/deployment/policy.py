@@ -0,0 +1,206 @@
+"""Scaling policies turning the recent history of the scheduler load into a target."""
+
+import math
+import time
+from array import array
+from collections import deque
+from typing import Deque, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class Observation(NamedTuple):
+    """Load of the scheduler at a point in time."""
+
+    time: float
+    target: int  # workers recommended by the scheduler (see `Scheduler.adaptive_target`)
+    workers: int
+    threads: int  # of all the workers
+    processing: int  # tasks executing on the workers
+    waiting: int  # tasks ready to run on the workers, waiting for a thread
+
+    @property
+    def occupancy(self) -> float:
+        """Fraction of the worker threads busy."""
+        return min(self.processing / self.threads, 1.0) if self.threads else 0.0
+
+
+class History:
+    """Ring buffer of the last `capacity` observations, stored in a flat array of floats."""
+
+    WIDTH = len(Observation._fields)
+
+    def __init__(self, capacity: int = 600):
+        if capacity < 1:
+            raise ValueError(f"Expected a positive capacity, got {capacity}")
+        self.capacity = capacity
+        self._data = array("d", bytes(8 * capacity * self.WIDTH))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Observation]:
+        """Observations from the oldest to the latest."""
+        for i in range(self._size):
+            yield self._get((self._start + i) % self.capacity)
+
+    def append(self, observation: Observation) -> None:
+        """Add the latest observation, overwriting the oldest once full."""
+        if self._size < self.capacity:
+            index = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            index, self._start = self._start, (self._start + 1) % self.capacity
+        offset = index * self.WIDTH
+        end = offset + self.WIDTH
+        self._data[offset:end] = array("d", observation)
+
+    @property
+    def latest(self) -> Optional[Observation]:
+        if not self._size:
+            return None
+        return self._get((self._start + self._size - 1) % self.capacity)
+
+    def since(self, start: float) -> List[Observation]:
+        """Observations made at `start` or later, from the oldest."""
+        observations: List[Observation] = []
+        for i in reversed(range(self._size)):
+            observation = self._get((self._start + i) % self.capacity)
+            if observation.time < start:
+                break
+            observations.append(observation)
+        return observations[::-1]
+
+    def _get(self, index: int) -> Observation:
+        offset = index * self.WIDTH
+        end = offset + self.WIDTH
+        time_, *counts = self._data[offset:end]
+        return Observation(time_, *(int(count) for count in counts))
+
+
+class ScalingPolicy:
+    """Reactive policy: scale to the target the scheduler recommends for the current load.
+
+    Subclasses decide on the target given the `History` of the load (latest last).
+    """
+
+    def target(self, history: History) -> int:
+        latest = history.latest
+        return latest.target if latest is not None else 0
+
+    def reset(self) -> None:
+        """Forget any state, e.g. before replaying a trace."""
+
+
+class PredictivePolicy(ScalingPolicy):
+    """Scale ahead of growing load, and hold capacity for a while once the load drops.
+
+    The targets recommended over the last `window` seconds are fitted with a linear trend,
+    extrapolated `horizon` seconds ahead (e.g. the time a worker pod takes to start). While
+    the load grows, that is while the tasks waiting grow or the workers are busier than
+    `min_occupancy`, the cluster is scaled to this forecast rather than to the current
+    target, plus `headroom`. After pre-scaling, the forecast is not raised again for
+    `scale_up_cooldown` seconds, giving the new workers time to arrive; the highest target
+    of the last `scale_down_cooldown` seconds is kept, so that capacity is held through
+    short lulls.
+
+    Params:
+        window: seconds of history the trend is fitted over
+        horizon: seconds ahead the targets are forecast
+        headroom: fraction of workers added to the forecast
+        min_occupancy: fraction of busy threads above which the load is considered growing
+        scale_up_cooldown: seconds after pre-scaling before the forecast can be raised
+        scale_down_cooldown: seconds a target is held before scaling down
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        horizon: float = 120.0,
+        headroom: float = 0.0,
+        min_occupancy: float = 0.8,
+        scale_up_cooldown: float = 30.0,
+        scale_down_cooldown: float = 300.0,
+    ):
+        self.window = window
+        self.horizon = horizon
+        self.headroom = headroom
+        self.min_occupancy = min_occupancy
+        self.scale_up_cooldown = scale_up_cooldown
+        self.scale_down_cooldown = scale_down_cooldown
+        self.reset()
+
+    def reset(self) -> None:
+        self._prescaled: Optional[Tuple[float, int]] = None  # time and forecast
+        self._targets: Deque[Tuple[float, int]] = deque()  # decided targets, held for a while
+
+    def target(self, history: History) -> int:
+        latest = history.latest
+        if latest is None:
+            return 0
+        now = latest.time
+        target = max(latest.target, self._forecast(history.since(now - self.window)))
+        return self._hold(now, target)
+
+    def _forecast(self, observations: List[Observation]) -> int:
+        """Return the target forecast `horizon` seconds ahead, or 0 unless the load grows."""
+        latest = observations[-1]
+        waiting_slope = _slope([o.time for o in observations], [o.waiting for o in observations])
+        growing = (latest.waiting and waiting_slope > 0) or latest.occupancy >= self.min_occupancy
+        if not growing:
+            return 0
+        slope = _slope([o.time for o in observations], [o.target for o in observations])
+        forecast = math.ceil(
+            (latest.target + max(slope, 0.0) * self.horizon) * (1 + self.headroom)
+        )
+        if (
+            self._prescaled is not None
+            and latest.time - self._prescaled[0] < self.scale_up_cooldown
+        ):
+            return min(forecast, self._prescaled[1])
+        if forecast > latest.target:
+            self._prescaled = (latest.time, forecast)
+        return forecast
+
+    def _hold(self, now: float, target: int) -> int:
+        while self._targets and self._targets[0][0] < now - self.scale_down_cooldown:
+            self._targets.popleft()
+        # drop the held targets the new one supersedes, keeping the deque decreasing
+        while self._targets and self._targets[-1][1] <= target:
+            self._targets.pop()
+        self._targets.append((now, target))
+        return self._targets[0][1]
+
+
+def _slope(xs: List[float], ys: List[float]) -> float:
+    """Least squares slope of `ys` against `xs`, 0 if undefined."""
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def observe(target: int, scheduler_info: dict) -> Observation:
+    """Make an observation from the scheduler info of a cluster.
+
+    The tasks are counted from the metrics the workers last sent with their heartbeat.
+    """
+    workers = scheduler_info.get("workers", {}).values()
+    return Observation(
+        time=time.time(),
+        target=target,
+        workers=len(workers),
+        threads=sum(worker.get("nthreads", 0) for worker in workers),
+        processing=sum(_task_count(worker, "executing") for worker in workers),
+        waiting=sum(_task_count(worker, "ready") for worker in workers),
+    )
+
+
+def _task_count(worker: dict, state: str) -> int:
+    metrics = worker.get("metrics", {})
+    # distributed 2.x reports the counts in the metrics, later versions in their `task_counts`
+    return metrics.get(state, metrics.get("task_counts", {}).get(state, 0))
@@ -0,0 +1,91 @@
+"""Limit the rate of scale patches sent to the k8s API server."""
+
+import time
+from typing import Callable, Optional, Tuple
+
+
+class TokenBucket:
+    """Allow bursts of up to `burst` requests, and `rate` requests per second on average.
+
+    Params:
+        rate: tokens added per second
+        burst: maximum number of tokens, available at first
+        clock: monotonic time source, in seconds
+    """
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"Expected a positive rate and burst, got {rate} and {burst}")
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self._tokens
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def take(self) -> bool:
+        """Take a token, returning whether one was available."""
+        if self.tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class ScaleDownLimiter:
+    """Hold scale-downs for `delay` seconds, then remove at most `max_step` replicas at once.
+
+    A lower target is applied once targets below the current replicas held for `delay`
+    seconds in a row, so that a target flapping down and back up leaves the replicas be.
+
+    Params:
+        delay: seconds targets must stay below the current replicas before scaling down
+        max_step: replicas removed at once at most, unless `None`
+        clock: monotonic time source, in seconds
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        max_step: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.delay = delay
+        self.max_step = max_step
+        self.clock = clock
+        self._since: Optional[float] = None
+
+    def limit(self, target: int, current: Optional[int]) -> Tuple[Optional[int], float]:
+        """Return the replicas to scale to (`None` to wait), and the seconds left to wait."""
+        if current is None or target >= current:
+            self._since = None
+            return target, 0.0
+        now = self.clock()
+        if self._since is None:
+            self._since = now
+        remaining = self.delay - (now - self._since)
+        if remaining > 0:
+            return None, remaining
+        if self.max_step is not None:
+            target = max(target, current - self.max_step)
+        return target, 0.0
+
+    def skip_delay(self) -> None:
+        """Let the pending scale-down proceed without waiting, e.g. once its workers retired.
+
+        The `max_step` limit still applies, until the scale-down is reset.
+        """
+        self._since = self.clock() - self.delay
+
+    def reset(self) -> None:
+        """Forget the pending scale-down, e.g. once the target is reached."""
+        self._since = None
@@ -0,0 +1,87 @@
+"""Evaluate scaling policies offline, on recorded traces of the scheduler load."""
+
+import json
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+from .policy import History, Observation, ScalingPolicy
+
+
+@dataclass
+class ReplayResult:
+    """How a policy provisioned workers over a trace.
+
+    The demand is the target recommended by the scheduler in each observation, that is what a
+    reactive policy asks for, and workers are ready `startup` seconds after being requested.
+    """
+
+    targets: List[int] = field(default_factory=list)  # decided for each observation
+    worker_seconds: float = 0.0  # requested, i.e. paid for
+    shortfall_worker_seconds: float = 0.0  # demand not met by ready workers
+    scale_events: int = 0  # changes of the target
+
+    def to_dict(self) -> dict:
+        return {
+            "worker_seconds": self.worker_seconds,
+            "shortfall_worker_seconds": self.shortfall_worker_seconds,
+            "scale_events": self.scale_events,
+        }
+
+
+def replay(
+    policy: ScalingPolicy,
+    trace: Iterable[Observation],
+    startup: float = 60.0,
+    history_size: int = 600,
+) -> ReplayResult:
+    """Feed a trace to a policy, and measure the cost and shortfall of its targets.
+
+    The trace is replayed open-loop: the recorded load does not depend on the workers the
+    policy provisions, so compare policies on traces recorded under the same one.
+
+    Params:
+        policy: the policy to evaluate, reset first
+        trace: observations in time order, e.g. from `load_trace`
+        startup: seconds a requested worker takes to be ready
+        history_size: observations kept in the history given to the policy
+    """
+    policy.reset()
+    history = History(history_size)
+    result = ReplayResult()
+    times: List[float] = []  # of the targets decided, i.e. of the observations
+    previous = None
+    for observation in trace:
+        if previous is not None:
+            elapsed = observation.time - previous.time
+            requested = _target_at(times, result.targets, previous.time - startup)
+            ready = min(result.targets[-1], requested)
+            result.worker_seconds += result.targets[-1] * elapsed
+            result.shortfall_worker_seconds += max(previous.target - ready, 0) * elapsed
+        history.append(observation)
+        target = policy.target(history)
+        if result.targets and target != result.targets[-1]:
+            result.scale_events += 1
+        result.targets.append(target)
+        times.append(observation.time)
+        previous = observation
+    return result
+
+
+def _target_at(times: List[float], targets: List[int], time: float) -> int:
+    """Target requested at `time`, 0 before the first one, given the sorted request times."""
+    index = bisect_right(times, time)
+    return targets[index - 1] if index else 0
+
+
+def save_trace(observations: Iterable[Observation], path: str) -> None:
+    """Write observations, e.g. the `history` of an adaptive cluster, as JSON lines."""
+    with open(path, "w") as f:
+        for observation in observations:
+            f.write(json.dumps(observation._asdict()) + "\n")
+
+
+def load_trace(path: str) -> List[Observation]:
+    """Read observations written by `save_trace`."""
+    with open(path) as f:
+        return [Observation(**json.loads(line)) for line in f if line.strip()]
@@ -0,0 +1,273 @@
+"""Follow the replicas of a Deployment, and the state of its pods, through k8s watches."""
+
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import kubernetes_asyncio as kubernetes
+from kubernetes_asyncio.client.rest import ApiException
+
+
+logger = logging.getLogger(__name__)
+
+# Container waiting reasons of pods that will not become ready without intervention
+FAILING_REASONS = {
+    "CrashLoopBackOff",
+    "ImagePullBackOff",
+    "ErrImagePull",
+    "InvalidImageName",
+    "CreateContainerConfigError",
+    "CreateContainerError",
+    "RunContainerError",
+}
+
+# Server-side duration of a watch request at 5', after which it is started again
+WATCH_TIMEOUT = 300
+
+# Delay before listing again after a failed watch at 1'', doubled up to 30''
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 30.0
+
+POD_STATES = ["ready", "starting", "pending", "unschedulable", "failing", "terminating"]
+
+
+@dataclass
+class Replicas:
+    """Replicas of a Deployment: desired by its spec, and those of its pods in each state.
+
+    Pods are `ready` (passing their readiness probe), `starting` (running, not ready yet),
+    `pending` (waiting for their containers to be created), `unschedulable` (pending, with no
+    node to run on), `failing` (e.g. crash-looping, or unable to pull their image), or
+    `terminating`. Pods that exited are not counted.
+    """
+
+    desired: int = 0
+    ready: int = 0
+    starting: int = 0
+    pending: int = 0
+    unschedulable: int = 0
+    failing: int = 0
+    terminating: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def pod_state(pod) -> Optional[str]:
+    """Return the state of a `V1Pod` counted by `Replicas`, or `None` once it exited."""
+    if pod.metadata.deletion_timestamp is not None:
+        return "terminating"
+    status = pod.status
+    phase = status.phase if status is not None else None
+    if phase in ("Succeeded", "Failed"):
+        return None
+    for container in (status and status.container_statuses) or []:
+        waiting = container.state.waiting if container.state is not None else None
+        if waiting is not None and waiting.reason in FAILING_REASONS:
+            return "failing"
+    conditions = {c.type: c for c in (status and status.conditions) or []}
+    if phase == "Pending" or phase is None:
+        scheduled = conditions.get("PodScheduled")
+        if scheduled is not None and scheduled.reason == "Unschedulable":
+            return "unschedulable"
+        return "pending"
+    ready = conditions.get("Ready")
+    return "ready" if ready is not None and ready.status == "True" else "starting"
+
+
+@dataclass
+class ReplicaView:
+    """In-memory view of a Deployment and its pods, updated from list and watch results."""
+
+    desired: Optional[int] = None
+    pods: Dict[str, str] = field(default_factory=dict)  # state by pod name
+    ips: Dict[str, str] = field(default_factory=dict)  # IP by pod name, once assigned
+    synced: bool = False  # whether both the Deployment and its pods were listed
+
+    @property
+    def replicas(self) -> Replicas:
+        replicas = Replicas(desired=self.desired or 0)
+        for state in self.pods.values():
+            setattr(replicas, state, getattr(replicas, state) + 1)
+        return replicas
+
+    @property
+    def live_pods(self) -> List[str]:
+        """Names of the pods neither terminating nor exited."""
+        return sorted(name for name, state in self.pods.items() if state != "terminating")
+
+    def set_deployment(self, deployment) -> bool:
+        """Update the desired replicas, returning whether they changed."""
+        desired = deployment.spec.replicas if deployment is not None else None
+        changed, self.desired = desired != self.desired, desired
+        return changed
+
+    def set_pods(self, pods) -> bool:
+        """Replace the pods by those listed, returning whether any state changed."""
+        states: Dict[str, str] = {}
+        ips: Dict[str, str] = {}
+        for pod in pods:
+            name, state, ip = pod.metadata.name, pod_state(pod), _pod_ip(pod)
+            if name is None or state is None:
+                continue
+            states[name] = state
+            if ip:  # not assigned yet while pending
+                ips[name] = ip
+        changed, self.pods, self.ips = states != self.pods, states, ips
+        return changed
+
+    def apply_pod_event(self, event_type: str, pod) -> bool:
+        """Apply a watch event of a pod, returning whether its state changed."""
+        name = pod.metadata.name
+        if name is None:
+            return False
+        state = None if event_type == "DELETED" else pod_state(pod)
+        previous = self.pods.pop(name, None)
+        self.ips.pop(name, None)
+        if state is not None:
+            self.pods[name] = state
+            ip = _pod_ip(pod)
+            if ip:  # not assigned yet while pending
+                self.ips[name] = ip
+        return state != previous
+
+    def pod_of(self, worker: dict) -> Optional[str]:
+        """Return the name of the pod running a worker (given its scheduler info), if known.
+
+        Workers are matched to pods by name (e.g. when started with `--name $POD_NAME`), or
+        else by IP address.
+        """
+        if worker.get("name") in self.pods:
+            return worker["name"]
+        host = worker.get("host")
+        return next((name for name, ip in self.ips.items() if ip == host), None)
+
+
+def _pod_ip(pod) -> Optional[str]:
+    return pod.status.pod_ip if pod.status is not None else None
+
+
+def _raise_for_error(event: dict) -> None:
+    """Raise the `Status` of an `ERROR` event, which the watch streams rather than raises."""
+    if event["type"] == "ERROR":
+        status = event["raw_object"]
+        raise ApiException(status=status.get("code"), reason=status.get("message"))
+
+
+class DeploymentWatch:
+    """Keep a `ReplicaView` of a Deployment and its pods, up to date with k8s watches.
+
+    The Deployment and its pods (matching its selector) are listed, then watched from the
+    listed resource version; should a watch fail or expire, they are listed again.
+
+    Params:
+        app_api: `AppsV1Api` to watch the Deployment with
+        core_api: `CoreV1Api` to watch its pods with
+        name: name of the Deployment
+        namespace: namespace of the Deployment
+        on_change: called with the `Replicas` whenever they change
+    """
+
+    def __init__(
+        self,
+        app_api,
+        core_api,
+        name: str,
+        namespace: str,
+        on_change: Optional[Callable[[Replicas], None]] = None,
+    ):
+        self.app_api = app_api
+        self.core_api = core_api
+        self.name = name
+        self.namespace = namespace
+        self.on_change = on_change
+        self.view = ReplicaView()
+        self._synced = {"deployment": False, "pods": False}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def replicas(self) -> Optional[Replicas]:
+        """The current replicas, or `None` until the Deployment and its pods were listed."""
+        return self.view.replicas if self.view.synced else None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.ensure_future(self._follow("deployment", self._watch_deployment)),
+            asyncio.ensure_future(self._follow("pods", self._watch_pods)),
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _follow(self, kind: str, watch: Callable) -> None:
+        """Run a watch until stopped, listing again after failures."""
+        delay = RETRY_DELAY
+        while True:
+            try:
+                await watch()
+                delay = RETRY_DELAY
+            except asyncio.CancelledError:
+                raise
+            except ApiException as e:
+                if e.status == 410:  # resource version too old, list again right away
+                    continue
+                logger.warning("Watch of %s of %s failed: %s", kind, self.name, e)
+            except Exception:
+                logger.exception("Watch of %s of %s failed", kind, self.name)
+            else:
+                continue
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY)
+
+    async def _watch_deployment(self) -> None:
+        field_selector = f"metadata.name={self.name}"
+        deployments = await self.app_api.list_namespaced_deployment(
+            self.namespace, field_selector=field_selector
+        )
+        deployment = next(iter(deployments.items), None)
+        self._update("deployment", self.view.set_deployment(deployment))
+        async with kubernetes.watch.Watch() as watch:
+            stream = watch.stream(
+                self.app_api.list_namespaced_deployment,
+                self.namespace,
+                field_selector=field_selector,
+                resource_version=deployments.metadata.resource_version,
+                timeout_seconds=WATCH_TIMEOUT,
+            )
+            async for event in stream:
+                _raise_for_error(event)
+                deployment = None if event["type"] == "DELETED" else event["object"]
+                self._update("deployment", self.view.set_deployment(deployment))
+
+    async def _watch_pods(self) -> None:
+        deployment = await self.app_api.read_namespaced_deployment(self.name, self.namespace)
+        match_labels = deployment.spec.selector.match_labels or {}
+        label_selector = ",".join(f"{k}={v}" for k, v in sorted(match_labels.items()))
+        pods = await self.core_api.list_namespaced_pod(
+            self.namespace, label_selector=label_selector
+        )
+        self._update("pods", self.view.set_pods(pods.items))
+        async with kubernetes.watch.Watch() as watch:
+            stream = watch.stream(
+                self.core_api.list_namespaced_pod,
+                self.namespace,
+                label_selector=label_selector,
+                resource_version=pods.metadata.resource_version,
+                timeout_seconds=WATCH_TIMEOUT,
+            )
+            async for event in stream:
+                _raise_for_error(event)
+                self._update("pods", self.view.apply_pod_event(event["type"], event["object"]))
+
+    def _update(self, kind: str, changed: bool) -> None:
+        if not self._synced[kind]:
+            self._synced[kind] = changed = True
+            self.view.synced = all(self._synced.values())
+        if changed and self.view.synced and self.on_change is not None:
+            self.on_change(self.view.replicas)
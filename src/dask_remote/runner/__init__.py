@@ -1,2 +1,59 @@
-from .api import ApiProcess, cluster_api  # noqa
-from .cluster_process import ClusterProcess, ClusterProcessProxy  # noqa
+"""Run a cluster in a separate process, and expose it through a REST API.
+
+Names are imported from their module on first access, so that e.g. `dask_remote.runner.metrics`
+loads without FastAPI nor `distributed`.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from .api import ApiProcess, cluster_api
+    from .cluster_process import (
+        AsyncClusterProcessProxy,
+        ClusterProcess,
+        ClusterProcessProxy,
+        ClusterUnavailableError
+    )
+    from .host import ClusterHost, multi_cluster_api
+    from .pool import ClusterProcessPool
+    from .supervisor import ClusterSupervisor
+
+# Module each name is imported from
+_MODULES = {
+    "ApiProcess": "api",
+    "cluster_api": "api",
+    "AsyncClusterProcessProxy": "cluster_process",
+    "ClusterProcess": "cluster_process",
+    "ClusterProcessProxy": "cluster_process",
+    "ClusterUnavailableError": "cluster_process",
+    "ClusterHost": "host",
+    "multi_cluster_api": "host",
+    "ClusterProcessPool": "pool",
+    "ClusterSupervisor": "supervisor",
+}
+
+__all__ = [
+    "ApiProcess",
+    "cluster_api",
+    "AsyncClusterProcessProxy",
+    "ClusterProcess",
+    "ClusterProcessProxy",
+    "ClusterUnavailableError",
+    "ClusterHost",
+    "multi_cluster_api",
+    "ClusterProcessPool",
+    "ClusterSupervisor",
+]
+
+
+def __getattr__(name: str):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_MODULES[name]}", __name__)
+    return getattr(module, name)
+
+
+def __dir__():
+    return sorted([*globals(), *_MODULES])
@@ -1,12 +1,34 @@
+import asyncio
+import json
+import time
 from multiprocessing import Process
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Union
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from starlette.responses import RedirectResponse
+from starlette.requests import Request
+from starlette.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse
+)
+from starlette.routing import Match, Router
 from typing_extensions import Literal
 
-from .cluster_process import ClusterProcessProxy
+from .cluster_process import (
+    AsyncClusterProcessProxy,
+    AsyncClusterProxy,
+    ClusterProcessProxy,
+    ClusterUnavailableError
+)
+from .metrics import REGISTRY, Family, add_labels, merge, render
+from .worker_index import WorkerIndex
+
+
+if TYPE_CHECKING:
+    from .in_process import InProcessClusterProxy
 
 
 class ResponseMessage(BaseModel):
@@ -34,84 +56,528 @@ class SchedulerInfo(BaseModel):
     workers: Dict[Any, WorkerInfo]
 
 
+class SchedulerInfoDeltas(BaseModel):
+    token: str
+    reset: bool
+    scheduler: Dict[str, Any]
+    added: Dict[str, Dict[str, Any]]
+    changed: Dict[str, Dict[str, Any]]
+    removed: List[str]
+    next_after: Optional[str]
+
+
+class Replicas(BaseModel):
+    desired: int
+    ready: int
+    starting: int
+    pending: int
+    unschedulable: int
+    failing: int
+    terminating: int
+
+
+class BatchCommand(BaseModel):
+    attribute: Optional[str] = None
+    method: Optional[str] = None
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+
+
+class BatchRequest(BaseModel):
+    commands: List[BatchCommand]
+
+
+class BatchResult(BaseModel):
+    result: Any = None
+    error: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+
+# Interval between checks for cluster events at 0.1''
+EVENTS_INTERVAL = 0.1
+
+# Interval between keep-alive messages on the event stream at 5'' (below client read timeouts)
+EVENTS_KEEPALIVE = 5.0
+
+# Window over which scale requests are coalesced at 0.1''
+SCALE_WINDOW = 0.1
+
+# Cluster methods allowed in batches, and the cluster method each one calls
+BATCH_METHODS = {"scale": "_adaptive_stop_and_scale", "adapt": "adapt"}
+
+# Time allowed for collecting the metrics of the cluster process at 1''
+METRICS_TIMEOUT = 1.0
+
+# Seconds clients are told to wait before retrying while the cluster process is down
+RETRY_AFTER = 1
+
+API_REQUEST_SECONDS = REGISTRY.histogram(
+    "dask_remote_api_request_seconds", "Time from receiving API requests to starting responses"
+)
+API_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "dask_remote_api_requests_in_flight", "API requests being processed, or streamed"
+)
+CLUSTER_METRICS_UP = REGISTRY.gauge(
+    "dask_remote_api_cluster_metrics_up", "Whether the cluster process returned its metrics"
+)
+
+# Worker fields returned by default, matching `WorkerInfo`
+WORKER_FIELDS = [
+    "type",
+    "id",
+    "host",
+    "nanny",
+    "name",
+    "nthreads",
+    "memory_limit",
+    "services",
+    "resources",
+    "local_directory",
+]
+
+
+class ScaleCoalescer:
+    """Apply only the latest of the scale requests received within a window.
+
+    The first request waits for `window` seconds, during which further requests only update
+    the target; all of them then resolve with the result of a single command stopping adaptive
+    scaling and scaling to the latest target. Scaling commands are sent one at a time, and
+    setting adaptive scaling discards a pending target.
+
+    Params:
+        cluster_proxy: an awaitable proxy of the cluster, see `AsyncClusterProxy`
+        window: seconds to wait for further requests before scaling
+    """
+
+    def __init__(self, cluster_proxy: AsyncClusterProxy, window: float = SCALE_WINDOW):
+        self.cluster_proxy = cluster_proxy
+        self.window = window
+        self._scaling_target: Optional[int] = None
+        self._scaling_task_waiting: Optional[asyncio.Future] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # created on first use, within the event loop of the app
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def scale(self, n: int) -> Any:
+        """Scale to `n` workers, unless superseded by another request within the window."""
+        self._scaling_target = n
+        if not self._scaling_task_waiting:
+            self._scaling_task_waiting = asyncio.ensure_future(self._scale_to_target())
+        # shielded, so that a client disconnecting does not cancel the others' request
+        return await asyncio.shield(self._scaling_task_waiting)
+
+    async def adapt(self, *args, **kwargs) -> Any:
+        """Set adaptive scaling, discarding any pending scale request."""
+        self._scaling_target = None
+        async with self.lock:
+            return await self.cluster_proxy.adapt(*args, **kwargs)
+
+    async def _scale_to_target(self) -> Any:
+        await asyncio.sleep(self.window)
+        async with self.lock:
+            self._scaling_task_waiting = None
+            n, self._scaling_target = self._scaling_target, None
+            if n is None:
+                return None
+            return await self.cluster_proxy._adaptive_stop_and_scale(n)
+
+
+class MetricsMiddleware:
+    """Record the latency and number of in-flight requests of each route.
+
+    Params:
+        app: the ASGI app to wrap
+        router: the router the routes are looked up from, for their path template
+        labels: additional labels of the metrics, e.g. the cluster id
+    """
+
+    def __init__(self, app, router: Router, labels: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.router = router
+        self.labels = labels or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        labels = dict(self.labels, method=scope["method"], route=self._route(scope))
+
+        async def send_and_observe(message):
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                API_REQUEST_SECONDS.observe(time.perf_counter() - start, status=status, **labels)
+            await send(message)
+
+        with API_REQUESTS_IN_FLIGHT.track_inprogress(**labels):
+            await self.app(scope, receive, send_and_observe)
+
+    def _route(self, scope) -> str:
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "other")
+        return "unmatched"
+
+
 class DaskAPI(FastAPI):
-    dask_cluster_proxy: ClusterProcessProxy
+    dask_cluster_id: Optional[str] = None
+    dask_cluster_proxy: Union[ClusterProcessProxy, "InProcessClusterProxy"]
+    dask_async_cluster_proxy: AsyncClusterProxy
     dask_scheduler_address: Optional[str] = None
     dask_dashboard_link: Optional[str] = None
+    dask_worker_index: WorkerIndex
+    dask_scaler: ScaleCoalescer
+    dask_scaling_target: Optional[int] = None
+    dask_adapt_bounds: Optional[Dict[str, int]] = None
 
 
 def cluster_api(
-    cluster_proxy: ClusterProcessProxy,
+    cluster_proxy: Union[ClusterProcessProxy, "InProcessClusterProxy"],
     fastapi_kwargs: Optional[dict] = None,
     scheduler_address: Optional[str] = None,
     dashboard_link: Optional[str] = None,
+    scale_window: float = SCALE_WINDOW,
+    cluster_id: Optional[str] = None,
 ) -> DaskAPI:
     """Create a FastAPI app that exposes given ClusterProcessProxy.
 
     Params:
-        cluster_proxy: a `ClusterProcessProxy` for the cluster process (sic)
+        cluster_proxy: a `ClusterProcessProxy` for the cluster process (sic), or an
+            `InProcessClusterProxy` for a cluster running on the same event loop as the API
         fastapi_kwargs: additional keyword arguments passed to `fastapi.FastAPI`
         scheduler_address: override value for the RPC address used by remote clients
         dashboard_link: override value for the HTTP link to the dashboard displayed to clients
+        scale_window: seconds over which scale requests are coalesced, see `ScaleCoalescer`
+        cluster_id: id of the cluster among those served by the same process, added as a
+            `cluster` label to metrics
 
     Configuring `scheduler_address` and `dashboard_link` is necessary when the API runs
     behind a reverse proxy, or when we want to support DNS/domain names.
+
+    Routes await the cluster through an `AsyncClusterProcessProxy`, so that a slow cluster
+    call does not hold up other requests, and read attributes from the state snapshot the
+    proxy subscribes to. While the cluster process is down (e.g. restarted by a
+    `ClusterSupervisor`), routes answer 503 rather than waiting for it.
     """
     fastapi_kwargs = fastapi_kwargs or {}
     app = DaskAPI(**fastapi_kwargs)
+    app.dask_cluster_id = cluster_id
     app.dask_cluster_proxy = cluster_proxy
+    if isinstance(cluster_proxy, ClusterProcessProxy):
+        cluster_proxy.subscribe()
+        app.dask_async_cluster_proxy = AsyncClusterProcessProxy(cluster_proxy)
+    else:
+        app.dask_async_cluster_proxy = cluster_proxy
     app.dask_scheduler_address = scheduler_address
     app.dask_dashboard_link = dashboard_link
+    app.dask_worker_index = WorkerIndex()
+    app.dask_scaler = ScaleCoalescer(app.dask_async_cluster_proxy, window=scale_window)
+
+    _add_error_handlers(app)
+    _add_cluster_routes(app)
+    _add_scheduler_info_routes(app)
+    _add_scaling_routes(app)
+    _add_batch_routes(app)
+    _add_event_routes(app)
+    _add_metrics_routes(app)
+    return app
+
+
+def _add_error_handlers(app: DaskAPI) -> None:
+    @app.exception_handler(ClusterUnavailableError)
+    async def cluster_unavailable(request: Request, exc: ClusterUnavailableError):
+        return JSONResponse(
+            {"detail": f"Cluster unavailable: {exc}"},
+            status_code=503,
+            headers={"Retry-After": str(RETRY_AFTER)},
+        )
+
 
+def _add_cluster_routes(app: DaskAPI) -> None:
     @app.get("/", include_in_schema=False)
-    async def redirect_root():
+    async def redirect_root(request: Request):
         """Redirect to API docs."""
-        return RedirectResponse(url=f"{app.root_path}/docs")
+        root_path = request.scope.get("root_path") or app.root_path
+        return RedirectResponse(url=f"{root_path}/docs")
 
     @app.get("/status", summary="Cluster status", response_model=ResponseMessage)
     async def get_status():
         """Return cluster status, e.g. 'running'."""
-        return ResponseMessage(message=app.dask_cluster_proxy.status)
+        return ResponseMessage(message=await app.dask_async_cluster_proxy.status)
 
     @app.get("/scheduler_address", summary="Scheduler address", response_model=ResponseMessage)
     async def get_scheduler_address():
         """Return public scheduler address for use by RPC clients."""
-        scheduler_address = app.dask_scheduler_address or app.dask_cluster_proxy.scheduler_address
+        scheduler_address = (
+            app.dask_scheduler_address or await app.dask_async_cluster_proxy.scheduler_address
+        )
         return ResponseMessage(message=scheduler_address)
 
-    @app.get("/scheduler_info", response_model=SchedulerInfo)
-    async def get_scheduler_info():
-        return SchedulerInfo(**app.dask_cluster_proxy.scheduler_info)
-
     @app.get(
         "/dashboard_link", summary="Link to monitoring dashboard", response_model=ResponseMessage
     )
     async def get_dashboard_link():
         """Return public link to monitoring dashboard."""
-        dashboard_link = app.dask_dashboard_link or app.dask_cluster_proxy.dashboard_link
+        dashboard_link = (
+            app.dask_dashboard_link or await app.dask_async_cluster_proxy.dashboard_link
+        )
         return ResponseMessage(message=dashboard_link)
 
+
+def _add_scheduler_info_routes(app: DaskAPI) -> None:
+    @app.get("/scheduler_info", response_model=SchedulerInfo)
+    async def get_scheduler_info():
+        return SchedulerInfo(**await app.dask_async_cluster_proxy.scheduler_info)
+
+    @app.get(
+        "/scheduler_info/deltas",
+        summary="Workers added, changed or removed since a previous token",
+        response_model=SchedulerInfoDeltas,
+    )
+    async def get_scheduler_info_deltas(
+        since: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        fields: Optional[str] = None,
+    ):
+        """Return the workers changed since the `token` of a previous response.
+
+        Without a (valid) `since` token, all workers are returned as `added`, and `reset` is set.
+        Workers are paginated by `limit`, in order of their ids: when `next_after` is set, the
+        following page is that of the workers after this id, with the same `since` token.
+        Only the comma-separated worker `fields` are returned (by default those of `WorkerInfo`).
+        """
+        scheduler_info = await app.dask_async_cluster_proxy.scheduler_info
+        app.dask_worker_index.update(scheduler_info["workers"])
+        selected = fields.split(",") if fields else WORKER_FIELDS
+        return _scheduler_info_deltas(
+            app.dask_worker_index, scheduler_info, since, after, limit, selected
+        )
+
+
+def _add_scaling_routes(app: DaskAPI) -> None:
     @app.get("/scale", summary="Current number of workers", response_model=ResponseMessage)
     async def get_scale():
         """Return current number of workers."""
-        return ResponseMessage(message=str(app.dask_cluster_proxy.num_workers))
+        return ResponseMessage(message=str(await app.dask_async_cluster_proxy.num_workers))
+
+    @app.get("/replicas", summary="Replicas by pod state", response_model=Replicas)
+    async def get_replicas():
+        """Return the replicas desired, and those ready, pending, failing...
+
+        Only clusters watching their pods, such as a `DeploymentCluster`, report replicas.
+        """
+        try:
+            replicas = await app.dask_async_cluster_proxy.replicas
+        except AttributeError:
+            replicas = None
+        if replicas is None:
+            raise HTTPException(404, "The cluster does not report its replicas")
+        return Replicas(**replicas)
 
     @app.post("/scale", summary="Scale to desired size", response_model=ResponseMessage)
     async def set_scale(n: int):
-        """Scale to `n` workers."""
+        """Scale to `n` workers.
+
+        Requests received within the scale window are coalesced, and only the latest applied.
+        """
         if n < 0:
             n = 0
-        app.dask_cluster_proxy._adaptive_stop()
-        response = app.dask_cluster_proxy.scale(n)
+        app.dask_scaling_target, app.dask_adapt_bounds = n, None
+        response = await app.dask_scaler.scale(n)
         return ResponseMessage(message=str(response))
 
     @app.post("/adapt", summary="Set adaptive scaling", response_model=ResponseMessage)
     async def set_adapt(minimum: int = 0, maximum: Optional[int] = None):
         """Set cluster to adaptive scaling mode."""
-        response = app.dask_cluster_proxy.adapt(minimum=minimum, maximum=maximum or 999999)
+        app.dask_scaling_target = None
+        app.dask_adapt_bounds = {"minimum": minimum, "maximum": maximum or 999999}
+        response = await app.dask_scaler.adapt(minimum=minimum, maximum=maximum or 999999)
         return ResponseMessage(message=str(response))
 
-    return app
+
+def _add_batch_routes(app: DaskAPI) -> None:
+    @app.post("/batch", summary="Run many commands at once", response_model=BatchResponse)
+    async def run_batch(batch: BatchRequest):
+        """Read cluster attributes and call scaling methods, in order.
+
+        Each command either reads an `attribute` (e.g. `status`), or calls a `method` (`scale`
+        or `adapt`) with `args` and `kwargs`. Results are returned in the order of the commands,
+        with the `error` of those that failed.
+
+        Consecutive attribute reads are made in a single call to the cluster, while scaling
+        methods are coalesced with the requests to `/scale` and `/adapt`.
+        """
+        cmds = [_batch_cmd(command) for command in batch.commands]
+        results = await _run_batch(app, cmds)
+        for cmd, result in zip(cmds, results):
+            if not isinstance(result, Exception):
+                _record_scaling(app, cmd)
+        return BatchResponse(
+            results=[
+                BatchResult(error=repr(r)) if isinstance(r, Exception) else BatchResult(result=r)
+                for r in results
+            ]
+        )
+
+
+def _batch_cmd(command: BatchCommand) -> dict:
+    if (command.attribute is None) == (command.method is None):
+        raise HTTPException(422, "Each command needs either an attribute or a method")
+    if command.attribute is not None:
+        if command.attribute not in ClusterProcessProxy.CLUSTER_ATTRIBUTES:
+            raise HTTPException(422, f"Unknown attribute: {command.attribute}")
+        return {"attribute": command.attribute}
+    if command.method not in BATCH_METHODS:
+        raise HTTPException(422, f"Unknown method: {command.method}")
+    return {
+        "method": BATCH_METHODS[command.method],
+        "args": command.args,
+        "kwargs": command.kwargs,
+    }
+
+
+async def _run_batch(app: DaskAPI, cmds: List[dict]) -> List[Any]:
+    """Run batch commands in order, returning the errors in place of results."""
+    results: List[Any] = []
+    reads: List[dict] = []
+    for cmd in [*cmds, None]:
+        if cmd is not None and "attribute" in cmd:
+            reads.append(cmd)
+            continue
+        if reads:
+            results += await app.dask_async_cluster_proxy.batch(reads, return_exceptions=True)
+            reads = []
+        if cmd is None:
+            break
+        scaler = app.dask_scaler
+        method = scaler.adapt if cmd["method"] == "adapt" else scaler.scale
+        try:
+            results.append(await method(*cmd["args"], **cmd["kwargs"]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _record_scaling(app: DaskAPI, cmd: dict) -> None:
+    """Record the scaling target or adaptive bounds set by a batch command."""
+    if cmd.get("method") == "_adaptive_stop_and_scale":
+        n = cmd["args"][0] if cmd["args"] else cmd["kwargs"].get("n")
+        app.dask_scaling_target, app.dask_adapt_bounds = n, None
+    elif cmd.get("method") == "adapt":
+        app.dask_scaling_target, app.dask_adapt_bounds = None, dict(cmd["kwargs"])
+
+
+def _add_event_routes(app: DaskAPI) -> None:
+    @app.get("/events", summary="Stream of cluster state changes")
+    async def get_events(request: Request):
+        """Stream server-sent events with the cluster state, each time it changes.
+
+        Each `data` field is a JSON object with the cluster `status`, current `num_workers`,
+        scaling `target` and `adapt` bounds (whichever was last requested).
+        """
+        return StreamingResponse(
+            _event_stream(cluster_events(app), request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+
+async def cluster_events(
+    app: DaskAPI, interval: float = EVENTS_INTERVAL, keepalive: float = EVENTS_KEEPALIVE
+) -> AsyncGenerator[Optional[dict], None]:
+    """Yield the cluster state each time it changes, or `None` every `keepalive` seconds."""
+    last_event, last_sent = None, time.monotonic()
+    while True:
+        event = {
+            "status": await app.dask_async_cluster_proxy.status,
+            "num_workers": await app.dask_async_cluster_proxy.num_workers,
+            "target": app.dask_scaling_target,
+            "adapt": app.dask_adapt_bounds,
+        }
+        if event != last_event:
+            last_event, last_sent = event, time.monotonic()
+            yield jsonable_encoder(event)
+        elif time.monotonic() - last_sent >= keepalive:
+            last_sent = time.monotonic()
+            yield None
+        await asyncio.sleep(interval)
+
+
+async def _event_stream(events: AsyncIterator[Optional[dict]], request: Request):
+    async for event in events:
+        if await request.is_disconnected():
+            break
+        if event is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"event: cluster\ndata: {json.dumps(event)}\n\n"
+
+
+def _add_metrics_routes(app: DaskAPI) -> None:
+    labels = {"cluster": app.dask_cluster_id} if app.dask_cluster_id else {}
+    app.add_middleware(MetricsMiddleware, router=app.router, labels=labels)
+
+    @app.get("/metrics", summary="Metrics in the Prometheus text format")
+    async def get_metrics():
+        """Return the metrics of the API and of the cluster process.
+
+        `dask_remote_api_cluster_metrics_up` is 0 when the cluster process did not return its
+        metrics in time, e.g. while its commands are stalled.
+        """
+        cluster_families = await collect_cluster_metrics(app)
+        return metrics_response(REGISTRY.collect() + cluster_families)
+
+
+async def collect_cluster_metrics(app: DaskAPI) -> List[Family]:
+    """Return the metrics of the cluster process, labelled with the cluster id if any."""
+    labels = {"cluster": app.dask_cluster_id} if app.dask_cluster_id else {}
+    try:
+        cluster_metrics = app.dask_async_cluster_proxy.cluster_metrics()
+        families = await asyncio.wait_for(cluster_metrics, METRICS_TIMEOUT)
+        CLUSTER_METRICS_UP.set(1, **labels)
+    except Exception:
+        families = []
+        CLUSTER_METRICS_UP.set(0, **labels)
+    return add_labels(families, **labels)
+
+
+def metrics_response(families: List[Family]) -> PlainTextResponse:
+    return PlainTextResponse(render(merge(families)), media_type="text/plain; version=0.0.4")
+
+
+def _scheduler_info_deltas(
+    index: WorkerIndex,
+    scheduler_info: dict,
+    since: Optional[str],
+    after: Optional[str],
+    limit: Optional[int],
+    fields: List[str],
+) -> SchedulerInfoDeltas:
+    token = index.token
+    reset, added, changed, removed = index.deltas(since, fields=fields)
+
+    # a cursor rather than an offset, which workers removed between pages would shift
+    worker_ids = sorted(w for w in [*added, *changed, *removed] if after is None or w > after)
+    end = len(worker_ids) if limit is None else max(limit, 1)
+    page = set(worker_ids[:end])
+    return SchedulerInfoDeltas(
+        token=token,
+        reset=reset,
+        scheduler={k: v for k, v in scheduler_info.items() if k != "workers"},
+        added={k: v for k, v in added.items() if k in page},
+        changed={k: v for k, v in changed.items() if k in page},
+        removed=[k for k in removed if k in page],
+        next_after=worker_ids[end - 1] if end < len(worker_ids) else None,
+    )
 
 
 class ApiProcess(Process):
@@ -122,12 +588,14 @@ class ApiProcess(Process):
         uvicorn_kwargs: Optional[dict] = None,
         scheduler_address: Optional[str] = None,
         dashboard_link: Optional[str] = None,
+        scale_window: float = SCALE_WINDOW,
     ) -> None:
         self.cluster_proxy = cluster_proxy
         self.fastapi_kwargs = fastapi_kwargs
         self.uvicorn_kwargs = uvicorn_kwargs
         self.scheduler_address = scheduler_address
         self.dashboard_link = dashboard_link
+        self.scale_window = scale_window
         super().__init__()
 
     @property
@@ -137,6 +605,7 @@ class ApiProcess(Process):
             fastapi_kwargs=self.fastapi_kwargs,
             scheduler_address=self.scheduler_address,
             dashboard_link=self.dashboard_link,
+            scale_window=self.scale_window,
         )
 
     def run(self) -> None:
@@ -0,0 +1,180 @@
+"""Command line interface serving a cluster through the REST API of `cluster_api`.
+
+E.g. to serve a `LocalCluster` on port 8000:
+
+    $ dask-remote dask.distributed.LocalCluster --cluster-kwargs '{"n_workers": 0}'
+
+In the default `split` mode, the cluster runs in a `ClusterProcess` restarted by a
+`ClusterSupervisor` should it exit or hang, and the API in the main process; in `single`
+mode, both run on the same event loop, the API calling the (asynchronous) cluster object
+directly.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import signal
+from typing import Any, List, Optional
+
+from .codec import CODECS
+
+
+MODES = ["split", "single"]
+
+# Time given to the cluster process to close its cluster at 30''
+SHUTDOWN_TIMEOUT = 30.0
+
+# Default wait of a health check, in heartbeat intervals: a busy cluster may answer late
+HEARTBEAT_TIMEOUT_INTERVALS = 3
+
+
+def import_object(path: str) -> Any:
+    """Import an object given its path, as `module.attribute` or `module:attribute`."""
+    module_name, _, attribute = path.rpartition(":") if ":" in path else path.rpartition(".")
+    if not module_name or not attribute:
+        raise ValueError(f"Expected a path as `module.attribute`, got {path!r}")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ValueError(f"Module {module_name!r} has no attribute {attribute!r}") from None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="dask-remote", description="Serve a dask cluster through a REST API."
+    )
+    parser.add_argument("cluster", help="cluster class, e.g. dask.distributed.LocalCluster")
+    parser.add_argument(
+        "--cluster-kwargs", default="{}", help="keyword arguments of the cluster, as JSON"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="split",
+        help="run the cluster in its own process (split), or on the API event loop (single)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address the API listens on")
+    parser.add_argument("--port", type=int, default=8000, help="port the API listens on")
+    parser.add_argument("--scheduler-address", help="scheduler address returned to clients")
+    parser.add_argument("--dashboard-link", help="dashboard link returned to clients")
+    parser.add_argument(
+        "--scale-window", type=float, help="seconds over which scale requests are coalesced"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="threads running blocking cluster commands (split mode)",
+    )
+    parser.add_argument(
+        "--codec", choices=sorted(CODECS), default="pickle", help="pipe codec (split mode)"
+    )
+    parser.add_argument(
+        "--heartbeat-interval",
+        type=float,
+        default=1.0,
+        help="seconds between health checks of the cluster process (split mode)",
+    )
+    parser.add_argument(
+        "--heartbeat-timeout",
+        type=float,
+        help="seconds a health check waits for its answer, 3 intervals by default (split mode)",
+    )
+    parser.add_argument(
+        "--command-timeout",
+        type=float,
+        help="seconds after which a cluster command fails with a 503 (split mode)",
+    )
+    parser.add_argument("--log-level", default="info", help="logging level, e.g. debug")
+
+    args = parser.parse_args(argv)
+    try:
+        args.cluster_cls = import_object(args.cluster)
+    except (ImportError, ValueError) as e:
+        parser.error(f"can not import cluster {args.cluster!r}: {e}")
+    try:
+        args.cluster_kwargs = json.loads(args.cluster_kwargs)
+    except ValueError as e:
+        parser.error(f"invalid --cluster-kwargs: {e}")
+    if not isinstance(args.cluster_kwargs, dict):
+        parser.error("--cluster-kwargs must be a JSON object")
+    if args.heartbeat_timeout is None:
+        args.heartbeat_timeout = HEARTBEAT_TIMEOUT_INTERVALS * args.heartbeat_interval
+    return args
+
+
+def api_kwargs(args: argparse.Namespace) -> dict:
+    """Keyword arguments of `cluster_api` given on the command line."""
+    kwargs = dict(scheduler_address=args.scheduler_address, dashboard_link=args.dashboard_link)
+    if args.scale_window is not None:
+        kwargs["scale_window"] = args.scale_window
+    return kwargs
+
+
+def run_split(args: argparse.Namespace) -> None:
+    """Run the cluster in a supervised `ClusterProcess`, and the API in this process."""
+    import uvicorn
+
+    from .api import cluster_api
+    from .supervisor import ClusterSupervisor
+
+    supervisor = ClusterSupervisor(
+        args.cluster_cls,
+        args.cluster_kwargs,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_timeout=args.heartbeat_timeout,
+        command_timeout=args.command_timeout,
+        concurrency=args.concurrency,
+        codec=args.codec,
+    )
+    supervisor.start()
+    try:
+        app = cluster_api(supervisor.proxy, **api_kwargs(args))
+        uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level.lower())
+    finally:
+        supervisor.close(timeout=SHUTDOWN_TIMEOUT)
+
+
+async def serve_single(args: argparse.Namespace) -> None:
+    """Run the cluster and the API on the current event loop, until the server exits."""
+    import uvicorn
+
+    from .api import cluster_api
+    from .cluster_process import _await_result, proxied_cluster_class
+    from .in_process import InProcessClusterProxy
+
+    cluster_cls = proxied_cluster_class(args.cluster_cls)
+    cluster = await _await_result(cluster_cls(**dict(args.cluster_kwargs, asynchronous=True)))
+    try:
+        app = cluster_api(InProcessClusterProxy(cluster), **api_kwargs(args))
+        config = uvicorn.Config(
+            app, host=args.host, port=args.port, log_level=args.log_level.lower()
+        )
+        server = uvicorn.Server(config)
+
+        def exit_server():
+            server.should_exit = True
+
+        # exit the server on signals, rather than interrupting the cluster while it closes
+        loop = asyncio.get_running_loop()
+        for sig in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(sig, exit_server)
+        await server.serve()
+    finally:
+        await _await_result(cluster.close())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    if args.mode == "single":
+        asyncio.run(serve_single(args))
+    else:
+        run_split(args)
+
+
+if __name__ == "__main__":
+    main()
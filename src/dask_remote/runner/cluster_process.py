@@ -1,22 +1,116 @@
-"""Run Cluster in a separata process, and expose its scaling commands through a "proxy"."""
+"""Run Cluster in a separate process, and expose its scaling commands through a "proxy"."""
 
+import asyncio
+import inspect
+import itertools
 import logging
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import partial
 from multiprocessing import Process
 from multiprocessing.connection import Connection, Pipe
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
 from pickle import PicklingError
-from typing import Any, Optional, Tuple, Type
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Type, Union
 
-from distributed.deploy.cluster import Cluster
+from typing_extensions import Protocol
+
+from .codec import Codec, get_codec
+from .metrics import REGISTRY, Family
+from .shared_state import DEFAULT_SIZE, HAS_SHARED_MEMORY, SharedState
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
 
 
 logger = logging.getLogger(__name__)
 
+PROXY_COMMAND_SECONDS = REGISTRY.histogram(
+    "dask_remote_proxy_command_seconds",
+    "Time from sending a command to the cluster process to receiving its result",
+)
+PROXY_COMMANDS_IN_FLIGHT = REGISTRY.gauge(
+    "dask_remote_proxy_commands_in_flight", "Commands awaiting a result from the cluster process"
+)
+PROXY_PICKLING_ERRORS = REGISTRY.counter(
+    "dask_remote_proxy_command_pickling_errors", "Commands that could not be sent"
+)
+CLUSTER_COMMAND_SECONDS = REGISTRY.histogram(
+    "dask_remote_cluster_command_seconds", "Time spent processing commands in the cluster process"
+)
+CLUSTER_COMMANDS_IN_FLIGHT = REGISTRY.gauge(
+    "dask_remote_cluster_commands_in_flight", "Commands being processed by the cluster process"
+)
+CLUSTER_COMMANDS_QUEUED = REGISTRY.gauge(
+    "dask_remote_cluster_commands_queued", "Commands received, waiting for a free thread"
+)
+CLUSTER_PICKLING_ERRORS = REGISTRY.counter(
+    "dask_remote_cluster_result_pickling_errors", "Results that could not be sent back"
+)
+CLUSTER_STATE_REFRESH_SECONDS = REGISTRY.histogram(
+    "dask_remote_cluster_state_refresh_seconds", "Time spent refreshing the state snapshot"
+)
+
 
 class ResultPicklingError(PicklingError):
     ...
 
 
+class ClusterUnavailableError(ConnectionError):
+    """The cluster process exited, is restarting, or did not answer in time."""
+
+
+class CommandTimeoutError(ClusterUnavailableError, TimeoutError):
+    ...
+
+
+class BatchResults(list):
+    """Results of a batch command, in the order of its commands; failed ones are exceptions."""
+
+
+class VersionedResult:
+    """Attribute value encoded at a `version`, or `None` as `data` when the caller has it."""
+
+    def __init__(self, version: int, data: Optional[bytes]):
+        self.version = version
+        self.data = data
+
+
+# Placeholder for the batch results not yet received
+_PENDING = object()
+
+
 class ClusterProcessProxy:
+    """Proxy the cluster attributes and methods exposed by a `ClusterProcess`.
+
+    Every command carries a request id, and the cluster process echoes it back alongside
+    the result, so that concurrent callers (threads, API handlers) can share the same pipes:
+    replies are routed back to the waiting caller by a reader thread that runs for as long as
+    there are outstanding commands.
+
+    Once `subscribe`d, the proxy also receives a snapshot of the cluster attributes, pushed by
+    the cluster process whenever it changes (and re-confirmed every `state_interval`), and
+    serves attribute reads from this local copy for as long as it is at most `max_staleness`
+    seconds old. When given the `shared_state` segment the cluster process publishes the
+    snapshot to, the proxy reads it from there instead, without any IPC.
+
+    Messages are serialized by the `codec` (see `dask_remote.runner.codec`), which must match
+    the cluster process'. Large `VERSIONED_ATTRIBUTES` are only sent back when they changed
+    since the version the proxy last received.
+
+    Commands fail with a `ClusterUnavailableError` once the cluster process exited, and with
+    a `CommandTimeoutError` when not answered within `command_timeout` seconds (if set). The
+    last of the `SCALING_METHODS` called is kept as `last_scaling`, for a `ClusterSupervisor`
+    to apply it again to a restarted process.
+    """
 
     CLUSTER_ATTRIBUTES = [
         "dashboard_link",
@@ -24,32 +118,332 @@ class ClusterProcessProxy:
         "scheduler_info",
         "num_workers",
         "status",
+        "replicas",
     ]
-    CLUSTER_METHODS = ["scale", "adapt", "_adaptive_stop"]
-
-    def __init__(self, cmd_conn: Connection, result_conn: Connection):
+    CLUSTER_METHODS = ["scale", "adapt", "_adaptive_stop", "_adaptive_stop_and_scale"]
+    SCALING_METHODS = ["scale", "adapt", "_adaptive_stop_and_scale"]
+    VERSIONED_ATTRIBUTES = ["scheduler_info"]
+
+    last_scaling: Optional[dict] = None
+    _unavailable: Optional[str] = None  # reason commands fail fast, while disconnected
+    _generation = 0  # incremented on each new channel, to discard the replies of previous ones
+
+    def __init__(
+        self,
+        cmd_conn: Connection,
+        result_conn: Connection,
+        max_staleness: float = 1.0,
+        shared_state: Optional[SharedState] = None,
+        codec: Union[str, Codec] = "pickle",
+        command_timeout: Optional[float] = None,
+    ):
         self.cmd_conn = cmd_conn  # pipe connection to receive scaling/control commands from
         self.result_conn = result_conn  # pipe connection to return messages to
+        self.max_staleness = max_staleness
+        self.shared_state = shared_state
+        self.codec = get_codec(codec)
+        self.command_timeout = command_timeout
+        self._init_channel()
+
+    def _init_channel(self):
+        self._pid = os.getpid()
+        self._generation += 1
+        self._msg_ids = itertools.count()
+        self._lock = threading.Lock()  # guards `_pending` and `_reader`
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._reader: Optional[threading.Thread] = None
+        self._subscribed = False
+        self._state: Dict[str, Any] = {}
+        self._state_version = -1
+        self._state_updated = 0.0
+        self._results: Dict[str, Tuple[int, Any]] = {}  # versioned attribute values
+
+    def __getstate__(self):
+        return {
+            "cmd_conn": self.cmd_conn,
+            "result_conn": self.result_conn,
+            "max_staleness": self.max_staleness,
+            "shared_state": self.shared_state,
+            "codec": self.codec,
+            "command_timeout": self.command_timeout,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_channel()
 
     # Client side
-    def _submit_cmd(self, cmd):
-        self.cmd_conn.send(cmd)
-        result = self.result_conn.recv()
+    def _submit_cmd_nowait(self, cmd) -> Future:
+        """Send a command, returning a future for its (raw) result."""
+        if self._pid != os.getpid():
+            # the proxy was inherited by a forked process: in-flight state belongs to the parent
+            self._init_channel()
+        future: Future = Future()
+        with self._lock:
+            if self._unavailable:
+                raise ClusterUnavailableError(self._unavailable)
+            msg_id = next(self._msg_ids)
+            self._pending[msg_id] = future
+            if self._reader is None or not self._reader.is_alive():
+                self._reader = threading.Thread(
+                    target=self._read_results,
+                    args=(self.result_conn, self._generation),
+                    daemon=True,
+                )
+                self._reader.start()
+        labels = _command_labels(cmd)
+        PROXY_COMMANDS_IN_FLIGHT.inc()
+        future.add_done_callback(partial(_observe_command, time.perf_counter(), labels))
+        future.add_done_callback(partial(self._record_scaling, cmd))
+        try:
+            with self._send_lock:
+                self.codec.send(self.cmd_conn, dict(cmd, id=msg_id))
+        except Exception as e:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            if isinstance(e, OSError):
+                e = ClusterUnavailableError(f"Could not send to the cluster process: {e}")
+            else:
+                PROXY_PICKLING_ERRORS.labels(**labels).inc()
+            future.set_exception(e)
+            raise e
+        return future
+
+    def _record_scaling(self, cmd: dict, future: Future) -> None:
+        """Keep the last scaling command the cluster process answered."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        for item in [cmd, *cmd.get("batch", ())]:
+            if item.get("method") in self.SCALING_METHODS:
+                self.last_scaling = {k: v for k, v in item.items() if k != "id"}
+
+    def _wait(self, future: Future):
+        """Return the (raw) result of a command, waiting at most `command_timeout` seconds."""
+        try:
+            return future.result(self.command_timeout)
+        except FutureTimeoutError:
+            self._forget(future)
+            raise CommandTimeoutError(
+                f"The cluster process did not answer within {self.command_timeout}s"
+            ) from None
+
+    def _forget(self, future: Future) -> None:
+        """Stop waiting for the result of a command, e.g. once timed out."""
+        with self._lock:
+            for msg_id, pending in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[msg_id]
+        future.cancel()
+
+    def ping(self, timeout: Optional[float] = None) -> bool:
+        """Return whether the cluster process answers within `timeout` seconds."""
+        try:
+            future = self._submit_cmd_nowait({"ping": True})
+        except Exception:
+            return False
+        try:
+            return future.result(timeout) is True
+        except FutureTimeoutError:
+            self._forget(future)
+            return False
+        except Exception:
+            return False
+
+    def _disconnect(self, reason: str) -> None:
+        """Fail the commands in flight, and any new one until `_reconnect`."""
+        with self._lock:
+            self._unavailable = reason
+            generation = self._generation
+        self._fail_pending(generation, ClusterUnavailableError(reason))
+
+    def _reconnect(self, proxy: "ClusterProcessProxy") -> None:
+        """Send commands over the pipes of another proxy, e.g. of a restarted process."""
+        with self._lock:
+            self.cmd_conn, self.result_conn = proxy.cmd_conn, proxy.result_conn
+            self.shared_state = proxy.shared_state
+            self._generation += 1
+            self._pending, self._reader = {}, None
+            self._state, self._state_version, self._state_updated = {}, -1, 0.0
+            self._results = {}
+            self._unavailable = None
+            subscribed = self._subscribed
+        if subscribed:
+            self.subscribe()
+
+    def _read_results(self, result_conn: Connection, generation: int):
+        """Route results to the pending futures, until no command is left outstanding.
+
+        Subscribed proxies keep reading state updates until the process exits.
+        """
+        while True:
+            with self._lock:
+                if generation != self._generation:
+                    return  # reconnected to another process
+                if not self._pending and not self._subscribed:
+                    self._reader = None
+                    return
+            try:
+                msg_id, result = self.codec.recv(result_conn)
+            except Exception as e:
+                if not isinstance(e, (EOFError, OSError)) and not result_conn.closed:
+                    raise
+                # the process exited, or `shutdown` closed the connection meanwhile
+                error = ClusterUnavailableError(f"Lost the connection to the cluster process: {e}")
+                error.__cause__ = e
+                self._fail_pending(generation, error)
+                return
+            if not self._route_result(generation, msg_id, result):
+                return
+
+    def _route_result(self, generation: int, msg_id: Optional[int], result) -> bool:
+        """Resolve the command `msg_id`, returning whether `generation` is still current."""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            future = None if msg_id is None else self._pending.pop(msg_id, None)
+        if msg_id is None:
+            self._update_state(result)
+        elif future is None:
+            logger.debug("Dropping result for unknown command id %s", msg_id)
+        else:
+            _resolve(future, result=result)
+        return True
+
+    def _fail_pending(self, generation: int, error: ClusterUnavailableError):
+        with self._lock:
+            if generation != self._generation:
+                return
+            pending, self._pending = self._pending, {}
+            self._reader = None
+        for future in pending.values():
+            _resolve(future, error=error)
+
+    def _update_state(self, update: dict):
+        with self._lock:
+            if update["version"] < self._state_version:
+                return  # out-of-order update
+            if "state" in update:
+                self._state = update["state"]
+            self._state_version = update["version"]
+            self._state_updated = update.get("timestamp", time.time())
+
+    def _read_shared_state(self) -> bool:
+        """Update the local snapshot from shared memory, returning whether one was available."""
+        snapshot = self.shared_state.read(known_version=self._state_version)  # type: ignore
+        if snapshot is None:
+            return False
+        version, timestamp, state = snapshot
+        update = {"version": version, "timestamp": timestamp}
+        if state is not None:
+            update["state"] = state
+        self._update_state(update)
+        return True
+
+    @property
+    def cached_state(self) -> Dict[str, Any]:
+        """Return the local snapshot of cluster attributes, or an empty dict if stale."""
+        shared = self.shared_state is not None and self._read_shared_state()
+        if not (shared or self._subscribed):
+            return {}
+        if time.time() - self._state_updated >= self.max_staleness:
+            return {}
+        return self._state
+
+    def subscribe(self) -> None:
+        """Request state updates from the cluster process, without waiting for the first one."""
+        if self._pid != os.getpid():
+            self._init_channel()
+        with self._lock:
+            self._subscribed = True
+        future = self._submit_cmd_nowait({"subscribe": True})
+        future.add_done_callback(self._on_subscribed)
+
+    def _on_subscribed(self, future: Future):
+        if future.exception() is not None:
+            return
+        result = future.result()
+        if isinstance(result, Exception):
+            logger.warning("Failed to subscribe to cluster state: %s", result)
+        else:
+            self._update_state(result)
+
+    @staticmethod
+    def _unpack_result(result):
         if isinstance(result, ResultPicklingError):
-            logger.warn("Value could not be returned: %s", result)
+            logger.warning("Value could not be returned: %s", result)
             result = None
         elif isinstance(result, Exception):
             raise result
         return result
 
+    def _submit_cmd(self, cmd):
+        return self._unpack_result(self._wait(self._submit_cmd_nowait(cmd)))
+
     def _get_cluster_attribute(self, attr):
+        state = self.cached_state
+        if attr in state:
+            return state[attr]
+        cmd = self._attribute_cmd(attr)
+        return self._unpack_attribute(attr, self._wait(self._submit_cmd_nowait(cmd)))
+
+    def _attribute_cmd(self, attr) -> dict:
         cmd = {"attribute": attr}
-        return self._submit_cmd(cmd)
+        if attr in self.VERSIONED_ATTRIBUTES:
+            cached = self._results.get(attr)
+            cmd["version"] = cached[0] if cached else None
+        return cmd
+
+    def _unpack_attribute(self, attr, result):
+        if not isinstance(result, VersionedResult):
+            return self._unpack_result(result)
+        if result.data is None:
+            return self._results[attr][1]  # unchanged
+        value = self.codec.decode(result.data)
+        self._results[attr] = (result.version, value)
+        return value
+
+    def batch(self, cmds: List[dict], return_exceptions: bool = False) -> List[Any]:
+        """Evaluate many attribute reads and method calls in a single round-trip.
+
+        Params:
+            cmds: commands such as `{"attribute": "status"}`, or
+                `{"method": "scale", "args": [2], "kwargs": {}}`
+            return_exceptions: return errors in place of results, rather than raising the first
+
+        Unless the batch calls a method, attributes found in the cached state are not sent to
+        the cluster process.
+        """
+        results, pending = self._prepare_batch(cmds)
+        replies = self._wait(self._submit_cmd_nowait({"batch": pending})) if pending else []
+        return self._merge_batch(results, replies, return_exceptions)
+
+    def _prepare_batch(self, cmds: List[dict]) -> Tuple[list, List[dict]]:
+        state = {} if any("method" in cmd for cmd in cmds) else self.cached_state
+        results = [
+            state.get(cmd["attribute"], _PENDING) if "attribute" in cmd else _PENDING
+            for cmd in cmds
+        ]
+        pending = [cmd for cmd, result in zip(cmds, results) if result is _PENDING]
+        return results, pending
+
+    def _merge_batch(self, results: list, replies: Any, return_exceptions: bool) -> List[Any]:
+        if isinstance(replies, Exception):  # e.g. a `ResultPicklingError` of the whole batch
+            raise replies
+        replies_iter = iter(replies)
+        results = [next(replies_iter) if r is _PENDING else r for r in results]
+        return [
+            r if return_exceptions and _is_error(r) else self._unpack_result(r) for r in results
+        ]
 
     def _call_cluster_method(self, method, *args, **kwargs):
         cmd = {"method": method, "args": args, "kwargs": kwargs}
         return self._submit_cmd(cmd)
 
+    def cluster_metrics(self) -> List[Family]:
+        """Return the metrics recorded by the cluster process."""
+        return self._submit_cmd({"metrics": True})
+
     def _get_cluster_method(self, method):
         def callable_method(*args, **kwargs):
             return self._call_cluster_method(method, *args, **kwargs)
@@ -67,17 +461,170 @@ class ClusterProcessProxy:
             raise AttributeError
 
 
-class ClusterProcess(Process):
-    """Run a dask Cluster object in a child process, and expose core methods and attributes."""
+class AsyncClusterProxy(Protocol):
+    """Interface of the awaitable cluster proxies served by `cluster_api`.
+
+    Implemented by `AsyncClusterProcessProxy` and `InProcessClusterProxy`: cluster
+    attributes and methods are looked up dynamically, and return awaitables.
+    """
+
+    async def batch(self, cmds: List[dict], return_exceptions: bool = False) -> List[Any]:
+        ...
+
+    async def cluster_metrics(self) -> List[Family]:
+        ...
 
-    def __init__(self, cluster_cls: Type[Cluster], cluster_kwargs: Optional[dict] = None):
+    def __getattr__(self, attr: str) -> Any:
+        ...
+
+
+class AsyncClusterProcessProxy:
+    """Awaitable counterpart of a `ClusterProcessProxy`, for use on an asyncio event loop.
+
+    Attribute reads and method calls return awaitables, resolved once the cluster process
+    replies, so that waiting on the cluster never blocks the event loop. Commands go through
+    the wrapped proxy, and thus share its pipes with any synchronous caller.
+    """
+
+    def __init__(self, proxy: ClusterProcessProxy):
+        self.proxy = proxy
+
+    async def _wait(self, future: Future):
+        timeout = self.proxy.command_timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.proxy._forget(future)
+            raise CommandTimeoutError(
+                f"The cluster process did not answer within {timeout}s"
+            ) from None
+
+    async def _submit_cmd(self, cmd):
+        result = await self._wait(self.proxy._submit_cmd_nowait(cmd))
+        return self.proxy._unpack_result(result)
+
+    async def _get_cluster_attribute(self, attr):
+        state = self.proxy.cached_state
+        if attr in state:
+            return state[attr]
+        cmd = self.proxy._attribute_cmd(attr)
+        result = await self._wait(self.proxy._submit_cmd_nowait(cmd))
+        return self.proxy._unpack_attribute(attr, result)
+
+    async def batch(self, cmds: List[dict], return_exceptions: bool = False) -> List[Any]:
+        """Evaluate many attribute reads and method calls in a single round-trip."""
+        results, pending = self.proxy._prepare_batch(cmds)
+        replies = []
+        if pending:
+            replies = await self._wait(self.proxy._submit_cmd_nowait({"batch": pending}))
+        return self.proxy._merge_batch(results, replies, return_exceptions)
+
+    async def cluster_metrics(self) -> List[Family]:
+        """Return the metrics recorded by the cluster process."""
+        return await self._submit_cmd({"metrics": True})
+
+    def _get_cluster_method(self, method):
+        async def callable_method(*args, **kwargs):
+            cmd = {"method": method, "args": args, "kwargs": kwargs}
+            return await self._submit_cmd(cmd)
+
+        callable_method.__name__ = method
+
+        return callable_method
+
+    def __getattr__(self, attr):
+        if attr in self.proxy.CLUSTER_ATTRIBUTES:
+            return self._get_cluster_attribute(attr)
+        elif attr in self.proxy.CLUSTER_METHODS:
+            return self._get_cluster_method(attr)
+        else:
+            raise AttributeError
+
+
+def proxied_cluster_class(cluster_cls: Type["Cluster"]) -> Type["Cluster"]:
+    """Extend `cluster_cls` with the attributes and methods proxies expect beyond `Cluster`'s."""
+    # Mypy unsupported feature: dynamic base class creation
+    base_cls: Any = cluster_cls
+
+    class ClusterClass(base_cls):
+        @property
+        def num_workers(self):
+            return len(self.workers)
+
+        def _adaptive_stop(self):
+            try:
+                self._adaptive.stop()
+            except AttributeError:
+                pass
+
+        def _adaptive_stop_and_scale(self, n):
+            """Scale to `n` workers, out of adaptive mode, in a single command."""
+            self._adaptive_stop()
+            return self.scale(n)
+
+    return ClusterClass
+
+
+class ClusterProcess(Process):
+    """Run a dask Cluster object in a child process, and expose core methods and attributes.
+
+    Params:
+        cluster_cls: the `Cluster` class to instantiate in the child process
+        cluster_kwargs: keyword arguments passed to `cluster_cls`; with `asynchronous=True`,
+            the cluster runs on the event loop that processes commands
+        concurrency: size of the worker pool running blocking commands, or 0 to run all
+            commands on the event loop
+        blocking_methods: methods of an asynchronous cluster to run in the worker pool, rather
+            than on the event loop
+        state_interval: interval (in seconds) between refreshes of the state snapshot, while
+            a proxy subscribed or reads the shared snapshot
+        max_staleness: maximum age (in seconds) of the snapshot served by the proxy
+        shared_state_size: capacity (in bytes) of the shared memory segment the snapshot is
+            published to, or 0 to disable it
+        codec: serialization of the messages over the pipes, `"pickle"` or `"msgpack"` (or a
+            `Codec` instance)
+        command_timeout: seconds the proxy waits for the result of a command, if set
+        mp_context: multiprocessing start method (`"fork"`, `"spawn"` or `"forkserver"`) or
+            context the process is started with, the default one if `None`
+    """
+
+    def __init__(
+        self,
+        cluster_cls: Type["Cluster"],
+        cluster_kwargs: Optional[dict] = None,
+        concurrency: int = 8,
+        blocking_methods: Sequence[str] = (),
+        state_interval: float = 0.25,
+        max_staleness: float = 1.0,
+        shared_state_size: int = DEFAULT_SIZE,
+        codec: Union[str, Codec] = "pickle",
+        command_timeout: Optional[float] = None,
+        mp_context: Union[None, str, BaseContext] = None,
+    ):
+        self._process_cls = _process_class(mp_context)
         self.cluster_cls = cluster_cls
         self.cluster_kwargs = cluster_kwargs or {}
-        # must initialize the pipes before calling `run()`
+        self.concurrency = concurrency
+        self.blocking_methods = list(blocking_methods)
+        self.state_interval = state_interval
+        self.max_staleness = max_staleness
+        self.codec = get_codec(codec)
+        self.command_timeout = command_timeout
+        self._proxy: Optional[ClusterProcessProxy] = None
+        # must initialize the pipes (and shared memory) before calling `run()`
         self.__cmd_pipe = Pipe()
         self.__result_pipe = Pipe()
+        self._shared_state: Optional[SharedState] = None
+        if shared_state_size and HAS_SHARED_MEMORY:
+            self._shared_state = SharedState(size=shared_state_size)
         super().__init__()
 
+    @staticmethod
+    def _Popen(process_obj: BaseProcess):
+        """Start the process with the start method of its `mp_context`."""
+        process_cls: Type[Process] = getattr(process_obj, "_process_cls", Process)
+        return process_cls._Popen(process_obj)
+
     @property
     def _cmd_pipe(self) -> Tuple[Connection, Connection]:
         """Pipe to receivecontrol commands from."""
@@ -97,42 +644,216 @@ class ClusterProcess(Process):
         return self._result_pipe[0]
 
     @property
-    def cluster_class(self) -> Type[Cluster]:
-        # Mypy unsupported feature: dynamic base class creation
-        cluster_cls: Any = self.cluster_cls
-
-        class ClusterClass(cluster_cls):
-            @property
-            def num_workers(self):
-                return len(self.workers)
-
-            def _adaptive_stop(self):
-                try:
-                    self._adaptive.stop()
-                except AttributeError:
-                    pass
+    def cluster_class(self) -> Type["Cluster"]:
+        return proxied_cluster_class(self.cluster_cls)
 
-        return ClusterClass
+    def start(self) -> None:
+        super().start()
+        # close the process ends, for the proxy to receive EOF should the process exit
+        self.cmd_conn.close()
+        self.result_conn.close()
 
     def run(self):
         if not self.cmd_conn or not self.result_conn:
             raise ValueError("Pipe are not ready!")
+        # close the proxy ends inherited from the parent, to receive EOF once it closes them
+        self._cmd_pipe[0].close()
+        self._result_pipe[1].close()
+        # exit when the parent says so (e.g. not on a Ctrl-C sent to the whole process group)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        self._send_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self._state_data = b""
+        self._state_version = 0
+        self._subscribed = False
+        self._results_lock = threading.Lock()
+        self._results: Dict[str, Tuple[int, bytes]] = {}  # versioned attribute encodings
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        """Run the cluster, and process commands as they are received, until the pipe closes."""
+        loop = asyncio.get_event_loop()
+        self._closed = loop.create_future()
+        self._executor = None
+        if self.concurrency:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="cluster-cmd"
+            )
         cluster = self.cluster_class(**self.cluster_kwargs)
+        if self.asynchronous:
+            await cluster  # start on this loop
+        publisher = asyncio.ensure_future(self._publish_state(cluster))
+        loop.add_reader(self.cmd_conn.fileno(), self._receive_cmds, cluster)
+        try:
+            await self._closed
+        finally:
+            loop.remove_reader(self.cmd_conn.fileno())
+            publisher.cancel()
+            await self._close_cluster(cluster)
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+
+    def _receive_cmds(self, cluster):
+        """Read the commands available on the pipe, and start processing them."""
+        try:
+            while self.cmd_conn.poll():
+                cmd = self.codec.recv(self.cmd_conn)
+                asyncio.ensure_future(self._process_cmd(cmd, cluster))
+        except (EOFError, OSError):
+            if not self._closed.done():
+                self._closed.set_result(None)
+
+    async def _close_cluster(self, cluster):
+        close = getattr(cluster, "close", None)
+        if close is None:
+            return
+        try:
+            if self.asynchronous:
+                await close()
+            else:
+                await asyncio.get_event_loop().run_in_executor(None, close)
+        except Exception:
+            logger.exception("Failed to close the cluster")
+
+    @property
+    def asynchronous(self) -> bool:
+        """Whether the cluster runs on the event loop that processes commands."""
+        return bool(self.cluster_kwargs.get("asynchronous"))
+
+    def _on_loop(self, cmd) -> bool:
+        """Whether to run a command on the event loop, rather than in the worker pool."""
+        if self._executor is None or cmd.get("ping"):
+            return True
+        return self.asynchronous and cmd.get("method") not in self.blocking_methods
+
+    async def _process_cmd(self, cmd, cluster):
+        loop = asyncio.get_event_loop()
+        labels = _command_labels(cmd)
+        with CLUSTER_COMMANDS_IN_FLIGHT.track_inprogress(), CLUSTER_COMMAND_SECONDS.time(**labels):
+            try:
+                if self._on_loop(cmd):
+                    result = self._run_cmd(cmd, cluster)
+                else:
+                    CLUSTER_COMMANDS_QUEUED.inc()
+                    result = await loop.run_in_executor(
+                        self._executor, self._run_queued_cmd, cmd, cluster
+                    )
+                result = await _await_result(result)
+            except Exception as e:
+                result = e
+            if "method" in cmd or any("method" in item for item in cmd.get("batch", ())):
+                # push the effect of the command ahead of its result
+                await self._run_refresh(cluster)
+            await loop.run_in_executor(None, self._send_result, cmd.get("id"), result)
+
+    def _run_queued_cmd(self, cmd, cluster):
+        CLUSTER_COMMANDS_QUEUED.dec()
+        return self._run_cmd(cmd, cluster)
+
+    def _run_cmd(self, cmd, cluster):
+        if cmd.get("subscribe"):
+            self._subscribed = True
+            return self._refresh_state(cluster)
+        elif cmd.get("metrics"):
+            return REGISTRY.collect(prefix="dask_remote_cluster_")
+        elif cmd.get("ping"):
+            return True
+        elif "version" in cmd:
+            return self._get_versioned(cmd, cluster)
+        return self._call_cmd(cmd, cluster)
+
+    async def _publish_state(self, cluster):
         while True:
-            cmd = self.cmd_conn.recv()
-            self._process_cmd(cmd, cluster)
+            await asyncio.sleep(self.state_interval)
+            if not self._has_readers():
+                continue  # the state is refreshed again after each method call regardless
+            try:
+                await self._run_refresh(cluster, heartbeat=True)
+            except Exception:
+                logger.exception("Failed to refresh the cluster state")
+
+    def _has_readers(self) -> bool:
+        """Whether a proxy subscribed, or read the shared snapshot within `max_staleness`."""
+        if self._subscribed:
+            return True
+        if self._shared_state is None:
+            return False
+        return time.time() - self._shared_state.last_read < self.max_staleness
+
+    async def _run_refresh(self, cluster, heartbeat: bool = False) -> dict:
+        """Refresh the state on the loop of asynchronous clusters, or in a thread otherwise."""
+        if self.asynchronous:
+            return self._refresh_state(cluster, heartbeat)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self._refresh_state, cluster, heartbeat)
+
+    def _refresh_state(self, cluster, heartbeat: bool = False) -> dict:
+        """Snapshot the cluster attributes, and push the snapshot to subscribers if it changed.
+
+        A `heartbeat` refresh confirms an unchanged snapshot is still current.
+        Return the latest version of the snapshot.
+        """
+        with self._state_lock, CLUSTER_STATE_REFRESH_SECONDS.time():
+            state = self._snapshot(cluster)
+            try:
+                data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                logger.exception("Cluster state can not be pickled")
+                return {"version": self._state_version, "state": self._state}
+            changed = data != self._state_data
+            if changed:
+                self._state, self._state_data = state, data
+                self._state_version += 1
+            update = {"version": self._state_version, "state": self._state}
+            # push while holding the lock, so that no result overtakes the update it follows
+            if changed:
+                self._push_state(update, data)
+            elif heartbeat:
+                self._push_state({"version": self._state_version})
+        return update
 
-    def _process_cmd(self, cmd, cluster):
-        try:
-            result = self._call_cmd(cmd, cluster)
-        except Exception as e:
-            result = e
+    @staticmethod
+    def _snapshot(cluster) -> Dict[str, Any]:
+        state = {}
+        for attr in ClusterProcessProxy.CLUSTER_ATTRIBUTES:
+            try:
+                state[attr] = getattr(cluster, attr)
+            except Exception:
+                continue
+        return state
+
+    def _push_state(self, update: dict, data: Optional[bytes] = None):
+        """Publish a new snapshot (pickled as `data`), or confirm the current one."""
+        if self._shared_state is not None and data is not None:
+            self._shared_state.write(update["version"], data)
+        elif self._shared_state is not None:
+            self._shared_state.touch()
+        if self._subscribed:
+            self._send_result(None, update)
+
+    def _get_versioned(self, cmd, cluster):
+        """Return the encoded attribute, unless unchanged since the version the caller has."""
+        attr = cmd["attribute"]
+        value = getattr(cluster, attr)
         try:
-            self.result_conn.send(result)
+            data = self.codec.encode(value)
         except Exception as e:
-            send_error = ResultPicklingError(f"Return value {result} can not be sent back")
-            send_error.__cause__ = e
-            self.result_conn.send(send_error)
+            return _picklable_result(value, e)
+        with self._results_lock:
+            version, previous = self._results.get(attr, (0, None))
+            if data != previous:
+                version += 1
+                self._results[attr] = (version, data)
+        return VersionedResult(version, None if version == cmd["version"] else data)
+
+    def _send_result(self, msg_id, result):
+        with self._send_lock:
+            try:
+                self.codec.send(self.result_conn, (msg_id, result))
+            except Exception as e:
+                CLUSTER_PICKLING_ERRORS.inc()
+                self.codec.send(self.result_conn, (msg_id, _picklable_result(result, e)))
 
     @staticmethod
     def _call_cmd(cmd, obj):
@@ -144,8 +865,133 @@ class ClusterProcess(Process):
         elif "attribute" in cmd:
             attribute = cmd["attribute"]
             return getattr(obj, attribute)
+        elif "batch" in cmd:
+            return BatchResults(
+                ClusterProcess._call_batch_item(item, obj) for item in cmd["batch"]
+            )
+
+    @staticmethod
+    def _call_batch_item(cmd, obj):
+        try:
+            return ClusterProcess._call_cmd(cmd, obj)
+        except Exception as e:
+            return e
 
     @property
     def proxy(self) -> ClusterProcessProxy:
         """Return a proxy cluster object for controlling the cluster inside the process."""
-        return ClusterProcessProxy(cmd_conn=self._cmd_pipe[0], result_conn=self._result_pipe[1])
+        if self._proxy is None:
+            self._proxy = ClusterProcessProxy(
+                cmd_conn=self._cmd_pipe[0],
+                result_conn=self._result_pipe[1],
+                max_staleness=self.max_staleness,
+                shared_state=self._shared_state,
+                codec=self.codec,
+                command_timeout=self.command_timeout,
+            )
+        return self._proxy
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Close the cluster, and wait for the process to exit, terminating it after `timeout`.
+
+        A process that did not exit `timeout` seconds after being terminated is killed.
+
+        The process exits once the proxy ends of its pipes are closed, here as well as in any
+        other process they were passed to (e.g. an `ApiProcess`).
+        """
+        self._cmd_pipe[0].close()
+        self._result_pipe[1].close()
+        self.join(timeout)
+        if self.exitcode is None:
+            self.terminate()
+            self.join(timeout)
+        if self.exitcode is None:
+            self.kill()  # e.g. stopped, ignoring SIGTERM until continued
+            self.join()
+
+    def close(self) -> None:
+        super().close()
+        if self._shared_state is not None:
+            self._shared_state.close()
+            self._shared_state.unlink()
+            self._shared_state = None
+
+
+# Process classes of the multiprocessing start methods
+PROCESS_CLASSES = {
+    "fork": "ForkProcess",
+    "spawn": "SpawnProcess",
+    "forkserver": "ForkServerProcess",
+}
+
+
+def _process_class(mp_context: Union[None, str, BaseContext]) -> Type[Process]:
+    """Return the process class of a start method or context, the default one if `None`."""
+    if mp_context is None:
+        return Process
+    method = mp_context if isinstance(mp_context, str) else mp_context.get_start_method()
+    process_cls = getattr(multiprocessing.context, PROCESS_CLASSES.get(method, ""), None)
+    if process_cls is None:  # e.g. no "fork" on Windows
+        raise ValueError(f"Unsupported start method {method!r}")
+    return process_cls
+
+
+def _command_labels(cmd: dict) -> Dict[str, str]:
+    """Label commands by their method or attribute name, or their type."""
+    for kind in ["method", "attribute"]:
+        if kind in cmd:
+            return {"command": cmd[kind]}
+    commands = ["batch", "subscribe", "metrics", "ping"]
+    return {"command": next((k for k in commands if k in cmd), "other")}
+
+
+def _observe_command(start: float, labels: Dict[str, str], future: Future) -> None:
+    PROXY_COMMANDS_IN_FLIGHT.dec()
+    PROXY_COMMAND_SECONDS.observe(time.perf_counter() - start, **labels)
+
+
+def _resolve(future: Future, result=None, error: Optional[BaseException] = None) -> None:
+    """Set the result of a command, unless its future was cancelled (e.g. timed out)."""
+    if not future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, Exception) and not isinstance(result, ResultPicklingError)
+
+
+async def _await_result(result):
+    """Await the awaitable results of asynchronous clusters, including those in batches."""
+    if inspect.isawaitable(result):
+        return await result
+    if isinstance(result, BatchResults):
+        return BatchResults([await _await_batch_item(r) for r in result])
+    return result
+
+
+async def _await_batch_item(result):
+    try:
+        return await result if inspect.isawaitable(result) else result
+    except Exception as e:
+        return e
+
+
+def _picklable_result(result, error: Exception):
+    """Replace the result that could not be sent, or only its unpicklable batch results."""
+    if isinstance(result, BatchResults):
+        return BatchResults(_picklable_result(r, error) if _unpicklable(r) else r for r in result)
+    send_error = ResultPicklingError(f"Return value {result} can not be sent back")
+    send_error.__cause__ = error
+    return send_error
+
+
+def _unpicklable(result) -> bool:
+    try:
+        pickle.dumps(result)
+    except Exception:
+        return True
+    return False
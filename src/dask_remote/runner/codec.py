@@ -0,0 +1,124 @@
+"""Serialize the messages exchanged over the pipes of a `ClusterProcess`."""
+
+import pickle
+from multiprocessing.connection import Connection
+from typing import Any, ClassVar, Dict, List, Type, Union
+
+
+class Frames:
+    """Announce a message sent as a payload followed by `n` out-of-band buffers."""
+
+    def __init__(self, n: int):
+        self.n = n
+
+
+class Codec:
+    """Encode messages to bytes, and send/receive them over a pipe connection.
+
+    Messages without out-of-band data are sent as a single frame, as `Connection.send` would.
+    """
+
+    name: ClassVar[str]
+
+    def encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data) -> Any:
+        raise NotImplementedError
+
+    def send(self, conn: Connection, obj: Any) -> None:
+        conn.send_bytes(self.encode(obj))
+
+    def recv(self, conn: Connection) -> Any:
+        return self.decode(conn.recv_bytes())
+
+
+class PickleCodec(Codec):
+    """Pickle messages with the given protocol (the highest available by default).
+
+    With protocol 5 and above, buffers exposing `PickleBuffer` (e.g. numpy arrays) are sent
+    out-of-band, as separate frames, rather than copied into the pickle.
+    Plain `Connection.send`/`Connection.recv` remain compatible with messages that have none.
+    """
+
+    name = "pickle"
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL):
+        self.protocol = protocol
+
+    def encode(self, obj: Any) -> bytes:
+        return pickle.dumps(obj, protocol=self.protocol)
+
+    def decode(self, data) -> Any:
+        return pickle.loads(data)
+
+    def send(self, conn: Connection, obj: Any) -> None:
+        if self.protocol < 5:
+            return super().send(conn, obj)
+        buffers: List[pickle.PickleBuffer] = []
+        data = pickle.dumps(obj, protocol=self.protocol, buffer_callback=buffers.append)
+        if buffers:
+            conn.send_bytes(pickle.dumps(Frames(len(buffers)), protocol=self.protocol))
+        conn.send_bytes(data)
+        for buffer in buffers:
+            conn.send_bytes(buffer.raw())
+
+    def recv(self, conn: Connection) -> Any:
+        obj = pickle.loads(conn.recv_bytes())
+        if not isinstance(obj, Frames):
+            return obj
+        data = conn.recv_bytes()
+        buffers = [conn.recv_bytes() for _ in range(obj.n)]
+        return pickle.loads(data, buffers=buffers)
+
+
+class MsgpackCodec(Codec):
+    """Pack plain data (dicts, lists, strings, numbers) with msgpack, and pickle the rest.
+
+    Tuples are received as lists.
+    """
+
+    name = "msgpack"
+    PICKLE_EXT = 1
+
+    def __init__(self):
+        try:
+            import msgpack  # noqa: F401 (fail early when not installed)
+        except ImportError:
+            raise ImportError(
+                'The "msgpack" codec requires msgpack, see the `msgpack` extra of dask-remote'
+            ) from None
+
+    def encode(self, obj: Any) -> bytes:
+        import msgpack
+
+        return msgpack.packb(obj, default=self._pickle_ext, use_bin_type=True)
+
+    def decode(self, data) -> Any:
+        import msgpack
+
+        return msgpack.unpackb(data, ext_hook=self._unpickle_ext, raw=False, strict_map_key=False)
+
+    def _pickle_ext(self, obj: Any):
+        import msgpack
+
+        data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return msgpack.ExtType(self.PICKLE_EXT, data)
+
+    def _unpickle_ext(self, code: int, data: bytes) -> Any:
+        if code != self.PICKLE_EXT:
+            raise ValueError(f"Unknown msgpack extension type {code}")
+        return pickle.loads(data)
+
+
+CODECS: Dict[str, Type[Codec]] = {codec.name: codec for codec in (PickleCodec, MsgpackCodec)}
+
+
+def get_codec(codec: Union[str, Codec]) -> Codec:
+    """Return a codec instance, given either one or its name (`"pickle"` or `"msgpack"`)."""
+    if isinstance(codec, Codec):
+        return codec
+    try:
+        return CODECS[codec]()
+    except KeyError:
+        raise ValueError(f"Unknown codec {codec!r}, expected one of {sorted(CODECS)}") from None
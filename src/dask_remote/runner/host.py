@@ -0,0 +1,216 @@
+"""Serve many clusters, each in its own `ClusterProcess`, behind a single API server."""
+
+import asyncio
+import re
+from multiprocessing import Process
+from typing import Dict, List, Optional, Type
+
+from distributed.deploy import Cluster
+from fastapi import FastAPI
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import RedirectResponse
+
+from .api import DaskAPI, cluster_api, collect_cluster_metrics, metrics_response
+from .cluster_process import ClusterProcess, ClusterProcessProxy
+from .metrics import REGISTRY
+
+
+# Cluster ids are used as a path segment of their routes
+CLUSTER_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class ClusterList(BaseModel):
+    clusters: List[str]
+
+
+class MultiClusterAPI(FastAPI):
+    """FastAPI app serving the `cluster_api` of each cluster under `/clusters/{cluster_id}`."""
+
+    dask_cluster_apps: Dict[str, DaskAPI]
+
+    def add_cluster(
+        self, cluster_id: str, cluster_proxy: ClusterProcessProxy, **cluster_api_kwargs
+    ) -> DaskAPI:
+        """Serve the API of the cluster behind `cluster_proxy`, see `cluster_api`."""
+        _check_cluster_id(cluster_id)
+        if cluster_id in self.dask_cluster_apps:
+            raise ValueError(f"Cluster {cluster_id!r} is already served")
+        app = cluster_api(cluster_proxy, cluster_id=cluster_id, **cluster_api_kwargs)
+        self.dask_cluster_apps[cluster_id] = app
+        self.mount(_cluster_path(cluster_id), app)
+        return app
+
+    def remove_cluster(self, cluster_id: str) -> DaskAPI:
+        """Stop serving the API of a cluster, returning it."""
+        app = self.dask_cluster_apps.pop(cluster_id)
+        path = _cluster_path(cluster_id)
+        self.router.routes = [r for r in self.router.routes if getattr(r, "path", None) != path]
+        return app
+
+
+def multi_cluster_api(
+    cluster_proxies: Optional[Dict[str, ClusterProcessProxy]] = None,
+    fastapi_kwargs: Optional[dict] = None,
+    cluster_api_kwargs: Optional[Dict[str, dict]] = None,
+) -> MultiClusterAPI:
+    """Create a FastAPI app that exposes the given ClusterProcessProxy objects by cluster id.
+
+    Params:
+        cluster_proxies: a `ClusterProcessProxy` for each cluster id
+        fastapi_kwargs: additional keyword arguments passed to `fastapi.FastAPI`
+        cluster_api_kwargs: keyword arguments passed to `cluster_api` for each cluster id,
+            e.g. its `scheduler_address` and `dashboard_link`
+
+    The routes of each cluster are those of `cluster_api`, under `/clusters/{cluster_id}`;
+    `GET /clusters` lists the cluster ids, and `GET /metrics` exposes the metrics of all the
+    clusters, labelled with their id. Clusters can be added and removed while serving, see
+    `MultiClusterAPI.add_cluster` and `MultiClusterAPI.remove_cluster`.
+    """
+    fastapi_kwargs = fastapi_kwargs or {}
+    cluster_api_kwargs = cluster_api_kwargs or {}
+    app = MultiClusterAPI(**fastapi_kwargs)
+    app.dask_cluster_apps = {}
+
+    @app.get("/", include_in_schema=False)
+    async def redirect_root(request: Request):
+        """Redirect to API docs."""
+        root_path = request.scope.get("root_path") or app.root_path
+        return RedirectResponse(url=f"{root_path}/docs")
+
+    @app.get("/clusters", response_model=ClusterList)
+    async def get_clusters():
+        """Return the ids of the clusters served."""
+        return {"clusters": sorted(app.dask_cluster_apps)}
+
+    @app.get("/metrics", summary="Metrics in the Prometheus text format")
+    async def get_metrics():
+        """Return the metrics of the API and of all the cluster processes."""
+        apps = list(app.dask_cluster_apps.values())
+        cluster_families = await asyncio.gather(*[collect_cluster_metrics(a) for a in apps])
+        return metrics_response(REGISTRY.collect() + sum(cluster_families, []))
+
+    for cluster_id, cluster_proxy in (cluster_proxies or {}).items():
+        app.add_cluster(cluster_id, cluster_proxy, **cluster_api_kwargs.get(cluster_id, {}))
+    return app
+
+
+class MultiClusterApiProcess(Process):
+    def __init__(
+        self,
+        cluster_proxies: Dict[str, ClusterProcessProxy],
+        fastapi_kwargs: Optional[dict] = None,
+        uvicorn_kwargs: Optional[dict] = None,
+        cluster_api_kwargs: Optional[Dict[str, dict]] = None,
+    ) -> None:
+        self.cluster_proxies = cluster_proxies
+        self.fastapi_kwargs = fastapi_kwargs
+        self.uvicorn_kwargs = uvicorn_kwargs
+        self.cluster_api_kwargs = cluster_api_kwargs
+        super().__init__()
+
+    @property
+    def app(self) -> MultiClusterAPI:
+        return multi_cluster_api(
+            self.cluster_proxies,
+            fastapi_kwargs=self.fastapi_kwargs,
+            cluster_api_kwargs=self.cluster_api_kwargs,
+        )
+
+    def run(self) -> None:
+        import uvicorn
+
+        kwargs = self.uvicorn_kwargs or {}
+        uvicorn.run(self.app, **kwargs)
+
+
+class ClusterHost:
+    """Run many clusters, each in its own `ClusterProcess`, behind a single API server.
+
+    Clusters are added before starting the host; the API server then runs in a single
+    `MultiClusterApiProcess`, rather than one `ApiProcess` per cluster.
+
+    Params:
+        fastapi_kwargs: additional keyword arguments passed to `fastapi.FastAPI`
+        uvicorn_kwargs: keyword arguments passed to `uvicorn.run`
+        shutdown_timeout: seconds given to a cluster process to exit, before it is terminated
+    """
+
+    def __init__(
+        self,
+        fastapi_kwargs: Optional[dict] = None,
+        uvicorn_kwargs: Optional[dict] = None,
+        shutdown_timeout: float = 5.0,
+    ) -> None:
+        self.fastapi_kwargs = fastapi_kwargs
+        self.uvicorn_kwargs = uvicorn_kwargs
+        self.shutdown_timeout = shutdown_timeout
+        self.cluster_processes: Dict[str, ClusterProcess] = {}
+        self.cluster_api_kwargs: Dict[str, dict] = {}
+        self.api_process: Optional[MultiClusterApiProcess] = None
+
+    def add_cluster(
+        self,
+        cluster_id: str,
+        cluster_cls: Type[Cluster],
+        cluster_kwargs: Optional[dict] = None,
+        scheduler_address: Optional[str] = None,
+        dashboard_link: Optional[str] = None,
+        **process_kwargs,
+    ) -> ClusterProcess:
+        """Add a cluster to run, with additional keyword arguments for its `ClusterProcess`."""
+        _check_cluster_id(cluster_id)
+        if self.api_process is not None:
+            raise RuntimeError("Clusters must be added before starting the host")
+        if cluster_id in self.cluster_processes:
+            raise ValueError(f"Cluster {cluster_id!r} is already hosted")
+        cluster_process = ClusterProcess(cluster_cls, cluster_kwargs, **process_kwargs)
+        self.cluster_processes[cluster_id] = cluster_process
+        self.cluster_api_kwargs[cluster_id] = dict(
+            scheduler_address=scheduler_address, dashboard_link=dashboard_link
+        )
+        return cluster_process
+
+    def start(self) -> None:
+        """Start the cluster processes, then the API server."""
+        for cluster_process in self.cluster_processes.values():
+            cluster_process.start()
+        self.api_process = MultiClusterApiProcess(
+            {cluster_id: p.proxy for cluster_id, p in self.cluster_processes.items()},
+            fastapi_kwargs=self.fastapi_kwargs,
+            uvicorn_kwargs=self.uvicorn_kwargs,
+            cluster_api_kwargs=self.cluster_api_kwargs,
+        )
+        self.api_process.start()
+
+    def join(self) -> None:
+        """Wait for the API server and cluster processes to exit."""
+        if self.api_process is not None:
+            self.api_process.join()
+        for cluster_process in self.cluster_processes.values():
+            cluster_process.join()
+
+    def terminate(self) -> None:
+        """Stop the API server, then shut the clusters down, see `ClusterProcess.shutdown`."""
+        if self.api_process is not None:
+            self.api_process.terminate()
+            self.api_process.join()  # closing its ends of the cluster pipes
+        # newest first: forked processes hold the pipes of those started before them
+        for cluster_process in reversed(list(self.cluster_processes.values())):
+            cluster_process.shutdown(self.shutdown_timeout)
+
+    def close(self) -> None:
+        """Release the resources of the processes, once joined."""
+        if self.api_process is not None:
+            self.api_process.close()
+        for cluster_process in self.cluster_processes.values():
+            cluster_process.close()
+
+
+def _check_cluster_id(cluster_id: str) -> None:
+    if not CLUSTER_ID.match(cluster_id):
+        raise ValueError(f"Invalid cluster id {cluster_id!r}, expected {CLUSTER_ID.pattern}")
+
+
+def _cluster_path(cluster_id: str) -> str:
+    return f"/clusters/{cluster_id}"
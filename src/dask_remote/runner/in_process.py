@@ -0,0 +1,53 @@
+"""Proxy a cluster running on the same event loop as the API, without any IPC."""
+
+from typing import Any, List
+
+from .cluster_process import ClusterProcess, ClusterProcessProxy, _await_result, _is_error
+from .metrics import Family
+
+
+class InProcessClusterProxy:
+    """Awaitable proxy of an asynchronous cluster object running on the caller's event loop.
+
+    Offers the interface of an `AsyncClusterProcessProxy`, for `cluster_api` to serve a
+    cluster created in the same process (see `proxied_cluster_class`): attribute reads and
+    method calls go to the cluster object directly, without pickling nor pipes, at the cost
+    of the isolation a `ClusterProcess` provides.
+    """
+
+    CLUSTER_ATTRIBUTES = ClusterProcessProxy.CLUSTER_ATTRIBUTES
+    CLUSTER_METHODS = ClusterProcessProxy.CLUSTER_METHODS
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+
+    async def _get_cluster_attribute(self, attr):
+        return await _await_result(getattr(self.cluster, attr))
+
+    async def batch(self, cmds: List[dict], return_exceptions: bool = False) -> List[Any]:
+        """Evaluate many attribute reads and method calls, in order."""
+        results = await _await_result(ClusterProcess._call_cmd({"batch": cmds}, self.cluster))
+        for result in results:
+            if _is_error(result) and not return_exceptions:
+                raise result
+        return list(results)
+
+    async def cluster_metrics(self) -> List[Family]:
+        """Return no metrics: those of the cluster commands are recorded by the API process."""
+        return []
+
+    def _get_cluster_method(self, method):
+        async def callable_method(*args, **kwargs):
+            return await _await_result(getattr(self.cluster, method)(*args, **kwargs))
+
+        callable_method.__name__ = method
+
+        return callable_method
+
+    def __getattr__(self, attr):
+        if attr in self.CLUSTER_ATTRIBUTES:
+            return self._get_cluster_attribute(attr)
+        elif attr in self.CLUSTER_METHODS:
+            return self._get_cluster_method(attr)
+        else:
+            raise AttributeError
@@ -0,0 +1,239 @@
+"""Minimal metrics registry, rendered in the Prometheus text exposition format.
+
+Metrics are recorded in the process they are observed in (e.g. the cluster process, the API
+process); `collect()` returns plain data, so that metrics can be sent over to another process
+and rendered alongside its own.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Default histogram buckets (in seconds), from 1ms to 1'
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0)
+
+# Metric family: name, type, help, and samples of (name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def collect(self) -> Family:
+        return self.name, self.type, self.documentation, self.samples()
+
+    def labels(self, **labels: object) -> "LabelledMetric":
+        """Return the metric with these labels, e.g. `counter.labels(command="scale").inc()`."""
+        return LabelledMetric(self, labels)
+
+
+class LabelledMetric:
+    """Metric whose methods are called with the given labels."""
+
+    def __init__(self, metric: Metric, labels: Dict[str, object]):
+        self.metric = metric
+        self._labels = labels
+
+    def __getattr__(self, name: str) -> Any:
+        return partial(getattr(self.metric, name), **self._labels)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(f"{self.name}_total", dict(key), value) for key, value in values]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, dict(key), value) for key, value in values]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: count of observations in each bucket, then sum of all observations
+        self._values: Dict[LabelKey, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), None)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[len(self.buckets) if index is None else index] += 1
+            self._values[key] = counts, total + value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples: List[Sample] = []
+        for key, counts, total in values:
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                samples.append((f"{self.name}_bucket", dict(labels, le=le), cumulative))
+            samples.append((f"{self.name}_count", labels, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+        return samples
+
+
+class Registry:
+    """Metrics of a process, created on first use and looked up by name."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._get(Counter, name, documentation)  # type: ignore
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._get(Gauge, name, documentation)  # type: ignore
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get(Histogram, name, documentation, buckets=buckets)  # type: ignore
+
+    def collect(self, prefix: Optional[str] = None) -> List[Family]:
+        """Return the metric families (with the given name `prefix`), as plain data."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [m.collect() for m in metrics if prefix is None or m.name.startswith(prefix)]
+
+
+# Metrics of the current process
+REGISTRY = Registry()
+
+
+def add_labels(families: List[Family], **labels: str) -> List[Family]:
+    """Add `labels` to all the samples of the metric families."""
+    if not labels:
+        return families
+    return [
+        (name, type_, documentation, [(n, dict(l, **labels), v) for n, l, v in samples])
+        for name, type_, documentation, samples in families
+    ]
+
+
+def merge(families: List[Family]) -> List[Family]:
+    """Merge the samples of families with the same name (e.g. collected from many processes)."""
+    merged: Dict[str, Family] = {}
+    for name, type_, documentation, samples in families:
+        if name in merged:
+            merged[name][3].extend(samples)
+        else:
+            merged[name] = (name, type_, documentation, list(samples))
+    return list(merged.values())
+
+
+def render(families: List[Family]) -> str:
+    """Format metric families in the Prometheus text exposition format."""
+    lines = []
+    for name, type_, documentation, samples in families:
+        lines.append(f"# HELP {name} {_escape(documentation)}")
+        lines.append(f"# TYPE {name} {type_}")
+        for sample_name, labels, value in samples:
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value, quote=True)}"' for name, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(text: str, quote: bool = False) -> str:
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
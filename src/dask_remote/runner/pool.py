@@ -0,0 +1,133 @@
+"""Keep started `ClusterProcess` instances ready, to hand out new clusters without delay."""
+
+import multiprocessing
+from collections import deque
+from multiprocessing.context import BaseContext
+from typing import TYPE_CHECKING, Deque, Optional, Sequence, Type, Union
+
+from .cluster_process import ClusterProcess
+from .metrics import REGISTRY
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+# Modules imported once by the forkserver, rather than by each cluster process
+DEFAULT_PRELOAD = ("distributed",)
+
+POOL_IDLE_PROCESSES = REGISTRY.gauge(
+    "dask_remote_pool_idle_processes", "Started cluster processes waiting to be acquired"
+)
+POOL_ACQUIRED = REGISTRY.counter(
+    "dask_remote_pool_acquired", "Cluster processes acquired, by whether one was idle"
+)
+
+
+class ClusterProcessPool:
+    """Pool of `size` started `ClusterProcess` instances of the same cluster.
+
+    Each process is started (importing its modules and creating its cluster) ahead of being
+    acquired, and the pool is topped up as processes are acquired, so that `acquire()` hands
+    out a cluster without waiting for it. Acquired processes belong to the caller, who
+    shuts them down once done; they are never returned to the pool.
+
+    With the `"forkserver"` context, the `preload` modules are imported once by the fork
+    server, and each process forks from it: neither the interpreter startup nor these
+    imports are paid per cluster, nor are the file descriptors of the parent inherited.
+
+    Params:
+        cluster_cls: the `Cluster` class to instantiate in each process
+        cluster_kwargs: keyword arguments passed to `cluster_cls`
+        size: number of idle processes kept started
+        mp_context: multiprocessing start method or context the processes are started with
+        preload: modules imported by the fork server, with the `"forkserver"` context
+        shutdown_timeout: seconds given to an idle process to exit, before it is terminated
+        process_kwargs: additional keyword arguments passed to `ClusterProcess`
+    """
+
+    def __init__(
+        self,
+        cluster_cls: Type["Cluster"],
+        cluster_kwargs: Optional[dict] = None,
+        size: int = 2,
+        mp_context: Union[None, str, BaseContext] = None,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        shutdown_timeout: float = 5.0,
+        **process_kwargs,
+    ):
+        self.cluster_cls = cluster_cls
+        self.cluster_kwargs = cluster_kwargs
+        self.size = size
+        if isinstance(mp_context, str):
+            mp_context = multiprocessing.get_context(mp_context)
+        self.mp_context = mp_context
+        if mp_context is not None and mp_context.get_start_method() == "forkserver":
+            mp_context.set_forkserver_preload(list(preload))
+        self.shutdown_timeout = shutdown_timeout
+        self.process_kwargs = process_kwargs
+        self._idle: Deque[ClusterProcess] = deque()
+        self._closed = False
+
+    def __enter__(self) -> "ClusterProcessPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def idle(self) -> int:
+        """Number of idle processes, ready to be acquired."""
+        return len(self._idle)
+
+    def start(self) -> None:
+        """Start idle processes, up to the pool `size`."""
+        if self._closed:
+            raise RuntimeError("Pool is closed")
+        self._reap()
+        while len(self._idle) < self.size:
+            self._idle.append(self._start_process())
+        POOL_IDLE_PROCESSES.set(len(self._idle))
+
+    def acquire(self) -> ClusterProcess:
+        """Hand out a started cluster process, and start another one in its place."""
+        if self._closed:
+            raise RuntimeError("Pool is closed")
+        self._reap()
+        if self._idle:
+            cluster_process = self._idle.popleft()
+            POOL_ACQUIRED.inc(idle="true")
+        else:
+            cluster_process = self._start_process()
+            POOL_ACQUIRED.inc(idle="false")
+        self.start()
+        return cluster_process
+
+    def close(self) -> None:
+        """Shut down the idle processes."""
+        self._closed = True
+        while self._idle:
+            # newest first: forked processes hold the pipes of those started before them
+            self._stop(self._idle.pop())
+        POOL_IDLE_PROCESSES.set(0)
+
+    def _start_process(self) -> ClusterProcess:
+        cluster_process = ClusterProcess(
+            self.cluster_cls,
+            self.cluster_kwargs,
+            mp_context=self.mp_context,
+            **self.process_kwargs,
+        )
+        cluster_process.start()
+        return cluster_process
+
+    def _reap(self) -> None:
+        """Discard idle processes that exited, e.g. when their cluster failed to start."""
+        for cluster_process in [p for p in self._idle if not p.is_alive()]:
+            self._idle.remove(cluster_process)
+            self._stop(cluster_process)
+
+    def _stop(self, cluster_process: ClusterProcess) -> None:
+        cluster_process.shutdown(self.shutdown_timeout)
+        cluster_process.close()
@@ -0,0 +1,159 @@
+"""Publish a versioned snapshot in shared memory, for local readers to poll without any IPC."""
+
+import os
+import pickle
+import struct
+import sys
+import time
+from typing import Any, Callable, Optional, Tuple
+
+
+HAS_SHARED_MEMORY = sys.version_info >= (3, 8)
+
+if sys.version_info >= (3, 8):
+    from multiprocessing import resource_tracker, shared_memory
+
+
+# Default segment size at 4MiB
+DEFAULT_SIZE = 4 * 1024 * 1024
+
+# Header: sequence number, snapshot version, timestamp of last write, payload size
+HEADER = struct.Struct("QQdQ")
+SEQUENCE = struct.Struct("Q")
+# Stamped by readers after the header: timestamp of the last read
+LAST_READ = struct.Struct("d")
+PAYLOAD = HEADER.size + LAST_READ.size
+
+# Payload size recorded for snapshots that do not fit in the segment
+OVERFLOW = 2 ** 64 - 1
+
+# Attempts at reading a consistent snapshot while it is being written
+READ_RETRIES = 100
+
+
+class SharedState:
+    """Single-writer, multiple-reader snapshot in a `multiprocessing.shared_memory` segment.
+
+    Writes are guarded by a sequence number (a "seqlock"): it is odd while a write is in
+    progress, and readers retry when it changed while they were reading. Readers deserialize
+    the payload in place, and only when its version changed, and stamp the time of their last
+    read for the writer to tell whether the snapshot is still read (see `last_read`).
+
+    Params:
+        name: name of an existing segment to attach to, or `None` to create a new one
+        size: payload capacity (in bytes) of a new segment
+        inherited: whether the segment is attached in a child process of its creator, which
+            shares its resource tracker (as when unpickled by `multiprocessing`)
+    """
+
+    def __init__(
+        self, name: Optional[str] = None, size: int = DEFAULT_SIZE, inherited: bool = False
+    ):
+        if not HAS_SHARED_MEMORY:
+            raise RuntimeError("Shared memory requires Python 3.8+")
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=PAYLOAD + size)
+        else:
+            self._shm = _attach(name, inherited)
+        buf = self._shm.buf
+        if buf is None:
+            raise RuntimeError(f"Shared memory segment {self._shm.name} is closed")
+        self._buf: memoryview = buf
+        if name is None:
+            HEADER.pack_into(self._buf, 0, 0, 0, 0.0, 0)
+            LAST_READ.pack_into(self._buf, HEADER.size, 0.0)
+        self._seq = SEQUENCE.unpack_from(self._buf, 0)[0]
+
+    def __reduce__(self):
+        return (self.__class__, (self.name, DEFAULT_SIZE, True))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._shm.size - PAYLOAD
+
+    @property
+    def last_read(self) -> float:
+        """Timestamp of the last read, by any reader, 0 if never read."""
+        return LAST_READ.unpack_from(self._buf, HEADER.size)[0]
+
+    # Writer side
+
+    def write(self, version: int, data: bytes) -> bool:
+        """Publish serialized snapshot `data`, returning whether it fitted in the segment."""
+        fits = len(data) <= self.capacity
+        size = len(data) if fits else OVERFLOW
+        self._begin_write()
+        if fits:
+            end = PAYLOAD + size
+            self._buf[PAYLOAD:end] = data
+        HEADER.pack_into(self._buf, 0, self._seq, version, time.time(), size)
+        self._end_write()
+        return fits
+
+    def touch(self) -> None:
+        """Confirm the current snapshot is up-to-date."""
+        self._begin_write()
+        _, version, _, size = HEADER.unpack_from(self._buf, 0)
+        HEADER.pack_into(self._buf, 0, self._seq, version, time.time(), size)
+        self._end_write()
+
+    def _begin_write(self):
+        self._seq += 1
+        SEQUENCE.pack_into(self._buf, 0, self._seq)
+
+    def _end_write(self):
+        self._seq += 1
+        SEQUENCE.pack_into(self._buf, 0, self._seq)
+
+    # Reader side
+
+    def read(
+        self, known_version: Optional[int] = None, loads: Callable[[Any], Any] = pickle.loads
+    ) -> Optional[Tuple[int, float, Any]]:
+        """Return the `(version, timestamp, snapshot)` last written.
+
+        The snapshot is `None` when its version is `known_version`.
+        Return `None` when no snapshot is available: none was written yet, it overflowed
+        the segment, or no consistent read could be made.
+        """
+        buf = self._buf
+        LAST_READ.pack_into(buf, HEADER.size, time.time())
+        for _ in range(READ_RETRIES):
+            seq, version, timestamp, size = HEADER.unpack_from(buf, 0)
+            if seq % 2:
+                continue  # write in progress
+            if not timestamp or size == OVERFLOW:
+                return None
+            snapshot, end = None, PAYLOAD + size
+            if version != known_version:
+                try:
+                    snapshot = loads(buf[PAYLOAD:end])
+                except Exception:
+                    if SEQUENCE.unpack_from(buf, 0)[0] == seq:
+                        raise
+                    continue  # torn read
+            if SEQUENCE.unpack_from(buf, 0)[0] == seq:
+                return version, timestamp, snapshot
+        return None
+
+    def close(self) -> None:
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+def _attach(name: str, inherited: bool = False) -> "shared_memory.SharedMemory":
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Python < 3.13 registers attached segments for clean-up on exit (on POSIX only, by their
+    # name with the leading slash `SharedMemory.name` strips); a tracker shared with the
+    # creator would forget its registration instead
+    if os.name == "posix" and not inherited:
+        resource_tracker.unregister("/" + shm.name, "shared_memory")
+    return shm
@@ -0,0 +1,195 @@
+"""Restart a `ClusterProcess` that exited or stopped answering, behind a stable proxy."""
+
+import logging
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import TYPE_CHECKING, Optional, Type
+
+from .cluster_process import ClusterProcess, ClusterProcessProxy
+from .metrics import REGISTRY
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+logger = logging.getLogger(__name__)
+
+SUPERVISOR_RESTARTS = REGISTRY.counter(
+    "dask_remote_supervisor_restarts", "Cluster processes restarted, by reason"
+)
+SUPERVISOR_UP = REGISTRY.gauge(
+    "dask_remote_supervisor_cluster_up", "Whether the supervised cluster process answers"
+)
+
+
+class ClusterSupervisor:
+    """Run a `ClusterProcess`, and start a new one whenever it exits or hangs.
+
+    The process is pinged every `heartbeat_interval` seconds, and restarted once it exited or
+    missed `max_missed_heartbeats` pings in a row, once it answered a first one (creating a
+    cluster may take longer than a few heartbeats). Meanwhile, commands sent through `proxy`
+    fail with a `ClusterUnavailableError` (answered 503 by `cluster_api`) rather than hang.
+    Once the new process started, `proxy` sends its commands there, and the last scaling
+    command (scale target, or adaptive bounds) is sent again.
+
+    The `proxy` stays the same object across restarts, so supervise the cluster in the
+    process serving its API (as the `dask-remote` command does), rather than pass the proxy
+    to another process.
+
+    Params:
+        cluster_cls: the `Cluster` class to instantiate in each process
+        cluster_kwargs: keyword arguments passed to `cluster_cls`
+        heartbeat_interval: seconds between pings of the cluster process
+        heartbeat_timeout: seconds a ping waits for its answer
+        max_missed_heartbeats: unanswered pings in a row after which the process is restarted
+        command_timeout: seconds the proxy waits for the result of a command, if set
+        shutdown_timeout: seconds given to a hung process to exit, before it is terminated
+        process_kwargs: additional keyword arguments passed to `ClusterProcess`
+    """
+
+    def __init__(
+        self,
+        cluster_cls: Type["Cluster"],
+        cluster_kwargs: Optional[dict] = None,
+        heartbeat_interval: float = 1.0,
+        heartbeat_timeout: float = 1.0,
+        max_missed_heartbeats: int = 3,
+        command_timeout: Optional[float] = None,
+        shutdown_timeout: float = 5.0,
+        **process_kwargs,
+    ):
+        self.cluster_cls = cluster_cls
+        self.cluster_kwargs = cluster_kwargs
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_missed_heartbeats = max_missed_heartbeats
+        self.command_timeout = command_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.process_kwargs = process_kwargs
+        self.restarts = 0
+        self._cluster_process: Optional[ClusterProcess] = None
+        self._stopped = threading.Event()
+        self._restart_lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "ClusterSupervisor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def cluster_process(self) -> ClusterProcess:
+        """The current cluster process."""
+        if self._cluster_process is None:
+            raise RuntimeError("Supervisor is not started")
+        return self._cluster_process
+
+    @property
+    def proxy(self) -> ClusterProcessProxy:
+        """Proxy of the cluster, following it across restarts."""
+        return self.cluster_process.proxy
+
+    def start(self) -> None:
+        """Start the cluster process, and monitor it."""
+        if self._cluster_process is not None:
+            raise RuntimeError("Supervisor is already started")
+        self._cluster_process = self._start_process()
+        self._stopped.clear()
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop monitoring, and shut the cluster process down (see `ClusterProcess.shutdown`).
+
+        Params:
+            timeout: seconds given to the cluster process to exit, `shutdown_timeout` if `None`
+        """
+        self._stopped.set()
+        if self._monitor is not None:
+            self._monitor.join()
+            self._monitor = None
+        if self._cluster_process is not None:
+            self._cluster_process.proxy._disconnect("The cluster is shut down")
+            self._cluster_process.shutdown(self.shutdown_timeout if timeout is None else timeout)
+            self._cluster_process.close()
+            self._cluster_process = None
+        SUPERVISOR_UP.set(0)
+
+    def restart(self, reason: str = "manual") -> None:
+        """Replace the cluster process by a new one, applying the last scaling command."""
+        with self._restart_lock:
+            self._restart(reason)
+
+    def _restart(self, reason: str) -> None:
+        old = self.cluster_process
+        proxy = old.proxy
+        SUPERVISOR_UP.set(0)
+        SUPERVISOR_RESTARTS.inc(reason=reason)
+        logger.warning("Restarting the cluster process (%s)", reason)
+        proxy._disconnect(f"The cluster process is restarting ({reason})")
+        old.shutdown(self.shutdown_timeout)
+
+        new = self._start_process()
+        proxy._reconnect(new.proxy)
+        new._proxy = proxy  # keep handing out the same proxy
+        self._cluster_process = new
+        old.close()
+        self.restarts += 1
+
+        if proxy.last_scaling is not None:
+            # without waiting, should the new cluster hang as well
+            scaling = proxy.last_scaling
+            try:
+                future = proxy._submit_cmd_nowait(scaling)
+            except Exception:
+                logger.exception("Failed to apply %s to the new cluster", scaling)
+            else:
+                future.add_done_callback(partial(_log_scaling_error, scaling))
+
+    def _start_process(self) -> ClusterProcess:
+        cluster_process = ClusterProcess(
+            self.cluster_cls,
+            self.cluster_kwargs,
+            command_timeout=self.command_timeout,
+            **self.process_kwargs,
+        )
+        cluster_process.start()
+        return cluster_process
+
+    def _watch(self) -> None:
+        watched, answered, missed = None, False, 0
+        while not self._stopped.wait(self.heartbeat_interval):
+            cluster_process = self.cluster_process
+            if cluster_process is not watched:
+                watched, answered, missed = cluster_process, False, 0
+            if not cluster_process.is_alive():
+                reason = "exited"
+            elif cluster_process.proxy.ping(self.heartbeat_timeout):
+                SUPERVISOR_UP.set(1)
+                answered, missed = True, 0
+                continue
+            else:
+                missed += answered
+                if missed < self.max_missed_heartbeats:
+                    continue
+                reason = "unresponsive"
+            if self._stopped.is_set():
+                return
+            try:
+                self.restart(reason)
+            except Exception:
+                logger.exception("Failed to restart the cluster process")
+
+
+def _log_scaling_error(scaling: dict, future: Future) -> None:
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is None and isinstance(future.result(), Exception):
+        error = future.result()
+    if error is not None:
+        logger.error("Failed to apply %s to the new cluster: %s", scaling, error)
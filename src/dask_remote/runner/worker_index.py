@@ -0,0 +1,116 @@
+"""Track changes to the workers listed in `scheduler_info`, to serve them incrementally."""
+
+import copy
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# Default number of removed workers remembered for computing deltas
+DEFAULT_MAX_REMOVED = 10000
+
+_MISSING = object()
+
+
+class WorkerIndex:
+    """Versioned index of workers, recording which worker fields changed at which version.
+
+    Deltas are requested with the `token` returned alongside the previous ones: a token from
+    another index (e.g. before an API restart), or older than the removed workers remembered,
+    results in a full listing flagged as `reset`.
+    """
+
+    def __init__(self, max_removed: int = DEFAULT_MAX_REMOVED):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.max_removed = max_removed
+        self._workers: Dict[str, dict] = {}
+        self._added: Dict[str, int] = {}  # version each worker was added at
+        self._field_versions: Dict[str, Dict[str, int]] = {}  # version each field changed at
+        self._removed: Dict[str, int] = {}  # version each worker was removed at, oldest first
+        self._horizon = 0  # oldest version deltas can be computed from
+
+    @property
+    def token(self) -> str:
+        return f"{self.epoch}:{self.version}"
+
+    def update(self, workers: Dict[Any, dict]) -> None:
+        """Record the changes from the current workers.
+
+        The index keeps its own copy of the worker fields, as the scheduler info of an
+        in-process cluster is updated in place.
+        """
+        version = self.version + 1
+        changed = False
+        current = set()
+        for worker_id, info in workers.items():
+            worker_id = str(worker_id)
+            current.add(worker_id)
+            previous = self._workers.get(worker_id)
+            if previous is None:
+                self._workers[worker_id] = copy.deepcopy(info)
+                self._added[worker_id] = version
+                self._field_versions[worker_id] = dict.fromkeys(info, version)
+                self._removed.pop(worker_id, None)
+                changed = True
+                continue
+            field_versions = self._field_versions[worker_id]
+            for field, value in info.items():
+                if previous.get(field, _MISSING) != value:
+                    previous[field] = copy.deepcopy(value)
+                    field_versions[field] = version
+                    changed = True
+            for field in previous.keys() - info.keys():
+                del previous[field]
+                field_versions[field] = version
+                changed = True
+        for worker_id in set(self._workers) - current:
+            del self._workers[worker_id], self._added[worker_id]
+            del self._field_versions[worker_id]
+            self._removed[worker_id] = version
+            changed = True
+        while len(self._removed) > self.max_removed:
+            self._horizon = self._removed.pop(next(iter(self._removed)))
+        if changed:
+            self.version = version
+
+    def deltas(
+        self, since: Optional[str] = None, fields: Optional[Iterable[str]] = None
+    ) -> Tuple[bool, Dict[str, dict], Dict[str, dict], List[str]]:
+        """Return the workers `(reset, added, changed, removed)` since the given token.
+
+        Only the selected `fields` are returned (all when `None`), and a worker is only
+        considered changed when one of these fields did.
+        """
+        since_version = self._parse_token(since)
+        reset = since_version is None
+        since_version = since_version or 0
+        selected = set(fields) if fields is not None else None
+
+        added, changed = {}, {}
+        for worker_id, info in self._workers.items():
+            if self._added[worker_id] > since_version:
+                added[worker_id] = _select(info, selected)
+            elif any(
+                version > since_version
+                for field, version in self._field_versions[worker_id].items()
+                if selected is None or field in selected
+            ):
+                changed[worker_id] = _select(info, selected)
+        removed = [] if reset else [w for w, v in self._removed.items() if v > since_version]
+        return reset, added, changed, removed
+
+    def _parse_token(self, token: Optional[str]) -> Optional[int]:
+        if not token:
+            return None
+        epoch, _, version = token.partition(":")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        if not self._horizon <= int(version) <= self.version:
+            return None
+        return int(version)
+
+
+def _select(info: dict, fields: Optional[set]) -> dict:
+    if fields is None:
+        return info
+    return {field: value for field, value in info.items() if field in fields}
@@ -0,0 +1,111 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Type, cast
+
+import pytest
+
+from dask_remote.runner.cluster_process import ClusterProcess
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+# Number of workers listed in the benchmarked `scheduler_info`
+NUM_WORKERS = 1000
+
+
+def worker_info(i):
+    host = f"10.0.{i // 256}.{i % 256}"
+    return {
+        "type": "Worker",
+        "id": f"dask-worker-{i}",
+        "host": host,
+        "nanny": f"tcp://{host}:40001",
+        "name": f"dask-worker-{i}",
+        "nthreads": 4,
+        "memory_limit": 16 * 2 ** 30,
+        "services": {"dashboard": 40002},
+        "resources": {},
+        "local_directory": f"/tmp/dask-worker-space/worker-{i}",
+        "metrics": {"cpu": 12.5, "memory": 2 ** 30, "executing": 2, "in_memory": 120},
+    }
+
+
+def scheduler_info(n=NUM_WORKERS):
+    return {
+        "type": "Scheduler",
+        "id": "Scheduler-benchmark",
+        "address": "tcp://scheduler:8786",
+        "services": {"dashboard": 8787},
+        "workers": {f"tcp://{worker_info(i)['host']}:40000": worker_info(i) for i in range(n)},
+    }
+
+
+class BenchmarkCluster:
+    """Stand-in for a cluster of `n` workers, answering instantly."""
+
+    def __init__(self, n=NUM_WORKERS):
+        self.scheduler_info = scheduler_info(n)
+
+    @property
+    def workers(self):
+        return self.scheduler_info["workers"]
+
+    @property
+    def status(self):
+        return "running"
+
+    @property
+    def scheduler_address(self):
+        return self.scheduler_info["address"]
+
+    @property
+    def dashboard_link(self):
+        return "http://scheduler:8787/status"
+
+    def scale(self, n):
+        return n
+
+    def adapt(self, **kwargs):
+        return None
+
+
+def record_percentiles(benchmark, percentiles=(50, 90, 99)):
+    """Record latency percentiles (in seconds) in the benchmark's `extra_info`."""
+    stats = benchmark.stats and benchmark.stats.stats
+    if not stats or not stats.data:
+        return  # benchmarks disabled
+    data = sorted(stats.data)
+    for p in percentiles:
+        benchmark.extra_info[f"p{p}"] = data[min(len(data) - 1, len(data) * p // 100)]
+
+
+@contextmanager
+def running(cluster_process):
+    cluster_process.start()
+    try:
+        yield cluster_process
+    finally:
+        cluster_process.terminate()
+        cluster_process.join()
+        cluster_process.close()
+
+
+@pytest.fixture
+def cluster_process():
+    cluster_process = ClusterProcess(
+        cluster_cls=cast(Type["Cluster"], BenchmarkCluster), shared_state_size=0
+    )
+    with running(cluster_process) as process:
+        yield process
+
+
+@pytest.fixture(params=["pickle", "msgpack"])
+def codec_cluster_process(request):
+    cluster_process = ClusterProcess(
+        cluster_cls=cast(Type["Cluster"], BenchmarkCluster),
+        codec=request.param,
+        shared_state_size=0,
+    )
+    with running(cluster_process) as process:
+        yield process
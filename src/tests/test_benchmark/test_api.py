@@ -0,0 +1,48 @@
+"""Latency percentiles of the runner API endpoints, through the FastAPI test client."""
+
+import pytest
+from starlette.testclient import TestClient
+
+from dask_remote.runner.api import cluster_api
+
+from .conftest import NUM_WORKERS, record_percentiles
+
+
+@pytest.fixture
+def client(cluster_process):
+    app = cluster_api(cluster_process.proxy, scale_window=0)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/status", "/scale", "/scheduler_address"])
+def test_get(benchmark, client, path):
+    response = benchmark(client.get, path)
+    assert response.status_code == 200
+    record_percentiles(benchmark)
+
+
+def test_scheduler_info(benchmark, client):
+    response = benchmark(client.get, "/scheduler_info")
+    assert len(response.json()["workers"]) == NUM_WORKERS
+    record_percentiles(benchmark)
+
+
+def test_scheduler_info_deltas(benchmark, client):
+    token = client.get("/scheduler_info/deltas").json()["token"]
+    response = benchmark(client.get, "/scheduler_info/deltas", params={"since": token})
+    assert response.json()["added"] == {}
+    record_percentiles(benchmark)
+
+
+def test_scale(benchmark, client):
+    response = benchmark(client.post, "/scale", params={"n": 2})
+    assert response.json() == {"message": "2"}
+    record_percentiles(benchmark)
+
+
+def test_batch(benchmark, client):
+    commands = [{"attribute": attr} for attr in ["status", "num_workers", "dashboard_link"]]
+    response = benchmark(client.post, "/batch", json={"commands": commands})
+    assert response.status_code == 200
+    record_percentiles(benchmark)
@@ -0,0 +1,94 @@
+"""Per-call latency, throughput and bytes moved over the `ClusterProcess` pipes.
+
+Run with `make test TEST_GROUP=benchmark`; the `connection` cases are the default-protocol
+pickles sent by `Connection.send`, as before pluggable codecs.
+"""
+
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.reduction import ForkingPickler
+
+import pytest
+
+from dask_remote.runner.codec import get_codec
+
+from .conftest import NUM_WORKERS, record_percentiles, scheduler_info
+
+
+MESSAGE = (0, scheduler_info())
+
+# Calls made by each concurrent caller, per round
+CALLS_PER_CALLER = 50
+
+
+@pytest.mark.parametrize("codec", ["connection", "pickle", "msgpack"])
+def test_encode_decode(benchmark, codec):
+    if codec == "connection":
+        dumps, loads = ForkingPickler.dumps, ForkingPickler.loads
+    else:
+        codec = get_codec(codec)
+        dumps, loads = codec.encode, codec.decode
+    benchmark.extra_info["bytes"] = len(dumps(MESSAGE))
+
+    assert benchmark(lambda: loads(dumps(MESSAGE)))[0] == 0
+
+
+def test_pickle_protocols(benchmark):
+    protocols = {p: len(pickle.dumps(MESSAGE, protocol=p)) for p in [4, pickle.HIGHEST_PROTOCOL]}
+    benchmark.extra_info["bytes"] = protocols
+    benchmark(pickle.dumps, MESSAGE, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.mark.parametrize("num_workers", [10, 100, 1000, 10000])
+def test_payload_size(benchmark, num_workers):
+    """Encoding of `scheduler_info` as the number of workers grows."""
+    codec = get_codec("pickle")
+    info = scheduler_info(num_workers)
+    benchmark.extra_info["bytes"] = len(codec.encode(info))
+    benchmark.extra_info["bytes_per_worker"] = benchmark.extra_info["bytes"] // num_workers
+
+    benchmark(codec.encode, info)
+
+
+def test_round_trip(benchmark, cluster_process):
+    """Latency of a small attribute read, through the cluster process."""
+    proxy = cluster_process.proxy
+    assert benchmark(proxy._submit_cmd, {"attribute": "status"}) == "running"
+    record_percentiles(benchmark)
+
+
+@pytest.mark.parametrize("callers", [1, 4, 16])
+def test_concurrent_callers(benchmark, cluster_process, callers):
+    """Throughput of `callers` threads sharing the proxy (calls per round in `extra_info`)."""
+    proxy = cluster_process.proxy
+    calls = callers * CALLS_PER_CALLER
+    benchmark.extra_info["calls"] = calls
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+
+        def run():
+            cmds = [{"attribute": "status"}] * calls
+            return list(executor.map(proxy._submit_cmd, cmds))
+
+        assert benchmark(run) == ["running"] * calls
+
+
+def test_attribute(benchmark, codec_cluster_process):
+    """Unversioned reads, encoding and sending `scheduler_info` on every call."""
+    proxy = codec_cluster_process.proxy
+    result = benchmark(proxy._submit_cmd, {"attribute": "scheduler_info"})
+
+    assert len(result["workers"]) == NUM_WORKERS
+
+
+def test_versioned_attribute(benchmark, codec_cluster_process):
+    """Versioned reads, sending `scheduler_info` back only when it changed."""
+    proxy = codec_cluster_process.proxy
+    result = benchmark(lambda: proxy.scheduler_info)
+
+    assert len(result["workers"]) == NUM_WORKERS
+
+
+def test_method(benchmark, codec_cluster_process):
+    proxy = codec_cluster_process.proxy
+    assert benchmark(proxy.scale, 2) == 2
@@ -0,0 +1,31 @@
+"""Import time of the client and runner modules, each in a fresh interpreter."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# Interpreters started per benchmark
+ROUNDS = 5
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "dask_remote.client.api_client",
+        "dask_remote.client",
+        "dask_remote.client.api_cluster",
+        "dask_remote.runner.cluster_process",
+        "dask_remote.runner.api",
+    ],
+)
+def test_import(benchmark, module):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    benchmark.pedantic(
+        subprocess.run,
+        ([sys.executable, "-c", f"import {module}"],),
+        {"env": env, "check": True},
+        rounds=ROUNDS,
+    )
@@ -0,0 +1,63 @@
+from typing import TYPE_CHECKING, List, Type, cast
+
+
+"""Time to a first answer from a new cluster, started on demand or acquired from a pool."""
+
+import pytest
+
+from dask_remote.runner.cluster_process import ClusterProcess
+from dask_remote.runner.pool import ClusterProcessPool
+
+from .conftest import BenchmarkCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+# New clusters per benchmark, each one a process
+ROUNDS = 5
+
+
+def stop(cluster_processes):
+    for cluster_process in cluster_processes:
+        cluster_process.terminate()
+        cluster_process.join()
+        cluster_process.close()
+
+
+@pytest.mark.parametrize("mp_context", ["fork", "spawn"])
+def test_start(benchmark, mp_context):
+    started = []
+
+    def start():
+        cluster_process = ClusterProcess(
+            cast(Type["Cluster"], BenchmarkCluster), shared_state_size=0, mp_context=mp_context
+        )
+        cluster_process.start()
+        started.append(cluster_process)
+        return cluster_process.proxy.status
+
+    try:
+        assert benchmark.pedantic(start, rounds=ROUNDS) == "running"
+    finally:
+        stop(started)
+
+
+def test_acquire(benchmark):
+    acquired: List[ClusterProcess] = []
+
+    def acquire():
+        cluster_process = pool.acquire()
+        acquired.append(cluster_process)
+        return cluster_process.proxy.status
+
+    with ClusterProcessPool(
+        cast(Type["Cluster"], BenchmarkCluster), size=ROUNDS, shared_state_size=0
+    ) as pool:
+        for cluster_process in pool._idle:
+            assert cluster_process.proxy.status == "running"  # wait for the clusters to start
+        try:
+            assert benchmark.pedantic(acquire, rounds=ROUNDS) == "running"
+        finally:
+            stop(acquired)
@@ -0,0 +1,234 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.encoders import jsonable_encoder
+from requests import HTTPError, Response
+from tornado.ioloop import IOLoop
+
+from dask_remote.client import ApiClient, ApiCluster, AsyncApiClient
+from dask_remote.client_base import ClientError, TTLCache
+from dask_remote.runner.api import _scheduler_info_deltas
+from dask_remote.runner.worker_index import WorkerIndex
+
+
+def http_error(status_code):
+    response = Response()
+    response.status_code = status_code
+    return HTTPError(f"{status_code} Error", response=response)
+
+
+def httpx_error(status_code):
+    request = httpx.Request("GET", "http://localhost:8000")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(f"{status_code} Error", request=request, response=response)
+
+
+def fake_api(path, params=None):
+    if path == "/scheduler_info":
+        return {"address": "tcp://scheduler:8786"}
+    if path == "/dashboard_link":
+        return {"message": "http://scheduler:8787"}
+    raise http_error(404)
+
+
+@pytest.fixture
+def fake_get(mocker):
+    return mocker.patch.object(ApiClient, "get", side_effect=fake_api)
+
+
+@pytest.fixture
+def api_client():
+    return ApiClient("http://localhost:8000")
+
+
+@pytest.fixture
+def api_cluster():
+    cluster = ApiCluster.__new__(ApiCluster)  # not started
+    cluster.url, cluster.cluster_id = "http://localhost:8000", None
+    cluster.user = cluster.password = None
+    cluster.override_scheduler_address = cluster.override_dashboard_link = None
+    cluster._cache = TTLCache(60)
+    cluster._refreshing = set()
+    return cluster
+
+
+def paths(fake_get):
+    return [call.args[0] for call in fake_get.call_args_list]
+
+
+class TestTTLCache:
+    def test_get(self):
+        cache = TTLCache(ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("other", "default") == "default"
+
+    def test_expired(self):
+        cache = TTLCache(ttl=0)
+        cache.set("key", "value")
+        cache.set("forever", "value", ttl=float("inf"))
+
+        assert cache.get("key") is None
+        assert cache.get("forever") == "value"
+
+    def test_expire(self):
+        cache = TTLCache(ttl=60)
+        cache.set("key", "value")
+        cache.expire()
+
+        assert cache.get("key") is None
+        assert cache.get_stale("key") == "value"
+        assert cache.get_stale("other", "default") == "default"
+
+
+class TestApiClient:
+    def test_cached(self, fake_get, api_client):
+        assert api_client.get_dashboard_link() == "http://scheduler:8787"
+        assert api_client.get_dashboard_link() == "http://scheduler:8787"
+
+        assert paths(fake_get) == ["/dashboard_link"]
+
+    def test_fallback_remembered(self, fake_get, api_client):
+        api_client.cache_ttl = 0  # always expired
+        assert api_client.get_scheduler_address() == "tcp://scheduler:8786"
+        assert api_client.get_scheduler_address() == "tcp://scheduler:8786"
+
+        assert paths(fake_get) == ["/scheduler_address", "/scheduler_info", "/scheduler_info"]
+
+    def test_fallback_not_remembered_when_unavailable(self, mocker, api_client):
+        responses = [http_error(503), {"message": "tcp://scheduler:8786"}]
+        get = mocker.patch.object(ApiClient, "get", side_effect=responses)
+
+        with pytest.raises(HTTPError):
+            api_client.get_scheduler_address()
+        assert api_client.get_scheduler_address() == "tcp://scheduler:8786"
+        assert paths(get) == ["/scheduler_address"] * 2
+
+    def test_invalidate_cache(self, fake_get, api_client):
+        api_client.get_scheduler_address()
+        api_client.invalidate_cache()
+        api_client.get_scheduler_address()
+
+        assert paths(fake_get) == ["/scheduler_address", "/scheduler_info"] * 2
+
+    def test_batch(self, mocker, api_client):
+        response = {
+            "results": [{"result": "running", "error": None}, {"result": None, "error": "X"}]
+        }
+        post = mocker.patch.object(ApiClient, "post", return_value=response)
+
+        status, error = api_client.batch([{"attribute": "status"}, {}], return_exceptions=True)
+        assert status == "running"
+        assert isinstance(error, ClientError)
+        assert post.call_args.kwargs["data"] == {"commands": [{"attribute": "status"}, {}]}
+
+        with pytest.raises(ClientError):
+            api_client.batch([{"attribute": "status"}, {}])
+
+    def test_get_attributes(self, mocker, api_client):
+        response = {
+            "results": [{"result": "running", "error": None}, {"result": 2, "error": None}]
+        }
+        mocker.patch.object(ApiClient, "post", return_value=response)
+
+        assert api_client.get_attributes("status", "num_workers") == {
+            "status": "running",
+            "num_workers": 2,
+        }
+
+    def test_sync_workers_pages(self, mocker, api_client):
+        workers = {f"tcp://worker-{i}": {"nthreads": 1} for i in range(5)}
+        index = WorkerIndex()
+        index.update(dict(workers))
+
+        def fake_deltas(path, params):
+            deltas = _scheduler_info_deltas(
+                index, {}, params.get("since"), params.get("after"), params["limit"], ["nthreads"]
+            )
+            workers.pop("tcp://worker-0", None)  # removed between pages
+            index.update(dict(workers))
+            return jsonable_encoder(deltas)
+
+        mocker.patch.object(ApiClient, "get", side_effect=fake_deltas)
+        assert len(api_client.sync_workers(page_size=2)) == 5  # none skipped
+        assert sorted(api_client.sync_workers(page_size=2)) == sorted(workers)
+
+    def test_sync_workers_reset_between_pages(self, mocker, api_client):
+        workers = {f"tcp://worker-{i}": {"nthreads": 1} for i in range(5)}
+        indexes = [WorkerIndex()]
+        indexes[0].update(dict(workers))
+
+        def fake_deltas(path, params):
+            deltas = _scheduler_info_deltas(
+                indexes[-1],
+                {},
+                params.get("since"),
+                params.get("after"),
+                params["limit"],
+                ["nthreads"],
+            )
+            return jsonable_encoder(deltas)
+
+        get = mocker.patch.object(ApiClient, "get", side_effect=fake_deltas)
+        api_client.sync_workers(page_size=2)
+        workers.pop("tcp://worker-4")
+        workers["tcp://worker-0"] = {"nthreads": 2}
+        indexes[0].update(dict(workers))
+
+        def restart(path, params):
+            deltas = fake_deltas(path, params)
+            if len(indexes) == 1:  # the API restarts after the first page
+                indexes.append(WorkerIndex())
+                indexes[-1].update(dict(workers))
+            return deltas
+
+        get.side_effect = restart
+        assert api_client.sync_workers(page_size=1) == workers
+
+
+class TestAsyncApiClient:
+    @pytest.mark.asyncio
+    async def test_fallback_remembered(self, mocker):
+        async def fake_async_api(path, params=None):
+            if path == "/scheduler_info":
+                return {"address": "tcp://scheduler:8786"}
+            raise httpx_error(404)
+
+        get = mocker.patch.object(AsyncApiClient, "get", side_effect=fake_async_api)
+        api_client = AsyncApiClient("http://localhost:8000")
+        api_client.cache_ttl = 0  # always expired
+
+        assert await api_client.get_scheduler_address() == "tcp://scheduler:8786"
+        assert await api_client.get_scheduler_address() == "tcp://scheduler:8786"
+        assert paths(get) == ["/scheduler_address", "/scheduler_info", "/scheduler_info"]
+
+    @pytest.mark.asyncio
+    async def test_fallback_not_remembered_when_unavailable(self, mocker):
+        responses = [httpx_error(503), {"message": "tcp://scheduler:8786"}]
+        get = mocker.patch.object(AsyncApiClient, "get", side_effect=responses)
+        api_client = AsyncApiClient("http://localhost:8000")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await api_client.get_scheduler_address()
+        assert await api_client.get_scheduler_address() == "tcp://scheduler:8786"
+        assert paths(get) == ["/scheduler_address"] * 2
+
+
+class TestApiCluster:
+    @pytest.mark.asyncio
+    async def test_refreshed_in_background(self, mocker, fake_get, api_cluster):
+        mocker.patch.object(ApiCluster, "loop", IOLoop.current(), create=True)
+        link = {"message": "http://scheduler:8788"}
+        async_get = mocker.patch.object(AsyncApiClient, "get", return_value=link)
+        assert api_cluster.scheduler_address == "tcp://scheduler:8786"  # never cached
+        api_cluster._cache.set("dashboard_link", "http://scheduler:8787")
+        api_cluster.invalidate_cache()
+
+        assert api_cluster.dashboard_link == "http://scheduler:8787"  # served while refreshed
+        assert api_cluster.dashboard_link == "http://scheduler:8787"
+        await asyncio.sleep(0.01)
+        assert api_cluster.dashboard_link == "http://scheduler:8788"
+        assert paths(fake_get) == ["/scheduler_address", "/scheduler_info"]
+        assert paths(async_get) == ["/dashboard_link"]
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from requests import ConnectionError, HTTPError, Response
+
+from dask_remote.client_base import CircuitBreaker, CircuitOpenError, JSONClient, RetryPolicy
+
+
+def json_response(status_code=200):
+    response = Response()
+    response.status_code = status_code
+    response.headers["content-type"] = "application/json"
+    response._content = b'{"message": "ok"}'
+    return response
+
+
+@pytest.fixture
+def client(mocker):
+    client = JSONClient(
+        "http://localhost:8000",
+        retry=RetryPolicy(retries=2, backoff=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60),
+    )
+    client._conn = mocker.Mock()
+    return client
+
+
+class TestRetryPolicy:
+    def test_delays(self):
+        delays = list(RetryPolicy(retries=4, backoff=1, max_backoff=3).delays())
+
+        assert len(delays) == 4
+        assert all(0 <= delay <= limit for delay, limit in zip(delays, [1, 2, 3, 3]))
+
+
+class TestCircuitBreaker:
+    def test_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.check()  # trial request let through
+        breaker.record_success()
+
+        assert not breaker.is_open
+
+
+class TestJSONClient:
+    def test_retries_get(self, client):
+        client.conn.request.side_effect = [ConnectionError(), json_response(502), json_response()]
+
+        assert client.get("/status") == {"message": "ok"}
+        assert client.conn.request.call_count == 3
+
+    def test_retries_exhausted(self, client):
+        client.conn.request.side_effect = ConnectionError()
+
+        with pytest.raises(ConnectionError):
+            client.get("/status")
+        assert client.conn.request.call_count == 3
+
+    def test_no_retry_post(self, client):
+        client.conn.request.side_effect = ConnectionError()
+
+        with pytest.raises(ConnectionError):
+            client.post("/scale")
+        assert client.conn.request.call_count == 1
+
+    def test_no_retry_client_error(self, client):
+        client.conn.request.return_value = json_response(404)
+
+        with pytest.raises(HTTPError):
+            client.get("/status")
+        assert client.conn.request.call_count == 1
+
+    def test_fails_fast(self, client):
+        client.conn.request.side_effect = ConnectionError()
+        with pytest.raises(ConnectionError):
+            client.get("/status")
+
+        with pytest.raises(CircuitOpenError):
+            client.get("/status")
+        assert client.conn.request.call_count == 3
+
+    def test_timeouts(self, client):
+        client.conn.request.return_value = json_response()
+        client.get("/status")
+
+        assert client.conn.request.call_args.kwargs["timeout"] == (3.0, 10.0)
+
+    def test_stream_events(self, client):
+        response = Response()
+        response.status_code = 200
+        response.raw = io.BytesIO('data: {"event": "é"}\n\ndata: {"event": 2}\n\n'.encode())
+        client.conn.get.return_value = response
+
+        assert list(client.stream_events("/events")) == [{"event": "é"}, {"event": 2}]
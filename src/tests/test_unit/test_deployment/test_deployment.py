@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from dask_remote.deployment.deployment import DeploymentCluster
+from dask_remote.deployment.rate_limit import ScaleDownLimiter, TokenBucket
+from dask_remote.deployment.watch import DeploymentWatch
+
+from .test_watch import deployment, pod
+
+
+def make_cluster(mocker, pods, patch_rate=1.0, patch_burst=5, **limits):
+    """A cluster watching a Deployment of `pods`, each running the worker of the same name."""
+    # not started: the scheduler and the k8s API are mocked
+    cluster = DeploymentCluster.__new__(DeploymentCluster)
+    cluster.deployment_name, cluster.namespace = "worker", "test"
+    cluster.deployment_watch = DeploymentWatch(None, None, "worker", "test")
+    cluster.deployment_watch.view.set_deployment(deployment(len(pods)))
+    cluster.deployment_watch.view.set_pods([pod(name, ready=True) for name in pods])
+    cluster.deployment_watch.view.synced = True
+    cluster.scheduler_info = {
+        "workers": {f"tcp://{name}:1234": {"name": name, "host": name} for name in pods}
+    }
+    cluster.scheduler_comm = mocker.Mock()
+    cluster.scheduler_comm.retire_workers = mocker.AsyncMock(
+        side_effect=lambda names, **kwargs: {f"tcp://{n}:1234": {"name": n} for n in names}
+    )
+    cluster.app_api, cluster.core_api = mocker.Mock(), mocker.Mock()
+    cluster.app_api.patch_namespaced_deployment_scale_with_http_info = mocker.AsyncMock()
+    cluster.core_api.patch_namespaced_pod = mocker.AsyncMock()
+    cluster._lock = asyncio.Lock()
+    cluster._patch_bucket = TokenBucket(patch_rate, patch_burst)
+    cluster._scale_down_limiter = ScaleDownLimiter(**limits)
+    cluster._replicas = len(pods)
+    cluster._scaling_retry = cluster._scaling_target = cluster._scaling_task_waiting = None
+    return cluster
+
+
+def patched_replicas(cluster):
+    patch = cluster.app_api.patch_namespaced_deployment_scale_with_http_info
+    return [call.kwargs["body"]["spec"]["replicas"] for call in patch.call_args_list]
+
+
+@pytest.mark.asyncio
+async def test_scale_down_retires(mocker):
+    cluster = make_cluster(mocker, ["a", "b", "c"], delay=600, max_step=1)
+    await cluster.scale_down(["b", "c"])
+    await asyncio.sleep(0.01)  # next step
+
+    cluster.scheduler_comm.retire_workers.assert_called_once()
+    annotated = {call.args[0] for call in cluster.core_api.patch_namespaced_pod.call_args_list}
+    assert annotated == {"b", "c"}
+    assert patched_replicas(cluster) == [2, 1]  # not delayed, but stepped
+
+
+@pytest.mark.asyncio
+async def test_scale_down_annotation_failed(mocker):
+    cluster = make_cluster(mocker, ["a", "b", "c"])
+
+    def patch_pod(pod, namespace, body):
+        if pod == "c":
+            raise Exception("(403) Forbidden")
+
+    cluster.core_api.patch_namespaced_pod.side_effect = patch_pod
+    await cluster.scale_down(["b", "c"])
+
+    assert cluster.core_api.patch_namespaced_pod.await_count == 2
+    assert patched_replicas(cluster) == [2]  # "c" left running
+
+
+@pytest.mark.asyncio
+async def test_scale_down_rate_limited(mocker):
+    cluster = make_cluster(mocker, ["a", "b"], patch_rate=2, patch_burst=1)
+    cluster._patch_bucket.take()
+    scale_down = asyncio.ensure_future(cluster.scale_down(["b"]))
+    await asyncio.sleep(0.1)
+    assert patched_replicas(cluster) == []  # waiting for a token
+
+    await scale_down
+    assert patched_replicas(cluster) == [1]
+
+
+@pytest.mark.asyncio
+async def test_scale_down_unwatched(mocker):
+    cluster = make_cluster(mocker, ["a", "b"], delay=600)
+    cluster.deployment_watch = None
+    await cluster.scale_down(["b"], n=1)
+
+    cluster.scheduler_comm.retire_workers.assert_not_called()
+    assert patched_replicas(cluster) == []  # held, as no worker was retired
+    cluster._scaling_retry.cancel()
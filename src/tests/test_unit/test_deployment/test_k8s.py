@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+from dask_remote.deployment.k8s import ApiClientPool, _config_incluster
+
+
+KUBECONFIG = """
+apiVersion: v1
+kind: Config
+current-context: {name}
+clusters:
+- name: {name}
+  cluster:
+    server: https://{name}.invalid:6443
+contexts:
+- name: {name}
+  context:
+    cluster: {name}
+    user: {name}
+users:
+- name: {name}
+  user:
+    token: secret
+"""
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    paths = []
+    for name in ["a", "b"]:
+        path = tmp_path / f"{name}.yaml"
+        path.write_text(KUBECONFIG.format(name=name))
+        paths.append(str(path))
+    return paths
+
+
+def closed(api_client):
+    return api_client.rest_client.pool_manager.closed
+
+
+@pytest.mark.asyncio
+async def test_shared_client(config_files):
+    pool = ApiClientPool(maxsize=2)
+    first = await pool.acquire(config_file=config_files[0])
+    second = await pool.acquire(config_file=config_files[0])
+    other = await pool.acquire(config_file=config_files[1])
+
+    assert first is second
+    assert other is not first
+    assert first.configuration.host == "https://a.invalid:6443"
+    assert first.configuration.connection_pool_maxsize == 2
+    assert len(pool) == 2
+
+    await pool.release(first)
+    assert not closed(first)
+    await pool.release(second)
+    assert closed(first)
+    assert len(pool) == 1
+
+    await pool.close()
+    assert closed(other)
+    assert len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_config(tmp_path):
+    pool = ApiClientPool()
+    with pytest.raises(Exception):
+        await pool.acquire(config_file=str(tmp_path / "missing.yaml"))
+    assert len(pool) == 0
+
+
+def test_config_incluster_default(mocker):
+    # kubernetes_asyncio 10 loads the in-cluster configuration as the default one
+    load = mocker.patch("kubernetes_asyncio.config.load_incluster_config")
+    default = SimpleNamespace(host="https://10.0.0.1:443", api_key={"authorization": "bearer t"})
+    mocker.patch("kubernetes_asyncio.client.Configuration", return_value=default)
+    configuration = SimpleNamespace(host="http://localhost", api_key={})
+
+    _config_incluster(client_configuration=configuration)
+    load.assert_called_once_with()
+    assert vars(configuration) == vars(default)
@@ -0,0 +1,130 @@
+import pytest
+
+from dask_remote.deployment.policy import (
+    History,
+    Observation,
+    PredictivePolicy,
+    ScalingPolicy,
+    observe
+)
+from dask_remote.deployment.replay import load_trace, replay, save_trace
+
+
+def load(time, target, waiting=0, workers=None):
+    workers = target if workers is None else workers
+    return Observation(time, target, workers, 2 * workers, 2 * min(target, workers), waiting)
+
+
+def burst(start=0, ramp=10, peak=10, end=300):
+    """Idle, then a load ramping up by a worker every `ramp` seconds, held, then idle."""
+    trace = []
+    for time in range(start, end, 5):
+        target = min(max(time - 60, 0) // ramp, peak) if time < 240 else 0
+        trace.append(load(time, target, waiting=10 * target if time < 240 else 0))
+    return trace
+
+
+def test_history_ring_buffer():
+    history = History(capacity=3)
+    assert history.latest is None
+    for time in range(5):
+        history.append(load(time, time))
+
+    assert len(history) == 3
+    assert [o.time for o in history] == [2, 3, 4]
+    assert history.latest == load(4, 4)
+    assert [o.target for o in history.since(3)] == [3, 4]
+    with pytest.raises(ValueError):
+        History(capacity=0)
+
+
+def test_observation_occupancy():
+    assert load(0, 2).occupancy == 1
+    assert Observation(0, 0, 0, 0, 0, 0).occupancy == 0
+    assert Observation(0, 1, 1, 4, 1, 0).occupancy == 0.25
+
+
+def test_reactive_policy():
+    history = History()
+    assert ScalingPolicy().target(history) == 0
+    history.append(load(0, 3))
+    assert ScalingPolicy().target(history) == 3
+
+
+def test_predictive_policy_prescales():
+    policy = PredictivePolicy(window=30, horizon=20, scale_up_cooldown=0)
+    history = History()
+    for time, target in [(0, 1), (10, 2), (20, 3)]:
+        history.append(load(time, target, waiting=time))
+
+    assert policy.target(history) == 5  # a worker more every 10''
+
+
+def test_predictive_policy_waits_for_growing_load():
+    policy = PredictivePolicy(window=30, horizon=20, scale_down_cooldown=0)
+    history = History()
+    for time, target in [(0, 1), (10, 2), (20, 3)]:
+        history.append(load(time, target, workers=8))  # idle workers, and no tasks waiting
+
+    assert policy.target(history) == 3
+
+
+def test_predictive_policy_cooldowns():
+    policy = PredictivePolicy(window=30, horizon=20, scale_up_cooldown=15, scale_down_cooldown=60)
+    history = History()
+    for time, target in [(0, 1), (10, 2), (20, 3)]:
+        history.append(load(time, target, waiting=time))
+    assert policy.target(history) == 5
+
+    history.append(load(30, 4, waiting=30))
+    assert policy.target(history) == 5  # not raised within the cool-down
+    history.append(load(40, 5, waiting=40))
+    assert policy.target(history) == 7
+
+    history.append(load(50, 1))
+    assert policy.target(history) == 7  # held
+    history.append(load(101, 1))
+    assert policy.target(history) == 1
+
+
+def test_replay():
+    trace = burst()
+    reactive = replay(ScalingPolicy(), trace, startup=30)
+    predictive = replay(PredictivePolicy(window=30, horizon=30), trace, startup=30)
+
+    assert reactive.targets == [o.target for o in trace]
+    assert reactive.shortfall_worker_seconds > 0
+    assert predictive.shortfall_worker_seconds < reactive.shortfall_worker_seconds
+    assert predictive.worker_seconds > reactive.worker_seconds
+    assert predictive.scale_events < reactive.scale_events
+    assert replay(ScalingPolicy(), trace, startup=0).shortfall_worker_seconds == 0
+
+
+def test_trace_round_trip(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    history = History()
+    for observation in burst():
+        history.append(observation)
+    save_trace(history, path)
+
+    assert load_trace(path) == list(history)
+
+
+def test_observe():
+    scheduler_info = {
+        "workers": {
+            "a": {"nthreads": 2, "metrics": dict(executing=2, ready=5, in_memory=3, in_flight=0)},
+            "b": {"nthreads": 4, "metrics": dict(executing=1, ready=2, in_memory=0, in_flight=1)},
+            "c": {"nthreads": 1},  # no heartbeat yet
+        }
+    }
+    observation = observe(4, scheduler_info)
+
+    assert observation[1:] == (4, 3, 7, 3, 7)
+    assert observation.occupancy == 3 / 7
+
+
+def test_observe_task_counts():
+    metrics = {"task_counts": dict(executing=2, ready=1, memory=4)}  # later versions
+    observation = observe(1, {"workers": {"a": {"nthreads": 2, "metrics": metrics}}})
+    assert observation[1:] == (1, 1, 2, 2, 1)
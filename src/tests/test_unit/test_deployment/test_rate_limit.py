@@ -0,0 +1,76 @@
+import pytest
+
+from dask_remote.deployment.rate_limit import ScaleDownLimiter, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate=0.5, burst=2, clock=clock)
+    assert bucket.take()
+    assert bucket.take()
+    assert not bucket.take()
+    assert bucket.delay() == 2
+
+    clock.now = 1
+    assert bucket.delay() == 1
+    clock.now = 10
+    assert bucket.delay() == 0
+    assert bucket.tokens == 2  # capped at the burst
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 1), (1, 0)])
+def test_token_bucket_invalid(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+
+
+def test_scale_up_not_limited(clock):
+    limiter = ScaleDownLimiter(delay=60, max_step=1, clock=clock)
+    assert limiter.limit(10, 2) == (10, 0)
+    assert limiter.limit(3, None) == (3, 0)
+
+
+def test_scale_down_delay(clock):
+    limiter = ScaleDownLimiter(delay=60, clock=clock)
+    assert limiter.limit(2, 10) == (None, 60)
+    clock.now = 30
+    assert limiter.limit(4, 10) == (None, 30)  # still below
+    clock.now = 60
+    assert limiter.limit(4, 10) == (4, 0)
+
+
+def test_scale_down_flapping(clock):
+    limiter = ScaleDownLimiter(delay=60, clock=clock)
+    assert limiter.limit(2, 10) == (None, 60)
+    clock.now = 30
+    assert limiter.limit(10, 10) == (10, 0)  # back up, the delay starts over
+    clock.now = 70
+    assert limiter.limit(2, 10) == (None, 60)
+
+
+def test_scale_down_step(clock):
+    limiter = ScaleDownLimiter(max_step=3, clock=clock)
+    assert limiter.limit(2, 10) == (7, 0)
+    assert limiter.limit(2, 7) == (4, 0)
+    assert limiter.limit(2, 4) == (2, 0)
+
+
+def test_scale_down_skip_delay(clock):
+    limiter = ScaleDownLimiter(delay=60, max_step=3, clock=clock)
+    limiter.skip_delay()
+    assert limiter.limit(2, 10) == (7, 0)
+    assert limiter.limit(2, 7) == (4, 0)
+    limiter.reset()
+    assert limiter.limit(2, 4) == (None, 60)
@@ -0,0 +1,171 @@
+import asyncio
+import datetime
+from typing import List
+
+import pytest
+from kubernetes_asyncio.client import (
+    V1ContainerState,
+    V1ContainerStateWaiting,
+    V1ContainerStatus,
+    V1Deployment,
+    V1DeploymentSpec,
+    V1LabelSelector,
+    V1ObjectMeta,
+    V1Pod,
+    V1PodCondition,
+    V1PodStatus,
+    V1PodTemplateSpec
+)
+from kubernetes_asyncio.client.rest import ApiException
+
+from dask_remote.deployment.watch import (
+    RETRY_DELAY,
+    DeploymentWatch,
+    Replicas,
+    ReplicaView,
+    pod_state
+)
+
+
+def pod(name="worker-0", phase="Running", ready=False, waiting=None, ip=None, **kwargs):
+    conditions = [V1PodCondition(type="Ready", status=str(ready))]
+    if phase == "Pending":
+        conditions = []
+    container_statuses = None
+    if waiting:
+        state = V1ContainerState(waiting=V1ContainerStateWaiting(reason=waiting))
+        container_statuses = [
+            V1ContainerStatus(
+                name="worker", image="dask", image_id="", ready=False, restart_count=3, state=state
+            )
+        ]
+    status = V1PodStatus(
+        phase=phase,
+        conditions=conditions + kwargs.pop("conditions", []),
+        container_statuses=container_statuses,
+        pod_ip=ip,
+    )
+    return V1Pod(metadata=V1ObjectMeta(name=name, **kwargs), status=status)
+
+
+def deployment(replicas):
+    return V1Deployment(
+        metadata=V1ObjectMeta(name="worker"),
+        spec=V1DeploymentSpec(
+            replicas=replicas, selector=V1LabelSelector(), template=V1PodTemplateSpec()
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "obj, state",
+    [
+        (pod(ready=True), "ready"),
+        (pod(ready=False), "starting"),
+        (pod(phase="Pending"), "pending"),
+        (
+            pod(
+                phase="Pending",
+                conditions=[
+                    V1PodCondition(type="PodScheduled", status="False", reason="Unschedulable")
+                ],
+            ),
+            "unschedulable",
+        ),
+        (pod(waiting="CrashLoopBackOff"), "failing"),
+        (pod(phase="Pending", waiting="ImagePullBackOff"), "failing"),
+        (pod(ready=True, deletion_timestamp=datetime.datetime.now()), "terminating"),
+        (pod(phase="Succeeded"), None),
+    ],
+)
+def test_pod_state(obj, state):
+    assert pod_state(obj) == state
+
+
+def test_replica_view():
+    view = ReplicaView()
+    assert view.set_deployment(deployment(3))
+    assert view.set_pods([pod("a", ready=True), pod("b", phase="Pending")])
+    assert not view.set_pods([pod("a", ready=True), pod("b", phase="Pending")])
+
+    assert view.apply_pod_event("ADDED", pod("c", waiting="CrashLoopBackOff"))
+    assert view.apply_pod_event("MODIFIED", pod("b", ready=True))
+    assert not view.apply_pod_event("MODIFIED", pod("b", ready=True))
+    assert view.replicas == Replicas(desired=3, ready=2, failing=1)
+    assert view.live_pods == ["a", "b", "c"]
+
+    assert view.apply_pod_event("DELETED", pod("c"))
+    assert not view.apply_pod_event("DELETED", pod("c"))
+    assert view.replicas.to_dict() == dict(
+        desired=3, ready=2, starting=0, pending=0, unschedulable=0, failing=0, terminating=0
+    )
+
+
+def test_watch_synced():
+    changes: List[Replicas] = []
+    watch = DeploymentWatch(None, None, "worker", "test", on_change=changes.append)
+    watch._update("deployment", watch.view.set_deployment(deployment(2)))
+    assert watch.replicas is None  # pods not listed yet
+    assert not changes
+
+    watch._update("pods", watch.view.set_pods([]))
+    assert watch.replicas == Replicas(desired=2)
+    watch._update("pods", watch.view.apply_pod_event("ADDED", pod("a", phase="Pending")))
+    assert changes == [Replicas(desired=2), Replicas(desired=2, pending=1)]
+
+
+def test_pod_of():
+    view = ReplicaView()
+    view.set_pods([pod("a", ip="10.0.0.1"), pod("b", phase="Pending"), pod(None)])
+    assert view.ips == {"a": "10.0.0.1"}  # neither pending nor unnamed pods
+    view.apply_pod_event("MODIFIED", pod("b", ip="10.0.0.2"))
+    assert not view.apply_pod_event("ADDED", pod(None, ip="10.0.0.3"))
+
+    assert view.pod_of({"name": "a", "host": "10.0.0.9"}) == "a"
+    assert view.pod_of({"name": "tcp://10.0.0.2:1234", "host": "10.0.0.2"}) == "b"
+    assert view.pod_of({"name": 0, "host": "10.0.0.3"}) is None
+
+    view.apply_pod_event("DELETED", pod("b", ip="10.0.0.2"))
+    assert view.pod_of({"name": "tcp://10.0.0.2:1234", "host": "10.0.0.2"}) is None
+
+
+class FakeWatch:
+    def __init__(self, events):
+        self.events = events
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def stream(self, func, *args, **kwargs):
+        for event in self.events:
+            yield event
+
+
+@pytest.mark.asyncio
+async def test_watch_error_event(mocker):
+    deployments = mocker.Mock(items=[deployment(2)])
+    app_api = mocker.Mock(list_namespaced_deployment=mocker.AsyncMock(return_value=deployments))
+    watch = DeploymentWatch(app_api, None, "worker", "test")
+    status = {"kind": "Status", "code": 410, "message": "too old resource version"}
+    error = {"type": "ERROR", "object": status, "raw_object": status}
+    mocker.patch("kubernetes_asyncio.watch.Watch", return_value=FakeWatch([error]))
+
+    with pytest.raises(ApiException) as exc_info:
+        await watch._watch_deployment()
+    assert exc_info.value.status == 410
+
+
+@pytest.mark.asyncio
+async def test_follow_lists_again(mocker):
+    watch = DeploymentWatch(None, None, "worker", "test")
+    sleep = mocker.patch("asyncio.sleep")
+    errors = [ApiException(status=410), ApiException(status=403), asyncio.CancelledError()]
+    run = mocker.AsyncMock(side_effect=errors)
+
+    with pytest.raises(asyncio.CancelledError):
+        await watch._follow("pods", run)
+    assert run.await_count == 3
+    sleep.assert_awaited_once_with(RETRY_DELAY)  # only after the failure
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dask_remote.client
+import dask_remote.runner
+
+
+# Dependencies that REST-only clients should not pay the import of
+HEAVY_MODULES = ["distributed", "fastapi", "pydantic", "uvicorn"]
+
+
+def imported_modules(statement):
+    """Return the heavy modules imported by `statement`, in a fresh interpreter."""
+    code = f"import sys; {statement}; print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "from dask_remote.client import ApiClient, AsyncApiClient",
+        "import dask_remote.runner",
+        "from dask_remote.runner import metrics, codec, shared_state, worker_index",
+    ],
+)
+def test_lightweight_imports(statement):
+    assert imported_modules(statement) == []
+
+
+def test_lazy_attributes():
+    from dask_remote.client.api_cluster import ApiCluster
+    from dask_remote.runner.host import ClusterHost
+
+    assert dask_remote.client.ApiCluster is ApiCluster
+    assert dask_remote.runner.ClusterHost is ClusterHost
+    assert "ClusterProcess" in dir(dask_remote.runner)
+    with pytest.raises(AttributeError):
+        dask_remote.runner.missing
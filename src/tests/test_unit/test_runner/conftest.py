@@ -1,4 +1,7 @@
+import asyncio
+import time
 from multiprocessing import Pipe
+from typing import TYPE_CHECKING, Type, cast
 
 import pytest
 
@@ -6,6 +9,27 @@ from dask_remote.runner.api import cluster_api
 from dask_remote.runner.cluster_process import ClusterProcess, ClusterProcessProxy
 
 
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+def worker_info(i, **kwargs):
+    info = {
+        "type": "Worker",
+        "id": i,
+        "host": "worker",
+        "nanny": None,
+        "name": i,
+        "nthreads": 1,
+        "memory_limit": 2 ** 30,
+        "services": {},
+        "resources": {},
+        "local_directory": "/tmp",
+    }
+    info.update(kwargs)
+    return info
+
+
 class PingCluster:
     def __init__(self, n=0):
         self.n = n
@@ -22,6 +46,16 @@ class PingCluster:
     def scheduler_address(self):
         return "scheduler_address"
 
+    @property
+    def scheduler_info(self):
+        return {
+            "type": "Scheduler",
+            "id": "Scheduler-ping",
+            "address": self.scheduler_address,
+            "services": {},
+            "workers": {f"tcp://worker-{i}": worker_info(i) for i in range(self.n)},
+        }
+
     def scale(self, n):
         self.n = n
         return f"scale({n})"
@@ -30,6 +64,42 @@ class PingCluster:
         """Not picklable."""
         return lambda: None
 
+    def sleep(self, seconds):
+        """Slow command."""
+        time.sleep(seconds)
+        return seconds
+
+
+class AsyncPingCluster(PingCluster):
+    def __init__(self, n=0, asynchronous=True):
+        super().__init__(n)
+        self.started = False
+
+    def __await__(self):
+        async def start():
+            self.started = True
+            return self
+
+        return start().__await__()
+
+    @property
+    def status(self):
+        return "running" if self.started else "created"
+
+    async def scale(self, n):
+        await asyncio.sleep(0)
+        return super().scale(n)
+
+    async def sleep(self, seconds):
+        """Slow command, awaited on the event loop."""
+        await asyncio.sleep(seconds)
+        return seconds
+
+    def block(self, seconds):
+        """Blocking command."""
+        time.sleep(seconds)
+        return seconds
+
 
 @pytest.fixture
 def cmd_pipe():
@@ -49,11 +119,12 @@ def cluster_process_proxy(cmd_pipe, result_pipe):
 
 @pytest.fixture
 def cluster_process(cmd_pipe, result_pipe):
-    cluster_process = ClusterProcess(cluster_cls=PingCluster)
+    cluster_process = ClusterProcess(cluster_cls=cast(Type["Cluster"], PingCluster))
     cluster_process.start()
     yield cluster_process
     cluster_process.terminate()
     cluster_process.join()
+    cluster_process.close()
 
 
 @pytest.fixture
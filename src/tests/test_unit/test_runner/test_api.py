@@ -1,6 +1,23 @@
+import asyncio
+from typing import TYPE_CHECKING, List, cast
+
 import pytest
 from starlette.testclient import TestClient
 
+from dask_remote.runner.api import (
+    ScaleCoalescer,
+    _run_batch,
+    _scheduler_info_deltas,
+    cluster_events
+)
+from dask_remote.runner.worker_index import WorkerIndex
+
+from .conftest import worker_info
+
+
+if TYPE_CHECKING:
+    from dask_remote.runner.cluster_process import AsyncClusterProxy
+
 
 MAX_TIMEOUT = 10
 
@@ -25,7 +42,197 @@ def test_scale(client):
     assert response.json() == {"message": "42"}
 
 
+class FakeAsyncProxy:
+    def __init__(self):
+        self.calls = []
+
+    async def _adaptive_stop_and_scale(self, n):
+        self.calls.append(("scale", n))
+        return f"scale({n})"
+
+    async def adapt(self, **kwargs):
+        self.calls.append(("adapt", kwargs))
+
+    async def batch(self, cmds, return_exceptions=False):
+        self.calls.append(("batch", cmds))
+        return [len(self.calls)] * len(cmds)
+
+
+class TestScaleCoalescer:
+    @pytest.mark.asyncio
+    async def test_coalesces(self):
+        proxy = FakeAsyncProxy()
+        scaler = ScaleCoalescer(cast("AsyncClusterProxy", proxy), window=0.01)
+        results = await asyncio.gather(*[scaler.scale(n) for n in range(5)])
+
+        assert results == ["scale(4)"] * 5
+        assert proxy.calls == [("scale", 4)]
+
+        assert await scaler.scale(2) == "scale(2)"
+        assert proxy.calls == [("scale", 4), ("scale", 2)]
+
+    @pytest.mark.asyncio
+    async def test_adapt_discards_target(self):
+        proxy = FakeAsyncProxy()
+        scaler = ScaleCoalescer(cast("AsyncClusterProxy", proxy), window=0.01)
+        pending = asyncio.ensure_future(scaler.scale(3))
+        await asyncio.sleep(0)
+        await scaler.adapt(minimum=1, maximum=2)
+
+        assert await pending is None
+        assert proxy.calls == [("adapt", {"minimum": 1, "maximum": 2})]
+
+
+@pytest.mark.asyncio
+async def test_batch_scale_coalesced(mocker):
+    proxy = FakeAsyncProxy()
+    scaler = ScaleCoalescer(cast("AsyncClusterProxy", proxy), 0.01)
+    app = mocker.Mock(dask_async_cluster_proxy=proxy, dask_scaler=scaler)
+    cmds: List[dict] = [
+        {"attribute": "status"},
+        {"attribute": "num_workers"},
+        {"method": "_adaptive_stop_and_scale", "args": [3], "kwargs": {}},
+        {"attribute": "num_workers"},
+    ]
+    results = await asyncio.gather(_run_batch(app, cmds), app.dask_scaler.scale(5))
+
+    assert results == [[1, 1, "scale(5)", 3], "scale(5)"]
+    assert proxy.calls == [("batch", cmds[:2]), ("scale", 5), ("batch", cmds[3:])]
+
+
 def test_adapt(client):
     response = client.post("/adapt?minimum=0&maximum=42")
     assert response.status_code == 200
     assert response.json() == {"message": "None"}
+
+
+def test_batch(client):
+    commands = [
+        {"method": "scale", "args": [2]},
+        {"attribute": "num_workers"},
+        {"attribute": "status"},
+    ]
+    response = client.post("/batch", json={"commands": commands})
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"result": "scale(2)", "error": None},
+            {"result": 2, "error": None},
+            {"result": "running", "error": None},
+        ]
+    }
+
+
+@pytest.mark.parametrize(
+    "command", [{}, {"attribute": "workers"}, {"method": "close"}, {"method": "_adaptive_stop"}]
+)
+def test_batch_invalid(client, command):
+    response = client.post("/batch", json={"commands": [command]})
+    assert response.status_code == 422
+
+
+def test_metrics(client):
+    client.post("/scale?n=2")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    lines = response.text.splitlines()
+    assert "# TYPE dask_remote_api_request_seconds histogram" in lines
+    assert any(
+        line.startswith("dask_remote_api_request_seconds_count")
+        and 'route="/scale"' in line
+        and 'status="200"' in line
+        for line in lines
+    )
+    command_count = 'dask_remote_cluster_command_seconds_count{command="_adaptive_stop_and_scale"}'
+    assert any(line.startswith(command_count) for line in lines)
+    assert "dask_remote_api_cluster_metrics_up 1" in lines
+
+
+def test_scheduler_info(client):
+    client.post("/scale?n=2")
+    response = client.get("/scheduler_info")
+    assert response.status_code == 200
+    assert sorted(response.json()["workers"]) == ["tcp://worker-0", "tcp://worker-1"]
+
+
+def test_scheduler_info_deltas(client):
+    client.post("/scale?n=3")
+    response = client.get("/scheduler_info/deltas")
+    assert response.status_code == 200
+    deltas = response.json()
+    assert deltas["reset"]
+    assert deltas["scheduler"]["address"] == "scheduler_address"
+    assert sorted(deltas["added"]) == ["tcp://worker-0", "tcp://worker-1", "tcp://worker-2"]
+
+    client.post("/scale?n=2")
+    deltas = client.get("/scheduler_info/deltas", params={"since": deltas["token"]}).json()
+    assert not deltas["reset"]
+    assert deltas["added"] == deltas["changed"] == {}
+    assert deltas["removed"] == ["tcp://worker-2"]
+
+
+def test_scheduler_info_deltas_pages(client):
+    client.post("/scale?n=5")
+    params = {"limit": 2, "fields": "nthreads"}
+    deltas = client.get("/scheduler_info/deltas", params=params).json()
+    assert deltas["added"] == {
+        "tcp://worker-0": {"nthreads": 1},
+        "tcp://worker-1": {"nthreads": 1},
+    }
+    assert deltas["next_after"] == "tcp://worker-1"
+
+    deltas = client.get("/scheduler_info/deltas", params=dict(params, after="tcp://worker-3"))
+    assert list(deltas.json()["added"]) == ["tcp://worker-4"]
+    assert deltas.json()["next_after"] is None
+
+
+def test_scheduler_info_deltas_pages_changing():
+    index = WorkerIndex()
+    workers = {f"tcp://worker-{i}": worker_info(i) for i in range(4)}
+    index.update(workers)
+    page = _scheduler_info_deltas(index, {}, None, None, 2, ["nthreads"])
+    assert list(page.added) == ["tcp://worker-0", "tcp://worker-1"]
+
+    del workers["tcp://worker-0"]  # between pages
+    index.update(dict(workers))
+    page = _scheduler_info_deltas(index, {}, None, page.next_after, 2, ["nthreads"])
+    assert list(page.added) == ["tcp://worker-2", "tcp://worker-3"]
+    assert page.next_after is None
+
+
+@pytest.mark.asyncio
+async def test_cluster_events(client, api_app):
+    events = cluster_events(api_app, interval=0.01, keepalive=0.05)
+    assert await events.__anext__() == {
+        "status": "running",
+        "num_workers": 0,
+        "target": None,
+        "adapt": None,
+    }
+    assert await events.__anext__() is None  # keep-alive
+
+    client.post("/scale?n=2")
+    event = await events.__anext__()
+    assert event is not None
+    assert (event["num_workers"], event["target"]) == (2, 2)
+
+    client.post("/adapt?minimum=1&maximum=3")
+    event = await events.__anext__()
+    assert event is not None
+    assert (event["target"], event["adapt"]) == (None, {"minimum": 1, "maximum": 3})
+    await events.aclose()
+
+
+def test_cluster_unavailable(client, cluster_process):
+    cluster_process.proxy._disconnect("restarting")
+    response = client.post("/scale?n=1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert "restarting" in response.json()["detail"]
+
+
+def test_replicas_unreported(client):
+    response = client.get("/replicas")
+    assert response.status_code == 404
@@ -0,0 +1,86 @@
+import argparse
+
+import pytest
+
+from dask_remote.runner.cli import api_kwargs, import_object, parse_args
+
+from .conftest import PingCluster
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "tests.test_unit.test_runner.conftest.PingCluster",
+        "tests.test_unit.test_runner.conftest:PingCluster",
+    ],
+)
+def test_import_object(path):
+    assert import_object(path) is PingCluster
+
+
+@pytest.mark.parametrize("path", ["PingCluster", "tests.test_unit.test_runner.conftest.Missing"])
+def test_import_object_invalid(path):
+    with pytest.raises(ValueError):
+        import_object(path)
+
+
+def test_parse_args():
+    args = parse_args(
+        [
+            "tests.test_unit.test_runner.conftest.PingCluster",
+            "--cluster-kwargs",
+            '{"n": 2}',
+            "--mode",
+            "single",
+            "--scale-window",
+            "0",
+        ]
+    )
+    assert args.cluster_cls is PingCluster
+    assert args.cluster_kwargs == {"n": 2}
+    assert args.mode == "single"
+    assert api_kwargs(args) == dict(scheduler_address=None, dashboard_link=None, scale_window=0)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["missing.Cluster"],
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--cluster-kwargs", "[1]"],
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--cluster-kwargs", "{"],
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--mode", "other"],
+    ],
+)
+def test_parse_args_invalid(argv):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_api_kwargs_defaults():
+    args = argparse.Namespace(
+        scheduler_address="tcp://a:8786", dashboard_link=None, scale_window=None
+    )
+    assert api_kwargs(args) == dict(scheduler_address="tcp://a:8786", dashboard_link=None)
+
+
+def test_parse_args_supervision():
+    args = parse_args(["tests.test_unit.test_runner.conftest.PingCluster"])
+    assert (args.heartbeat_interval, args.heartbeat_timeout, args.command_timeout) == (
+        1.0,
+        3.0,
+        None,
+    )
+
+    args = parse_args(
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--heartbeat-interval", "2"]
+    )
+    assert args.heartbeat_timeout == 6.0
+    args = parse_args(
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--heartbeat-timeout", "0.5"]
+    )
+    assert (args.heartbeat_interval, args.heartbeat_timeout) == (1.0, 0.5)
+
+    args = parse_args(
+        ["tests.test_unit.test_runner.conftest.PingCluster", "--command-timeout", "2.5"]
+    )
+    assert args.command_timeout == 2.5
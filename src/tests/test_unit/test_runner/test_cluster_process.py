@@ -1,18 +1,43 @@
+import asyncio
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Type, cast
+
 import pytest
 
-from dask_remote.runner.cluster_process import ClusterProcess, ResultPicklingError
+from dask_remote.runner.cluster_process import (
+    AsyncClusterProcessProxy,
+    ClusterProcess,
+    ClusterUnavailableError,
+    CommandTimeoutError,
+    ResultPicklingError
+)
+from dask_remote.runner.shared_state import HEADER
+
+from .conftest import AsyncPingCluster, PingCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
 
-from .conftest import PingCluster
+
+def wait_for_state(proxy, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not proxy.cached_state:
+        assert time.monotonic() < deadline, "No state received"
+        time.sleep(0.01)
 
 
 class TestClusterProcessProxy:
     @pytest.mark.parametrize("attr", ["scheduler_address"])
     def test_cluster_attribute(self, cluster_process_proxy, cmd_pipe, result_pipe, attr):
-        result_pipe[0].send(None)  # fake a response
+        result_pipe[0].send((0, None))  # fake a response
         _ = cluster_process_proxy.scheduler_address
         cmd = cmd_pipe[1].recv()
 
-        assert cmd == {"attribute": attr}
+        assert cmd == {"attribute": attr, "id": 0}
 
     @pytest.mark.parametrize(
         "method, args, kwargs", [("scale", (42,), {}), ("scale", (), {"n": 42})]
@@ -20,66 +45,170 @@ class TestClusterProcessProxy:
     def test_cluster_method(
         self, cluster_process_proxy, cmd_pipe, result_pipe, method, args, kwargs
     ):
-        result_pipe[0].send(None)  # fake a response
+        result_pipe[0].send((0, None))  # fake a response
         _ = cluster_process_proxy.scale(*args, **kwargs)
         cmd = cmd_pipe[1].recv()
 
-        assert cmd == {"method": method, "args": args, "kwargs": kwargs}
+        assert cmd == {"method": method, "args": args, "kwargs": kwargs, "id": 0}
+
+    def test_results_routed_by_id(self, cluster_process_proxy, cmd_pipe, result_pipe):
+        first = cluster_process_proxy._submit_cmd_nowait({"attribute": "status"})
+        second = cluster_process_proxy._submit_cmd_nowait({"attribute": "num_workers"})
+        result_pipe[0].send((1, 42))  # reply out of order
+        result_pipe[0].send((0, "running"))
+
+        assert second.result(timeout=1) == 42
+        assert first.result(timeout=1) == "running"
 
     def test_not_cluster_attribute(self, cluster_process_proxy):
         with pytest.raises(AttributeError):
             _ = cluster_process_proxy.not_an_attribute
 
+    def test_cached_state(self, cluster_process_proxy, cmd_pipe, result_pipe):
+        result_pipe[0].send((0, {"version": 0, "state": {"status": "running"}}))
+        cluster_process_proxy.subscribe()
+        assert cmd_pipe[1].recv() == {"subscribe": True, "id": 0}
+        wait_for_state(cluster_process_proxy)
+
+        assert cluster_process_proxy.status == "running"
+        assert not cmd_pipe[1].poll(0.1)  # served without a round-trip
+
+        result_pipe[0].send((None, {"version": 1, "state": {"status": "closed"}}))
+        result_pipe[0].send((None, {"version": 0, "state": {"status": "running"}}))  # outdated
+        time.sleep(0.1)
+
+        assert cluster_process_proxy.status == "closed"
+
+    def test_stale_state(self, cluster_process_proxy, cmd_pipe, result_pipe):
+        cluster_process_proxy.max_staleness = 0
+        result_pipe[0].send((0, {"version": 0, "state": {"status": "running"}}))
+        cluster_process_proxy.subscribe()
+        assert cmd_pipe[1].recv() == {"subscribe": True, "id": 0}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            status = executor.submit(lambda: cluster_process_proxy.status)
+            assert cmd_pipe[1].recv() == {"attribute": "status", "id": 1}
+            result_pipe[0].send((1, "closed"))
+
+            assert status.result(timeout=1) == "closed"
+
     def test_not_cluster_method(self, cluster_process_proxy):
         with pytest.raises(AttributeError):
             _ = cluster_process_proxy.not_a_method()
 
 
+class TestAsyncClusterProcessProxy:
+    @pytest.fixture
+    def async_proxy(self, cluster_process):
+        return AsyncClusterProcessProxy(cluster_process.proxy)
+
+    @pytest.mark.asyncio
+    async def test_attribute(self, async_proxy):
+        assert await async_proxy.status == "running"
+
+    @pytest.mark.asyncio
+    async def test_method(self, async_proxy):
+        assert await async_proxy.scale(42) == "scale(42)"
+
+    @pytest.mark.asyncio
+    async def test_returns_error(self, async_proxy):
+        with pytest.raises(AttributeError):
+            await async_proxy._submit_cmd({"attribute": "not_an_attribute"})
+
+    @pytest.mark.asyncio
+    async def test_does_not_block(self, async_proxy):
+        slow = asyncio.ensure_future(async_proxy._submit_cmd({"method": "sleep", "args": [1]}))
+
+        assert await async_proxy.status == "running"
+        assert not slow.done()
+        assert await slow == 1
+
+    def test_not_cluster_attribute(self, async_proxy):
+        with pytest.raises(AttributeError):
+            _ = async_proxy.not_an_attribute
+
+
 class TestClusterProcess:
     @pytest.mark.parametrize("n", [0, 42])
     def test_cluster_kwargs(self, n):
-        cluster_process = ClusterProcess(cluster_cls=PingCluster, cluster_kwargs={"n": n})
+        cluster_process = ClusterProcess(
+            cluster_cls=cast(Type["Cluster"], PingCluster), cluster_kwargs={"n": n}
+        )
         cluster_process.start()
 
-        cmd = {"attribute": "num_workers"}
+        cmd = {"attribute": "num_workers", "id": 0}
         cluster_process._cmd_pipe[0].send(cmd)
         result = cluster_process._result_pipe[1].recv()
 
-        assert result == n
+        assert result == (0, n)
 
         cluster_process.terminate()
         cluster_process.join()
+        cluster_process.close()
 
     def test_attribute(self, cluster_process):
-        cmd = {"attribute": "status"}
+        cmd = {"attribute": "status", "id": 0}
         cluster_process._cmd_pipe[0].send(cmd)
         result = cluster_process._result_pipe[1].recv()
 
-        assert result == "running"
+        assert result == (0, "running")
 
     @pytest.mark.parametrize(
-        "cmd", [{"method": "scale", "args": [42]}, {"method": "scale", "kwargs": {"n": 42}}]
+        "cmd",
+        [
+            {"method": "scale", "args": [42], "id": 0},
+            {"method": "scale", "kwargs": {"n": 42}, "id": 0},
+            {"method": "_adaptive_stop_and_scale", "args": [42], "id": 0},
+        ],
     )
     def test_method(self, cluster_process, cmd):
         cluster_process._cmd_pipe[0].send(cmd)
         result = cluster_process._result_pipe[1].recv()
 
-        assert result == "scale(42)"
+        assert result == (0, "scale(42)")
 
     def test_not_picklable(self, cluster_process):
-        cmd = {"method": "adapt"}
+        cmd = {"method": "adapt", "id": 0}
         cluster_process._cmd_pipe[0].send(cmd)
-        result = cluster_process._result_pipe[1].recv()
+        msg_id, result = cluster_process._result_pipe[1].recv()
 
+        assert msg_id == 0
         assert isinstance(result, ResultPicklingError)
 
     def test_returns_error(self, cluster_process):
-        cmd = {"attribute": "not_an_attribute"}
+        cmd = {"attribute": "not_an_attribute", "id": 0}
         cluster_process._cmd_pipe[0].send(cmd)
-        result = cluster_process._result_pipe[1].recv()
+        msg_id, result = cluster_process._result_pipe[1].recv()
 
+        assert msg_id == 0
         assert isinstance(result, AttributeError)
 
+    def test_concurrent_commands(self, cluster_process):
+        """A slow command does not hold back the commands submitted after it."""
+        cluster_process._cmd_pipe[0].send({"method": "sleep", "args": [1], "id": 0})
+        cluster_process._cmd_pipe[0].send({"attribute": "status", "id": 1})
+
+        assert cluster_process._result_pipe[1].recv() == (1, "running")
+        assert cluster_process._result_pipe[1].recv() == (0, 1)
+
+    def test_subscribe(self, cluster_process):
+        cluster_process._cmd_pipe[0].send({"subscribe": True, "id": 0})
+        msg_id, update = cluster_process._result_pipe[1].recv()
+        while msg_id is None:
+            msg_id, update = cluster_process._result_pipe[1].recv()
+
+        assert msg_id == 0
+        assert update["state"]["num_workers"] == 0
+
+        cluster_process._cmd_pipe[0].send({"method": "scale", "args": [42], "id": 1})
+        msg_id, result = cluster_process._result_pipe[1].recv()
+        while msg_id is None:
+            update = result
+            msg_id, result = cluster_process._result_pipe[1].recv()
+
+        assert (msg_id, result) == (1, "scale(42)")
+        assert update["state"]["num_workers"] == 42  # pushed ahead of the result
+
     def test_proxy(self, cluster_process):
         proxy = cluster_process.proxy
         assert proxy.cmd_conn is cluster_process._cmd_pipe[0]
@@ -96,3 +225,235 @@ class TestBothTogether:
     def test_new_attribute(self, cluster_process, cluster_process_proxy):
         """Test attribute that is valid, but not part of the original cluster class."""
         assert cluster_process.proxy.num_workers == 0
+
+    def test_cached_attribute(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy.subscribe()
+        wait_for_state(proxy)
+        proxy.scale(42)
+
+        assert proxy.cached_state["num_workers"] == 42
+        assert proxy.num_workers == 42
+
+    def test_shared_state(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy.scale(42)
+        wait_for_state(proxy)
+
+        assert not proxy._subscribed
+        assert proxy.cached_state["num_workers"] == 42
+
+    def test_refresh_only_while_read(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy.scale(1)
+        proxy.shared_state = None  # stop reading
+        time.sleep(1.5)  # past `max_staleness` since the last read
+        shared_state = cluster_process._shared_state
+        idle = HEADER.unpack_from(shared_state._shm.buf, 0)[2]
+        time.sleep(0.5)
+
+        assert shared_state.read()[1] == idle  # not refreshed meanwhile
+        time.sleep(0.5)
+        assert shared_state.read()[1] > idle  # read again
+
+    def test_concurrent_callers(self, cluster_process):
+        proxy = cluster_process.proxy
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(proxy.scale, range(32)))
+
+        assert results == [f"scale({n})" for n in range(32)]
+
+    def test_batch(self, cluster_process):
+        proxy = cluster_process.proxy
+        cmds = [
+            {"method": "scale", "args": [2]},
+            {"attribute": "num_workers"},
+            {"attribute": "not_an_attribute"},
+            {"method": "adapt"},
+        ]
+        results = proxy.batch(cmds, return_exceptions=True)
+
+        assert results[:2] == ["scale(2)", 2]
+        assert isinstance(results[2], AttributeError)
+        assert results[3] is None  # not picklable
+
+        with pytest.raises(AttributeError):
+            proxy.batch(cmds)
+
+    def test_batch_not_picklable(self, cluster_process, mocker):
+        proxy = cluster_process.proxy
+        mocker.patch.object(proxy, "_wait", return_value=ResultPicklingError("batch"))
+
+        with pytest.raises(ResultPicklingError):
+            proxy.batch([{"attribute": "num_workers"}], return_exceptions=True)
+
+    def test_batch_cached(self, cluster_process, mocker):
+        proxy = cluster_process.proxy
+        proxy.subscribe()
+        wait_for_state(proxy)
+        submit = mocker.spy(proxy, "_submit_cmd_nowait")
+
+        assert proxy.batch([{"attribute": "status"}, {"attribute": "num_workers"}]) == [
+            "running",
+            0,
+        ]
+        submit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_async_batch(self, cluster_process):
+        async_proxy = AsyncClusterProcessProxy(cluster_process.proxy)
+        cmds: List[dict] = [{"method": "scale", "args": [3]}, {"attribute": "num_workers"}]
+
+        assert await async_proxy.batch(cmds) == ["scale(3)", 3]
+
+    def test_versioned_attribute(self, cluster_process, mocker):
+        proxy = cluster_process.proxy
+        proxy.shared_state = None  # read from the cluster process
+        proxy.scale(1)
+        decode = mocker.spy(proxy.codec, "decode")
+
+        assert list(proxy.scheduler_info["workers"]) == ["tcp://worker-0"]
+        assert list(proxy.scheduler_info["workers"]) == ["tcp://worker-0"]  # not sent again
+        assert decode.call_count == 1
+
+        proxy.scale(2)
+        assert len(proxy.scheduler_info["workers"]) == 2
+        assert decode.call_count == 2
+
+    def test_unsupported_start_method(self):
+        with pytest.raises(ValueError):
+            ClusterProcess(cluster_cls=cast(Type["Cluster"], PingCluster), mp_context="thread")
+
+    def test_msgpack(self):
+        cluster_process = ClusterProcess(
+            cluster_cls=cast(Type["Cluster"], PingCluster), codec="msgpack"
+        )
+        cluster_process.start()
+        try:
+            proxy = cluster_process.proxy
+            assert proxy.scale(2) == "scale(2)"
+            assert proxy.num_workers == 2
+            assert len(proxy.scheduler_info["workers"]) == 2
+            assert proxy.batch([{"attribute": "status"}]) == ["running"]
+        finally:
+            cluster_process.terminate()
+            cluster_process.join()
+            cluster_process.close()
+
+    def test_exits_on_eof(self, cluster_process):
+        cluster_process._cmd_pipe[0].close()
+        cluster_process._result_pipe[1].close()
+        cluster_process.join(timeout=5)
+
+        assert cluster_process.exitcode == 0
+
+    def test_shutdown(self, cluster_process):
+        assert cluster_process.proxy.status == "running"
+        cluster_process.shutdown(timeout=5)
+
+        assert cluster_process.exitcode == 0
+
+    def test_ignores_sigint(self, cluster_process):
+        assert cluster_process.proxy.status == "running"
+        os.kill(cluster_process.pid, signal.SIGINT)
+
+        assert cluster_process.proxy.scale(1) == "scale(1)"
+
+    def test_ping(self, cluster_process):
+        assert cluster_process.proxy.ping(timeout=5)
+        cluster_process.terminate()
+        cluster_process.join()
+
+        assert not cluster_process.proxy.ping(timeout=5)
+
+    def test_exited_process(self, cluster_process):
+        proxy = cluster_process.proxy
+        assert proxy.status == "running"
+        os.kill(cluster_process.pid, signal.SIGKILL)
+
+        with pytest.raises(ClusterUnavailableError):
+            proxy._submit_cmd({"method": "sleep", "args": [10]})
+        with pytest.raises(ClusterUnavailableError):
+            proxy.scale(1)
+
+    def test_command_timeout(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy.command_timeout = 0.1
+        with pytest.raises(CommandTimeoutError):
+            proxy._submit_cmd({"method": "sleep", "args": [1]})
+
+        proxy.command_timeout = None
+        assert proxy.scale(1) == "scale(1)"  # the late result is dropped
+
+    @pytest.mark.asyncio
+    async def test_async_command_timeout(self, cluster_process):
+        cluster_process.proxy.command_timeout = 0.1
+        proxy = AsyncClusterProcessProxy(cluster_process.proxy)
+        with pytest.raises(CommandTimeoutError):
+            await proxy._submit_cmd({"method": "sleep", "args": [1]})
+
+    def test_disconnect(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy._disconnect("restarting")
+        with pytest.raises(ClusterUnavailableError, match="restarting"):
+            proxy.scale(1)
+
+    def test_last_scaling(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy.scale(2)
+        proxy.batch([{"attribute": "status"}, {"method": "scale", "args": [3], "kwargs": {}}])
+
+        deadline = time.monotonic() + 5
+        while proxy.last_scaling != {"method": "scale", "args": [3], "kwargs": {}}:
+            assert time.monotonic() < deadline, "Scaling not recorded"
+            time.sleep(0.01)
+
+    def test_last_scaling_failed(self, cluster_process):
+        proxy = cluster_process.proxy
+        proxy._disconnect("restarting")
+        with pytest.raises(ClusterUnavailableError):
+            proxy.scale(2)
+
+        assert proxy.last_scaling is None
+
+
+class TestAsyncCluster:
+    @pytest.fixture
+    def cluster_process(self):
+        cluster_process = ClusterProcess(
+            cluster_cls=cast(Type["Cluster"], AsyncPingCluster),
+            cluster_kwargs={"asynchronous": True},
+            blocking_methods=["block"],
+        )
+        cluster_process.start()
+        yield cluster_process
+        cluster_process.terminate()
+        cluster_process.join()
+        cluster_process.close()
+
+    def test_started(self, cluster_process):
+        assert cluster_process.proxy.status == "running"
+
+    def test_awaits_method(self, cluster_process):
+        proxy = cluster_process.proxy
+        assert proxy.scale(3) == "scale(3)"
+        assert proxy._adaptive_stop_and_scale(2) == "scale(2)"
+        assert proxy.num_workers == 2
+
+    def test_awaits_batch(self, cluster_process):
+        cmds = [{"method": "scale", "args": [1]}, {"method": "sleep", "args": ["x"]}]
+        results = cluster_process.proxy.batch(cmds, return_exceptions=True)
+
+        assert results[0] == "scale(1)"
+        assert isinstance(results[1], TypeError)
+
+    @pytest.mark.parametrize("method", ["sleep", "block"])
+    def test_does_not_block(self, cluster_process, method):
+        proxy = cluster_process.proxy
+        proxy.shared_state = None  # read from the cluster process
+        slow = proxy._submit_cmd_nowait({"method": method, "args": [1]})
+        start = time.monotonic()
+
+        assert proxy.status == "running"
+        assert time.monotonic() - start < 0.5
+        assert slow.result() == 1
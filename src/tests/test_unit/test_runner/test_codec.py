@@ -0,0 +1,59 @@
+import pickle
+from multiprocessing import Pipe
+
+import pytest
+
+from dask_remote.runner.codec import MsgpackCodec, PickleCodec, get_codec
+
+
+MESSAGE = (0, {"status": "running", "workers": {1: {"nthreads": 2}}, "error": ValueError("x")})
+
+
+@pytest.fixture
+def pipe():
+    return Pipe()
+
+
+@pytest.mark.parametrize("codec", [PickleCodec(), PickleCodec(protocol=2), MsgpackCodec()])
+def test_round_trip(pipe, codec):
+    codec.send(pipe[0], MESSAGE)
+    msg_id, result = codec.recv(pipe[1])
+
+    assert msg_id == 0
+    assert result["workers"] == {1: {"nthreads": 2}}
+    assert isinstance(result["error"], ValueError)
+    assert codec.decode(codec.encode(MESSAGE))[0] == 0
+
+
+def test_pickle_compatible(pipe):
+    codec = PickleCodec()
+    pipe[0].send(MESSAGE[0])
+    codec.send(pipe[0], MESSAGE[0])
+
+    assert codec.recv(pipe[1]) == pipe[1].recv() == 0
+
+
+@pytest.mark.skipif(pickle.HIGHEST_PROTOCOL < 5, reason="Requires pickle protocol 5")
+def test_pickle_out_of_band(pipe):
+    codec = PickleCodec()
+    data = bytearray(b"x" * 1024)
+    codec.send(pipe[0], {"data": pickle.PickleBuffer(data)})
+
+    assert pipe[1].poll()
+    assert bytes(codec.recv(pipe[1])["data"]) == bytes(data)
+    assert not pipe[1].poll()
+
+
+def test_get_codec():
+    codec = MsgpackCodec()
+    assert get_codec(codec) is codec
+    assert isinstance(get_codec("pickle"), PickleCodec)
+    with pytest.raises(ValueError):
+        get_codec("json")
+
+
+def test_msgpack_missing(mocker):
+    mocker.patch.dict("sys.modules", {"msgpack": None})
+
+    with pytest.raises(ImportError, match="msgpack` extra"):
+        get_codec("msgpack")
@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, Type, cast
+
+import pytest
+from starlette.testclient import TestClient
+
+from dask_remote.runner.cluster_process import ClusterProcess
+from dask_remote.runner.host import ClusterHost, multi_cluster_api
+
+from .conftest import PingCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+@pytest.fixture
+def cluster_processes():
+    cluster_cls = cast(Type["Cluster"], PingCluster)
+    cluster_processes = {cluster_id: ClusterProcess(cluster_cls) for cluster_id in ["a", "b"]}
+    for cluster_process in cluster_processes.values():
+        cluster_process.start()
+    yield cluster_processes
+    for cluster_process in cluster_processes.values():
+        cluster_process.terminate()
+        cluster_process.join()
+        cluster_process.close()
+
+
+@pytest.fixture
+def host_app(cluster_processes):
+    cluster_proxies = {cluster_id: p.proxy for cluster_id, p in cluster_processes.items()}
+    return multi_cluster_api(
+        cluster_proxies, cluster_api_kwargs={"a": {"scheduler_address": "tcp://a:8786"}}
+    )
+
+
+@pytest.fixture
+def client(host_app):
+    return TestClient(host_app)
+
+
+def test_clusters(client):
+    response = client.get("/clusters")
+    assert response.status_code == 200
+    assert response.json() == {"clusters": ["a", "b"]}
+
+
+def test_namespaced_routes(client):
+    response = client.post("/clusters/a/scale?n=3")
+    assert response.json() == {"message": "scale(3)"}
+
+    assert client.get("/clusters/a/scale").json() == {"message": "3"}
+    assert client.get("/clusters/b/scale").json() == {"message": "0"}
+    assert client.get("/clusters/a/scheduler_address").json() == {"message": "tcp://a:8786"}
+    assert client.get("/clusters/b/scheduler_address").json() == {"message": "scheduler_address"}
+    assert client.get("/clusters/c/status").status_code == 404
+
+
+def test_redirect_root(client):
+    response = client.get("/clusters/a/", follow_redirects=False)
+    assert response.headers["location"] == "/clusters/a/docs"
+
+
+def test_metrics(client):
+    client.get("/clusters/a/status")
+    client.get("/clusters/b/status")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert body.count("# TYPE dask_remote_cluster_command_seconds histogram") == 1
+    for cluster_id in ["a", "b"]:
+        assert f'dask_remote_api_cluster_metrics_up{{cluster="{cluster_id}"}} 1' in body
+        assert f'{{cluster="{cluster_id}",method="GET",route="/status",status="200"}}' in body
+
+
+def test_add_remove_cluster(host_app, client, cluster_processes):
+    host_app.remove_cluster("b")
+    assert client.get("/clusters").json() == {"clusters": ["a"]}
+    assert client.get("/clusters/b/status").status_code == 404
+
+    host_app.add_cluster("c", cluster_processes["b"].proxy)
+    assert client.get("/clusters/c/status").json() == {"message": "running"}
+
+    with pytest.raises(ValueError, match="already served"):
+        host_app.add_cluster("c", cluster_processes["b"].proxy)
+
+
+@pytest.mark.parametrize("cluster_id", ["", "a/b", "..", "a b"])
+def test_invalid_cluster_id(cluster_id):
+    host = ClusterHost()
+    with pytest.raises(ValueError, match="Invalid cluster id"):
+        host.add_cluster(cluster_id, cast(Type["Cluster"], PingCluster))
+
+
+def test_terminate_newest_first(mocker):
+    host = ClusterHost()
+    shutdown = mocker.patch.object(ClusterProcess, "shutdown", autospec=True)
+    cluster_processes = [
+        host.add_cluster(cluster_id, cast(Type["Cluster"], PingCluster)) for cluster_id in "abc"
+    ]
+    host.terminate()
+    assert [call.args[0] for call in shutdown.call_args_list] == cluster_processes[::-1]
@@ -0,0 +1,76 @@
+from typing import TYPE_CHECKING, Any, Type, cast
+
+import pytest
+from starlette.testclient import TestClient
+
+from dask_remote.runner.api import cluster_api
+from dask_remote.runner.cluster_process import proxied_cluster_class
+from dask_remote.runner.in_process import InProcessClusterProxy
+
+from .conftest import AsyncPingCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+@pytest.fixture
+def cluster_proxy():
+    cluster_cls: Any = proxied_cluster_class(cast(Type["Cluster"], AsyncPingCluster))
+    return InProcessClusterProxy(cluster_cls(n=1))
+
+
+@pytest.fixture
+def client(cluster_proxy):
+    return TestClient(cluster_api(cluster_proxy, scale_window=0))
+
+
+@pytest.mark.asyncio
+async def test_proxy(cluster_proxy):
+    assert await cluster_proxy.num_workers == 1
+    assert await cluster_proxy._adaptive_stop_and_scale(3) == "scale(3)"
+    assert await cluster_proxy.num_workers == 3
+    with pytest.raises(AttributeError):
+        cluster_proxy.workers
+
+
+@pytest.mark.asyncio
+async def test_batch(cluster_proxy):
+    cmds = [
+        {"attribute": "num_workers"},
+        {"method": "scale", "args": [2]},
+        {"attribute": "missing"},
+    ]
+    results = await cluster_proxy.batch(cmds, return_exceptions=True)
+    assert results[:2] == [1, "scale(2)"]
+    assert isinstance(results[2], AttributeError)
+
+    with pytest.raises(AttributeError):
+        await cluster_proxy.batch(cmds)
+
+
+def test_api(client):
+    assert client.get("/status").json() == {"message": "created"}
+    assert client.post("/scale?n=4").json() == {"message": "scale(4)"}
+    assert client.get("/scale").json() == {"message": "4"}
+
+    response = client.post("/batch", json={"commands": [{"attribute": "num_workers"}]})
+    assert response.json()["results"] == [{"result": 4, "error": None}]
+    assert "dask_remote_api_request_seconds" in client.get("/metrics").text
+
+
+class ReplicaCluster(AsyncPingCluster):
+    @property
+    def replicas(self):
+        return dict(
+            desired=2, ready=1, starting=0, pending=1, unschedulable=0, failing=0, terminating=0
+        )
+
+
+def test_replicas():
+    cluster_cls: Any = proxied_cluster_class(cast(Type["Cluster"], ReplicaCluster))
+    cluster = cluster_cls(n=1)
+    client = TestClient(cluster_api(InProcessClusterProxy(cluster)))
+    response = client.get("/replicas")
+    assert response.status_code == 200
+    assert response.json()["pending"] == 1
@@ -0,0 +1,44 @@
+from dask_remote.runner.metrics import Registry, render
+
+
+def test_counter():
+    registry = Registry()
+    registry.counter("errors", "Errors").inc(command="scale")
+    registry.counter("errors", "Errors").labels(command="scale").inc(2)
+
+    assert render(registry.collect()) == (
+        "# HELP errors Errors\n# TYPE errors counter\nerrors_total{command=\"scale\"} 3\n"
+    )
+
+
+def test_gauge():
+    registry = Registry()
+    gauge = registry.gauge("in_flight", "In flight")
+    with gauge.track_inprogress():
+        assert registry.collect()[0][3] == [("in_flight", {}, 1)]
+
+    assert registry.collect()[0][3] == [("in_flight", {}, 0)]
+
+
+def test_histogram():
+    registry = Registry()
+    histogram = registry.histogram("latency", "Latency", buckets=[0.1, 1])
+    for value in [0.05, 0.5, 5]:
+        histogram.observe(value, route="/scale")
+
+    labels = {"route": "/scale"}
+    assert registry.collect()[0][3] == [
+        ("latency_bucket", dict(labels, le="0.1"), 1),
+        ("latency_bucket", dict(labels, le="1"), 2),
+        ("latency_bucket", dict(labels, le="+Inf"), 3),
+        ("latency_count", labels, 3),
+        ("latency_sum", labels, 5.55),
+    ]
+
+
+def test_collect_prefix():
+    registry = Registry()
+    registry.counter("cluster_errors", "Errors")
+    registry.counter("api_errors", "Errors")
+
+    assert [family[0] for family in registry.collect(prefix="cluster_")] == ["cluster_errors"]
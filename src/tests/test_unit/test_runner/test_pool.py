@@ -0,0 +1,78 @@
+import os
+from typing import TYPE_CHECKING, Type, cast
+
+import pytest
+
+from dask_remote.runner.cluster_process import ClusterProcess
+from dask_remote.runner.pool import ClusterProcessPool
+
+from .conftest import PingCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+@pytest.fixture
+def pool():
+    with ClusterProcessPool(cast(Type["Cluster"], PingCluster), dict(n=1), size=2) as pool:
+        yield pool
+
+
+def stop(cluster_process):
+    cluster_process.terminate()
+    cluster_process.join()
+    cluster_process.close()
+
+
+def test_acquire(pool):
+    assert pool.idle == 2
+    cluster_processes = [pool.acquire(), pool.acquire()]
+    try:
+        assert cluster_processes[0] is not cluster_processes[1]
+        for cluster_process in cluster_processes:
+            assert cluster_process.proxy.status == "running"
+            assert cluster_process.proxy.num_workers == 1
+        assert pool.idle == 2
+    finally:
+        for cluster_process in cluster_processes:
+            stop(cluster_process)
+
+
+def test_reaps_exited(pool):
+    exited = pool._idle[0]
+    exited.terminate()
+    exited.join()
+
+    cluster_process = pool.acquire()
+    try:
+        assert cluster_process is not exited
+        assert cluster_process.is_alive()
+        assert pool.idle == 2
+    finally:
+        stop(cluster_process)
+
+
+def test_close(pool, mocker):
+    terminate = mocker.spy(ClusterProcess, "terminate")
+    pids = [p.pid for p in pool._idle]
+    pool.close()
+    terminate.assert_not_called()  # the idle processes exited once shut down
+    assert pool.idle == 0
+    for pid in pids:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.acquire()
+
+
+def test_forkserver():
+    with ClusterProcessPool(
+        cast(Type["Cluster"], PingCluster), size=1, mp_context="forkserver", preload=[]
+    ) as pool:
+        cluster_process = pool.acquire()
+        try:
+            assert cluster_process.proxy.scale(3) == "scale(3)"
+            assert cluster_process.proxy.num_workers == 3
+        finally:
+            stop(cluster_process)
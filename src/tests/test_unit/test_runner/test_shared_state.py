@@ -0,0 +1,81 @@
+import pickle
+import time
+
+import pytest
+
+from dask_remote.runner.shared_state import SEQUENCE, SharedState
+
+
+@pytest.fixture
+def shared_state():
+    shared_state = SharedState(size=1024)
+    yield shared_state
+    shared_state.close()
+    shared_state.unlink()
+
+
+@pytest.fixture
+def reader(shared_state):
+    reader = SharedState(name=shared_state.name)
+    yield reader
+    reader.close()
+
+
+def test_empty(reader):
+    assert reader.read() is None
+
+
+def test_write(shared_state, reader):
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+    version, timestamp, snapshot = reader.read()
+
+    assert version == 1
+    assert timestamp == pytest.approx(time.time(), abs=1)
+    assert snapshot == {"status": "running"}
+
+
+def test_known_version(shared_state, reader):
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+
+    assert reader.read(known_version=1)[::2] == (1, None)
+
+
+def test_touch(shared_state, reader):
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+    _, written, _ = reader.read()
+    time.sleep(0.01)
+    shared_state.touch()
+    version, touched, snapshot = reader.read()
+
+    assert touched > written
+    assert (version, snapshot) == (1, {"status": "running"})
+
+
+def test_last_read(shared_state, reader):
+    assert shared_state.last_read == 0
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+    before = time.time()
+    reader.read()
+
+    assert shared_state.last_read >= before
+
+
+def test_overflow(shared_state, reader):
+    assert not shared_state.write(1, b"x" * 2048)
+    assert reader.read() is None
+
+
+def test_write_in_progress(shared_state, reader):
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+    SEQUENCE.pack_into(shared_state._shm.buf, 0, 3)  # odd: a write never completed
+
+    assert reader.read() is None
+
+
+def test_pickle(shared_state):
+    shared_state.write(1, pickle.dumps({"status": "running"}))
+    reader = pickle.loads(pickle.dumps(shared_state))
+
+    assert reader.name == shared_state.name
+    assert reader.read()[2] == {"status": "running"}
+    reader.close()
@@ -0,0 +1,82 @@
+import os
+import signal
+import time
+from typing import TYPE_CHECKING, Type, cast
+
+import pytest
+
+from dask_remote.runner.cluster_process import ClusterUnavailableError
+from dask_remote.runner.supervisor import ClusterSupervisor
+
+from .conftest import PingCluster
+
+
+if TYPE_CHECKING:
+    from distributed.deploy.cluster import Cluster
+
+
+@pytest.fixture
+def supervisor():
+    with ClusterSupervisor(
+        cast(Type["Cluster"], PingCluster),
+        heartbeat_interval=0.05,
+        heartbeat_timeout=0.2,
+        max_missed_heartbeats=2,
+        shutdown_timeout=0.5,
+    ) as supervisor:
+        yield supervisor
+
+
+def wait_for_restarts(supervisor, restarts=1, timeout=10):
+    deadline = time.monotonic() + timeout
+    while supervisor.restarts < restarts:
+        assert time.monotonic() < deadline, "Cluster process not restarted"
+        time.sleep(0.01)
+
+
+def test_restarts_exited(supervisor):
+    proxy = supervisor.proxy
+    assert proxy.scale(2) == "scale(2)"
+    pid = supervisor.cluster_process.pid
+    os.kill(pid, signal.SIGKILL)
+
+    wait_for_restarts(supervisor)
+    assert supervisor.proxy is proxy
+    assert supervisor.cluster_process.pid != pid
+    assert proxy.num_workers == 2  # scaled again
+
+
+def test_restarts_unresponsive(supervisor):
+    proxy = supervisor.proxy
+    assert proxy.status == "running"  # answered a first heartbeat
+    time.sleep(0.1)
+    os.kill(supervisor.cluster_process.pid, signal.SIGSTOP)
+
+    with pytest.raises(ClusterUnavailableError):
+        proxy._submit_cmd({"method": "sleep", "args": [0]})
+    wait_for_restarts(supervisor)
+    assert proxy.status == "running"
+
+
+def test_restart_keeps_subscription(supervisor):
+    proxy = supervisor.proxy
+    proxy.subscribe()
+    supervisor.restart()
+
+    assert proxy._subscribed
+    assert proxy.scale(3) == "scale(3)"
+    deadline = time.monotonic() + 5
+    while proxy.cached_state.get("num_workers") != 3:
+        assert time.monotonic() < deadline, "No state received"
+        time.sleep(0.01)
+
+
+def test_close(supervisor):
+    proxy = supervisor.proxy
+    pid = supervisor.cluster_process.pid
+    supervisor.close(timeout=5)
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)  # exited, and joined
+    with pytest.raises(ClusterUnavailableError):
+        proxy.scale(1)
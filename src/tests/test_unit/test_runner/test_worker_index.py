@@ -0,0 +1,86 @@
+import pytest
+
+from dask_remote.runner.worker_index import WorkerIndex
+
+from .conftest import worker_info
+
+
+@pytest.fixture
+def index():
+    index = WorkerIndex()
+    index.update({"a": worker_info(0), "b": worker_info(1)})
+    return index
+
+
+def test_full_listing(index):
+    reset, added, changed, removed = index.deltas()
+
+    assert reset
+    assert added == {"a": worker_info(0), "b": worker_info(1)}
+    assert changed == {} and removed == []
+
+
+def test_deltas(index):
+    token = index.token
+    index.update({"b": worker_info(1, nthreads=2), "c": worker_info(2)})
+    reset, added, changed, removed = index.deltas(token)
+
+    assert not reset
+    assert added == {"c": worker_info(2)}
+    assert changed == {"b": worker_info(1, nthreads=2)}
+    assert removed == ["a"]
+
+
+def test_no_change(index):
+    token = index.token
+    index.update({"a": worker_info(0), "b": worker_info(1)})
+
+    assert index.token == token
+    assert index.deltas(token) == (False, {}, {}, [])
+
+
+def test_fields(index):
+    token = index.token
+    index.update({"a": worker_info(0, local_directory="/data"), "b": worker_info(1, nthreads=2)})
+
+    _, _, changed, _ = index.deltas(token, fields=["nthreads"])
+    assert changed == {"b": {"nthreads": 2}}
+
+
+@pytest.mark.parametrize("token", ["other:1", "garbage", "{epoch}:42"])
+def test_invalid_token(index, token):
+    reset, added, _, _ = index.deltas(token.format(epoch=index.epoch))
+
+    assert reset
+    assert sorted(added) == ["a", "b"]
+
+
+def test_removed_horizon():
+    index = WorkerIndex(max_removed=1)
+    index.update({"a": worker_info(0), "b": worker_info(1)})
+    token = index.token
+    index.update({"b": worker_info(1)})
+    index.update({})
+
+    assert index.deltas(token)[0]  # the removal of "a" was forgotten
+
+
+def test_updated_in_place():
+    workers = {"a": worker_info(0), "b": worker_info(1)}
+    index = WorkerIndex()
+    index.update(workers)
+    token = index.token
+    workers["a"]["nthreads"] = 2  # e.g. the scheduler info of an in-process cluster
+    workers["a"]["metrics"] = {"memory": 1}
+    del workers["b"]
+    index.update(workers)
+    reset, added, changed, removed = index.deltas(token)
+
+    assert not reset and added == {}
+    assert changed == {"a": workers["a"]}
+    assert removed == ["b"]
+
+    token = index.token
+    workers["a"]["metrics"]["memory"] = 2
+    index.update(workers)
+    assert index.deltas(token)[2] == {"a": workers["a"]}